@@ -5,11 +5,14 @@ from flask import Flask
 
 from .config import BaseConfig
 from .db.session import db
+from .db.ext_storage import storage
 from .api.health.routes import bp as health_bp
 from .api.users.routes import bp as users_bp
 from .api.papers.routes import bp as papers_bp
+from .api.metrics.routes import bp as metrics_bp
 from .docs.routes import bp as docs_bp
 from .errors import register_error_handlers
+from .services.precompute_service import init_precompute
 from .integrations.supabase_client import supabase_ext
 from flask_cors import CORS
 
@@ -23,11 +26,14 @@ def create_app(config_class: type[BaseConfig] | None = None) -> Flask:
     # Init extensions
     db.init_app(app)
     supabase_ext.init_app(app)
+    storage.init_app(app)
+    init_precompute(app)
 
     # Register blueprints
     app.register_blueprint(health_bp, url_prefix="/api/health")
     app.register_blueprint(users_bp, url_prefix="/api/users")
     app.register_blueprint(papers_bp, url_prefix="/api/papers")
+    app.register_blueprint(metrics_bp, url_prefix="/api/metrics")
     app.register_blueprint(docs_bp)
 
     # Global error handlers
@@ -0,0 +1,46 @@
+"""Local metrics endpoints (per-call LLM latency / token telemetry, storage cache counters, precompute queue)."""
+from __future__ import annotations
+
+from flask import Blueprint, Response, request
+
+from ...db.ext_storage import storage
+from ...errors import ok
+from ...llm.monitoring import llm_metrics
+
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.get("/llm")
+def llm():
+    """Histograms per model and call site; `?format=prometheus` returns the text exposition format."""
+    if request.args.get("format") == "prometheus":
+        return Response(llm_metrics.to_prometheus(), mimetype="text/plain; version=0.0.4")
+    return ok(llm_metrics.snapshot())
+
+
+@bp.post("/llm/reset")
+def llm_reset():
+    llm_metrics.reset()
+    return ok({"reset": True})
+
+
+@bp.get("/storage")
+def storage_cache():
+    """Hit / miss / eviction counters of the local disk cache tiers, and backend connection pool utilization."""
+    from ...file.file_download import oss_cache, presigned_urls
+
+    return ok({
+        "storage": storage.metrics(),
+        "pool": storage.pool_stats(),
+        "oss": oss_cache.metrics() if oss_cache is not None else {},
+        "presign": presigned_urls.metrics(),
+    })
+
+
+@bp.get("/precompute")
+def precompute():
+    """Queued / running jobs per resource budget and cumulative seconds per stage of the precompute scheduler."""
+    from ...services.precompute_service import precompute_scheduler
+
+    return ok(precompute_scheduler().stats())
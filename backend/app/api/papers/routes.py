@@ -2,16 +2,22 @@
 from __future__ import annotations
 
 import json
+import re
 import time
 from typing import Dict, Iterable, List, Optional
 import uuid
 from ...services.file_service import FileService
-from flask import Blueprint, Response, request, stream_with_context
+from ...services.precompute_service import precompute_scheduler
+from ...services.single_flight import TooManyWaitersError
+from flask import Blueprint, Response, current_app, redirect, request, send_file, stream_with_context
 from sqlalchemy.orm import Session
 
 from ...utils.get_hf_papers import get_hugging_face_top_daily_paper
 
 from ...db.session import db
+from ...db.ext_storage import storage
+from ...db.storage.base_storage import ObjectStat
+from ...file.artifact_format import GZIP_MAGIC, ZSTD_MAGIC, decode_artifact_bytes
 from ...errors import ok
 from ...services.paper_service import PaperService
 from ...domain.paper import Paper
@@ -147,6 +153,9 @@ def get_daily_paper():
         print("Creating paper:", p.title)
         created = svc.create_paper(p)
         created_items.append(PaperOut.model_validate(asdict(created)).model_dump())
+    if created_items and current_app.config.get("PRECOMPUTE_ENABLED"):
+        # 新入库论文提前生成下载/解析/翻译/解读产物，按 votes 优先
+        precompute_scheduler().submit_many((item["paper_id"], item.get("votes")) for item in created_items if item.get("paper_id"))
     return ok(len(created_items), 201 if created_items else 200)
 
 
@@ -246,6 +255,13 @@ def paper_translate():
         resp.headers.setdefault("Access-Control-Allow-Origin", "*")
         return resp
 
+    except TooManyWaitersError as e:
+        return Response(
+            json.dumps({"error": str(e)}),
+            status=429,
+            mimetype="application/json",
+            headers={"Retry-After": "5"},
+        )
     except Exception as e:
         print("translate-stream failed")
         return Response(
@@ -313,6 +329,13 @@ def paper_interpret():
         resp.headers.setdefault("Access-Control-Allow-Origin", "*")
         return resp
 
+    except TooManyWaitersError as e:
+        return Response(
+            json.dumps({"error": str(e)}),
+            status=429,
+            mimetype="application/json",
+            headers={"Retry-After": "5"},
+        )
     except Exception as e:
         print("translate-stream failed")
         return Response(
@@ -386,6 +409,168 @@ def get_by_paper_id(paper_id: str):
     return ok(PaperOut.model_validate(asdict(p)).model_dump())
 
 
+_FILE_MIMETYPES = {
+    ".pdf": "application/pdf",
+    ".md": "text/markdown; charset=utf-8",
+    ".json": "application/json",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+
+
+# 论文编号（如 2401.01234v2）只含字母数字、点与连字符，且不以点开头，不会构成 "." / ".." 或路径分隔
+_PAPER_ID_RE = re.compile(r"^[0-9A-Za-z][0-9A-Za-z.\-]*$")
+
+
+def _is_safe_file_path(paper_id: str, name: str) -> bool:
+    """paper_id 只能是单个编号段，name 的每一段都不能是空、"." 或 ".."，也不能含反斜杠。"""
+    if not _PAPER_ID_RE.match(paper_id) or ".." in paper_id:
+        return False
+    parts = name.split("/")
+    return "\\" not in name and all(part not in ("", ".", "..") for part in parts)
+
+
+def _paper_file_keys(paper_id: str, name: str) -> tuple[str, ...]:
+    """
+    论文文件可能的 Storage key：资产上传写在 hf_papers/{id}/ 下，PDF 下载时另存一份在 papers/{id}/ 下。
+    LocalStorage 的根目录就是流水线写入的 STORAGE_LOCAL_PATH（默认 hf_papers），资产直接位于 {id}/ 下，不再重复前缀。
+    """
+    if current_app.config.get("STORAGE_TYPE", "local") == "local":
+        return f"{paper_id}/{name}", f"papers/{paper_id}/{name}"
+    return f"hf_papers/{paper_id}/{name}", f"papers/{paper_id}/{name}"
+
+
+def _resolve_paper_file(paper_id: str, name: str) -> Optional[tuple[str, ObjectStat]]:
+    """论文文件的 key 与 stat（大小 / ETag / Content-Encoding），每个候选 key 只一次 HEAD。"""
+    for key in _paper_file_keys(paper_id, name):
+        try:
+            return key, storage.stat(key)
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def _is_encoded_file(path: str) -> bool:
+    with open(path, "rb") as f:
+        head = f.read(4)
+    return head[:2] == GZIP_MAGIC or head == ZSTD_MAGIC
+
+
+def _decoded_file_response(data: bytes, content_encoding: Optional[str], suffix: str,
+                           etag: Optional[str], cache_control: str) -> Response:
+    """
+    压缩存储的产物（如 gzip 的 _report.md）：存储大小与 Range 偏移都对应压缩表示，
+    而读出的字节可能已被客户端解压，这里统一解码后整体返回，Content-Length 按解码后的长度，不支持 Range。
+    """
+    body = decode_artifact_bytes(data, content_encoding)
+    resp = Response(body, status=200, content_type=_FILE_MIMETYPES[suffix],
+                    headers={"Accept-Ranges": "none", "Cache-Control": cache_control})
+    if etag:
+        resp.set_etag(etag)
+    return resp
+
+
+def _file_cache_control(suffix: str) -> str:
+    # PDF / 图片按 arXiv 版本不会变，可长期缓存；Markdown / JSON 可能重新生成，每次用 ETag 校验
+    if suffix in (".md", ".json"):
+        return "no-cache"
+    return f"public, max-age={current_app.config.get('FILE_SERVING_MAX_AGE', 86400)}"
+
+
+@bp.get("/<paper_id>/files/<path:name>")
+def get_paper_file(paper_id: str, name: str):
+    """
+    下载论文的 PDF / Markdown 等静态文件，worker 尽量不搬运字节：
+    1) 本地文件（LocalStorage / 磁盘缓存命中）用 send_file，走 wsgi.file_wrapper / sendfile；
+    2) 配置了 FILE_SERVING_ACCEL_PREFIX 时返回 X-Accel-Redirect，由 nginx 直接回源对象存储；
+    3) 否则 302 到本地签名的预签名 URL；
+    4) 都不可用时才由 worker 流式转发。
+    全部路径都带强 ETag + Cache-Control，并支持 Range / If-Range（断点续传、PDF 按页懒加载）。
+    """
+    suffix = name[name.rfind("."):].lower() if "." in name else ""
+    if not _is_safe_file_path(paper_id, name) or suffix not in _FILE_MIMETYPES:
+        return ok(None, 404)
+    resolved = _resolve_paper_file(paper_id, name)
+    if resolved is None:
+        return ok(None, 404)
+    key, stat = resolved
+    size = stat.size
+    etag = stat.etag.strip('"') if stat.etag else None
+    cache_control = _file_cache_control(suffix)
+    config = current_app.config
+
+    local_path = storage.local_path(key)
+    if local_path is not None and suffix in (".md", ".json") and _is_encoded_file(local_path):
+        if etag and request.if_none_match.contains(etag):
+            return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": cache_control})
+        with open(local_path, "rb") as f:
+            return _decoded_file_response(f.read(), None, suffix, etag, cache_control)
+    if local_path is not None:
+        # Range / If-Range / If-None-Match 由 werkzeug 处理
+        resp = send_file(
+            local_path,
+            mimetype=_FILE_MIMETYPES[suffix].split(";")[0],
+            conditional=True,
+            etag=etag or True,
+        )
+        resp.headers["Cache-Control"] = cache_control
+        return resp
+
+    if etag and request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": cache_control})
+
+    accel_prefix = config.get("FILE_SERVING_ACCEL_PREFIX")
+    if accel_prefix:
+        resp = Response(status=200, content_type=_FILE_MIMETYPES[suffix])
+        resp.headers["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + key
+        resp.headers["Cache-Control"] = cache_control
+        if etag:
+            resp.set_etag(etag)
+        return resp
+
+    if config.get("FILE_SERVING_REDIRECT", True):
+        expires_s = int(config.get("FILE_SERVING_PRESIGN_EXPIRES_S", 900))
+        url = storage.presigned_url(key, expires_s)
+        if url:
+            resp = redirect(url, code=302)
+            # 跳转本身只在签名有效期内可缓存
+            resp.headers["Cache-Control"] = f"private, max-age={max(expires_s - 60, 0)}"
+            if etag:
+                resp.set_etag(etag)
+            return resp
+
+    if stat.content_encoding and stat.content_encoding != "identity":
+        return _decoded_file_response(storage.load_once(key), stat.content_encoding, suffix, etag, cache_control)
+
+    byte_range = request.range
+    if byte_range is not None and request.if_range is not None:
+        # If-Range 校验不通过（对象已变化，或只给了日期）就忽略 Range，返回完整内容
+        if not etag or request.if_range.etag != etag:
+            byte_range = None
+
+    status = 200
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": cache_control}
+    # 多段 Range 不支持，按 RFC 退回 200 完整内容
+    if byte_range is not None and byte_range.units == "bytes" and len(byte_range.ranges) == 1:
+        span = byte_range.range_for_length(size)
+        if span is None:
+            return Response(status=416, headers={"Content-Range": f"bytes */{size}", "Accept-Ranges": "bytes"})
+        start, stop = span
+        body = storage.load_range(key, start, stop - 1)
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        headers["Content-Length"] = str(stop - start)
+    else:
+        body = storage.load_stream(key)
+        headers["Content-Length"] = str(size)
+
+    resp = Response(stream_with_context(body), status=status, content_type=_FILE_MIMETYPES[suffix], headers=headers)
+    if etag:
+        resp.set_etag(etag)
+    return resp
+
+
 @bp.put("/<paper_uuid>")
 def update_paper(paper_uuid: str):
     payload = PaperUpdateIn.model_validate_json(request.data)
@@ -29,3 +29,47 @@ class BaseConfig:
     # JWT
     JWT_SECRET: str = os.getenv("JWT_SECRET", "change-me")
     JWT_ALG: str = os.getenv("JWT_ALG", "HS256")
+
+    # Object storage (app.db.ext_storage)
+    STORAGE_TYPE: str = os.getenv("STORAGE_TYPE", "local")
+    STORAGE_LOCAL_PATH: str = os.getenv("STORAGE_LOCAL_PATH", "hf_papers")
+    ALIYUN_OSS_BUCKET_NAME: str | None = os.getenv("ALIYUN_OSS_BUCKET_NAME") or None
+    ALIYUN_OSS_ENDPOINT: str | None = os.getenv("ALIYUN_OSS_ENDPOINT") or None
+    ALIYUN_OSS_REGION: str | None = os.getenv("ALIYUN_OSS_REGION") or None
+    ALIYUN_OSS_ACCESS_KEY: str | None = (
+        os.getenv("ALIYUN_OSS_ACCESS_KEY") or os.getenv("OSS_ACCESS_KEY_ID") or None
+    )
+    ALIYUN_OSS_SECRET_KEY: str | None = (
+        os.getenv("ALIYUN_OSS_SECRET_KEY") or os.getenv("OSS_ACCESS_KEY_SECRET") or None
+    )
+    ALIYUN_OSS_AUTH_VERSION: str = os.getenv("ALIYUN_OSS_AUTH_VERSION", "v4")
+    ALIYUN_OSS_PATH: str = os.getenv("ALIYUN_OSS_PATH", "")
+    # Long-lived backend clients: connection pool size, timeouts (seconds) and retries
+    STORAGE_MAX_POOL_CONNECTIONS: int = int(os.getenv("STORAGE_MAX_POOL_CONNECTIONS", 50))
+    STORAGE_CONNECT_TIMEOUT: float = float(os.getenv("STORAGE_CONNECT_TIMEOUT", 10))
+    STORAGE_READ_TIMEOUT: float = float(os.getenv("STORAGE_READ_TIMEOUT", 60))
+    STORAGE_MAX_RETRIES: int = int(os.getenv("STORAGE_MAX_RETRIES", 3))
+
+    # Static file serving (GET /api/papers/<id>/files/<name>)
+    # nginx internal location that proxies to the bucket; empty disables X-Accel-Redirect
+    FILE_SERVING_ACCEL_PREFIX: str = os.getenv("FILE_SERVING_ACCEL_PREFIX", "")
+    FILE_SERVING_REDIRECT: bool = os.getenv("FILE_SERVING_REDIRECT", "true").lower() == "true"
+    FILE_SERVING_PRESIGN_EXPIRES_S: int = int(os.getenv("FILE_SERVING_PRESIGN_EXPIRES_S", 900))
+    FILE_SERVING_MAX_AGE: int = int(os.getenv("FILE_SERVING_MAX_AGE", 86400))
+
+    # Local disk cache in front of remote storage (empty dir disables it)
+    STORAGE_CACHE_DIR: str = os.getenv("STORAGE_CACHE_DIR", ".cache/storage")
+    STORAGE_CACHE_MAX_MB: int = int(os.getenv("STORAGE_CACHE_MAX_MB", 2048))
+    STORAGE_CACHE_REVALIDATE_S: float = float(os.getenv("STORAGE_CACHE_REVALIDATE_S", 300))
+
+    # Precompute of artifacts for newly ingested papers (app.services.precompute_service)
+    PRECOMPUTE_ENABLED: bool = os.getenv("PRECOMPUTE_ENABLED", "false").lower() == "true"
+    # Timer scanning recently created papers; 0 only precomputes papers ingested by get_daily_paper
+    PRECOMPUTE_INTERVAL_S: float = float(os.getenv("PRECOMPUTE_INTERVAL_S", 0))
+    PRECOMPUTE_RECENT_LIMIT: int = int(os.getenv("PRECOMPUTE_RECENT_LIMIT", 100))
+    # Failed papers are retried by the timer with exponential backoff, at most PRECOMPUTE_MAX_ATTEMPTS times
+    PRECOMPUTE_MAX_ATTEMPTS: int = int(os.getenv("PRECOMPUTE_MAX_ATTEMPTS", 3))
+    PRECOMPUTE_RETRY_BACKOFF_S: float = float(os.getenv("PRECOMPUTE_RETRY_BACKOFF_S", 600))
+    PRECOMPUTE_NET_CONCURRENCY: int = int(os.getenv("PRECOMPUTE_NET_CONCURRENCY", 4))
+    PRECOMPUTE_GPU_CONCURRENCY: int = int(os.getenv("PRECOMPUTE_GPU_CONCURRENCY", 1))
+    PRECOMPUTE_LLM_CONCURRENCY: int = int(os.getenv("PRECOMPUTE_LLM_CONCURRENCY", 2))
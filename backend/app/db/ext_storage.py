@@ -1,10 +1,12 @@
-from collections.abc import Generator
+from collections.abc import Generator, Iterable, Mapping
 from typing import Union
 
 from flask import Flask
 
 from .storage.aliyun_storage import AliyunStorage
 from .storage.azure_storage import AzureStorage
+from .storage.base_storage import ObjectStat
+from .storage.cached_storage import CachedStorage, DiskLRUCache
 from .storage.local_storage import LocalStorage
 from .storage.oci_storage import OCIStorage
 from .storage.s3_storage import S3Storage
@@ -30,6 +32,16 @@ class Storage:
         else:
             self.storage_runner = LocalStorage(app=app)
 
+        # Remote backends get a local disk LRU in front of them; hot papers are then served without a round trip.
+        cache_dir = app.config.get("STORAGE_CACHE_DIR")
+        if cache_dir and not isinstance(self.storage_runner, LocalStorage):
+            cache = DiskLRUCache(
+                cache_dir,
+                max_bytes=int(app.config.get("STORAGE_CACHE_MAX_MB", 2048)) * 1024 * 1024,
+                revalidate_after_s=app.config.get("STORAGE_CACHE_REVALIDATE_S", 300.0),
+            )
+            self.storage_runner = CachedStorage(app=app, backend=self.storage_runner, cache=cache)
+
     def save(self, filename, data):
         self.storage_runner.save(filename, data)
 
@@ -45,6 +57,12 @@ class Storage:
     def load_stream(self, filename: str) -> Generator:
         return self.storage_runner.load_stream(filename)
 
+    def load_range(self, filename: str, start: int, end: int | None = None) -> Generator:
+        return self.storage_runner.load_range(filename, start, end)
+
+    def size(self, filename) -> int:
+        return self.storage_runner.size(filename)
+
     def download(self, filename, target_filepath):
         self.storage_runner.download(filename, target_filepath)
 
@@ -54,6 +72,41 @@ class Storage:
     def delete(self, filename):
         return self.storage_runner.delete(filename)
 
+    def exists_many(self, filenames: Iterable[str]) -> dict[str, bool]:
+        return self.storage_runner.exists_many(filenames)
+
+    def load_many(self, filenames: Iterable[str]) -> dict[str, bytes | None]:
+        return self.storage_runner.load_many(filenames)
+
+    def save_many(self, items: Mapping[str, bytes]):
+        self.storage_runner.save_many(items)
+
+    def delete_many(self, filenames: Iterable[str]):
+        self.storage_runner.delete_many(filenames)
+
+    def etag(self, filename):
+        return self.storage_runner.etag(filename)
+
+    def stat(self, filename) -> ObjectStat:
+        """Size, ETag and stored Content-Encoding in one backend round trip."""
+        return self.storage_runner.stat(filename)
+
+    def local_path(self, filename) -> str | None:
+        return self.storage_runner.local_path(filename)
+
+    def presigned_url(self, filename, expires_s: int = 900) -> str | None:
+        return self.storage_runner.presigned_url(filename, expires_s)
+
+    def pool_stats(self) -> dict:
+        """Connection pool utilization of the backend client."""
+        return self.storage_runner.pool_stats()
+
+    def metrics(self) -> dict:
+        """Cache hit/miss/eviction counters (empty when no cache tier is configured)."""
+        if isinstance(self.storage_runner, CachedStorage):
+            return self.storage_runner.metrics()
+        return {}
+
 
 storage = Storage()
 
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import uuid
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from supabase import Client
 
@@ -107,6 +107,15 @@ class PaperRepositorySupabase:
         created = (res.data or [])[0]
         return _row_to_dc(created)
 
+    def upsert_many(self, rows: List[Dict[str, Any]], chunk_size: int = 500) -> int:
+        """Upsert rows in `chunk_size` batches: by paper_id when present, otherwise by (title, source_url)."""
+        with_id = [r for r in rows if r.get("paper_id")]
+        without_id = [r for r in rows if not r.get("paper_id")]
+        for batch_rows, on_conflict in ((with_id, "paper_id"), (without_id, "title,source_url")):
+            for i in range(0, len(batch_rows), chunk_size):
+                self.table.upsert(batch_rows[i:i + chunk_size], on_conflict=on_conflict).execute()
+        return len(rows)
+
     def update(self, paper_uuid: str, **fields) -> Optional[Paper]:
         allowed = {
             "title", "month_url", "source_url", "huggingface_url", "date",
@@ -4,7 +4,8 @@ from contextlib import closing
 import oss2 as aliyun_s3
 from flask import Flask
 
-from .base_storage import BaseStorage
+from .base_storage import BaseStorage, ObjectStat
+from .connection_pool import PoolSettings, requests_pool_stats
 
 
 class AliyunStorage(BaseStorage):
@@ -15,18 +16,23 @@ class AliyunStorage(BaseStorage):
 
         app_config = self.app.config
         self.bucket_name = app_config.get("ALIYUN_OSS_BUCKET_NAME")
-        self.folder = app.config.get("ALIYUN_OSS_PATH")
+        self.folder = app.config.get("ALIYUN_OSS_PATH") or ""
         oss_auth_method = aliyun_s3.Auth
         region = None
         if app_config.get("ALIYUN_OSS_AUTH_VERSION") == "v4":
             oss_auth_method = aliyun_s3.AuthV4
             region = app_config.get("ALIYUN_OSS_REGION")
         oss_auth = oss_auth_method(app_config.get("ALIYUN_OSS_ACCESS_KEY"), app_config.get("ALIYUN_OSS_SECRET_KEY"))
+        pool = PoolSettings.from_config(app)
+        # oss2 retries are process-wide; the Session owns the connection pool shared by all threads.
+        aliyun_s3.defaults.request_retries = pool.max_retries
+        self.session = aliyun_s3.Session(pool_size=pool.max_connections)
         self.client = aliyun_s3.Bucket(
             oss_auth,
             app_config.get("ALIYUN_OSS_ENDPOINT"),
             self.bucket_name,
-            connect_timeout=30,
+            session=self.session,
+            connect_timeout=pool.connect_timeout,
             region=region,
         )
 
@@ -43,7 +49,11 @@ class AliyunStorage(BaseStorage):
         else:
             filename = self.folder + "/" + filename
 
-        with closing(self.client.get_object(filename)) as obj:
+        try:
+            obj = self.client.get_object(filename)
+        except aliyun_s3.exceptions.NoSuchKey:
+            raise FileNotFoundError("File not found")
+        with closing(obj):
             data = obj.read()
         return data
 
@@ -55,7 +65,7 @@ class AliyunStorage(BaseStorage):
                 filename = self.folder + "/" + filename
 
             with closing(self.client.get_object(filename)) as obj:
-                while chunk := obj.read(4096):
+                while chunk := obj.read(64 * 1024):
                     yield chunk
 
         return generate()
@@ -82,3 +92,79 @@ class AliyunStorage(BaseStorage):
         else:
             filename = self.folder + "/" + filename
         self.client.delete_object(filename)
+
+    def presigned_url(self, filename, expires_s: int = 900):
+        if not self.folder or self.folder.endswith("/"):
+            filename = self.folder + filename
+        else:
+            filename = self.folder + "/" + filename
+
+        return self.client.sign_url("GET", filename, expires_s, slash_safe=True)
+
+    def pool_stats(self):
+        return requests_pool_stats(self.session.session)
+
+    def etag(self, filename):
+        if not self.folder or self.folder.endswith("/"):
+            filename = self.folder + filename
+        else:
+            filename = self.folder + "/" + filename
+
+        try:
+            return self.client.head_object(filename).etag
+        except aliyun_s3.exceptions.NotFound:
+            raise FileNotFoundError("File not found")
+
+    def stat(self, filename):
+        if not self.folder or self.folder.endswith("/"):
+            filename = self.folder + filename
+        else:
+            filename = self.folder + "/" + filename
+
+        try:
+            head = self.client.head_object(filename)
+        except aliyun_s3.exceptions.NotFound:
+            raise FileNotFoundError("File not found")
+        return ObjectStat(head.content_length, head.etag, head.headers.get("Content-Encoding"))
+
+    def delete_many(self, filenames):
+        keys = []
+        for filename in dict.fromkeys(filenames):
+            if not self.folder or self.folder.endswith("/"):
+                keys.append(self.folder + filename)
+            else:
+                keys.append(self.folder + "/" + filename)
+
+        # DeleteMultipleObjects takes at most 1000 keys per request.
+        for start in range(0, len(keys), 1000):
+            self.client.batch_delete_objects(keys[start : start + 1000])
+
+    def size(self, filename):
+        if not self.folder or self.folder.endswith("/"):
+            filename = self.folder + filename
+        else:
+            filename = self.folder + "/" + filename
+
+        try:
+            return self.client.head_object(filename).content_length
+        except aliyun_s3.exceptions.NotFound:
+            raise FileNotFoundError("File not found")
+
+    def load_range(self, filename: str, start: int, end: int | None = None) -> Generator:
+        def generate(filename: str = filename) -> Generator:
+            if not self.folder or self.folder.endswith("/"):
+                filename = self.folder + filename
+            else:
+                filename = self.folder + "/" + filename
+
+            # "standard" makes an out-of-bounds end behave like HTTP (clamped) instead of returning the whole object.
+            headers = {"x-oss-range-behavior": "standard"}
+            try:
+                obj = self.client.get_object(filename, byte_range=(start, end), headers=headers)
+            except aliyun_s3.exceptions.NoSuchKey:
+                raise FileNotFoundError("File not found")
+            with closing(obj):
+                while chunk := obj.read(64 * 1024):
+                    yield chunk
+
+        return generate()
@@ -1,11 +1,10 @@
+import threading
 from collections.abc import Generator
-from datetime import datetime, timedelta, timezone
 
-# from azure.storage.blob import AccountSasPermissions, BlobServiceClient, ResourceTypes, generate_account_sas
 from flask import Flask
 
-# from extensions.ext_redis import redis_client
-from .base_storage import BaseStorage
+from .base_storage import BaseStorage, ObjectStat
+from .connection_pool import PoolSettings, requests_pool_stats
 
 
 class AzureStorage(BaseStorage):
@@ -18,6 +17,9 @@ class AzureStorage(BaseStorage):
         self.account_url = app_config.get("AZURE_BLOB_ACCOUNT_URL")
         self.account_name = app_config.get("AZURE_BLOB_ACCOUNT_NAME")
         self.account_key = app_config.get("AZURE_BLOB_ACCOUNT_KEY")
+        self._client = None
+        self._session = None
+        self._client_lock = threading.Lock()
 
     def save(self, filename, data):
         client = self._sync_client()
@@ -25,10 +27,15 @@ class AzureStorage(BaseStorage):
         blob_container.upload_blob(filename, data)
 
     def load_once(self, filename: str) -> bytes:
+        from azure.core.exceptions import ResourceNotFoundError
+
         client = self._sync_client()
         blob = client.get_container_client(container=self.bucket_name)
         blob = blob.get_blob_client(blob=filename)
-        data = blob.download_blob().readall()
+        try:
+            data = blob.download_blob().readall()
+        except ResourceNotFoundError:
+            raise FileNotFoundError("File not found")
         return data
 
     def load_stream(self, filename: str) -> Generator:
@@ -61,18 +68,76 @@ class AzureStorage(BaseStorage):
         blob_container = client.get_container_client(container=self.bucket_name)
         blob_container.delete_blob(filename)
 
-    # def _sync_client(self):
-    #     cache_key = "azure_blob_sas_token_{}_{}".format(self.account_name, self.account_key)
-    #     cache_result = redis_client.get(cache_key)
-    #     if cache_result is not None:
-    #         sas_token = cache_result.decode("utf-8")
-    #     else:
-    #         sas_token = generate_account_sas(
-    #             account_name=self.account_name,
-    #             account_key=self.account_key,
-    #             resource_types=ResourceTypes(service=True, container=True, object=True),
-    #             permission=AccountSasPermissions(read=True, write=True, delete=True, list=True, add=True, create=True),
-    #             expiry=datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1),
-    #         )
-    #         redis_client.set(cache_key, sas_token, ex=3000)
-    #     return BlobServiceClient(account_url=self.account_url, credential=sas_token)
+    def etag(self, filename):
+        client = self._sync_client()
+
+        blob = client.get_blob_client(container=self.bucket_name, blob=filename)
+        if not blob.exists():
+            raise FileNotFoundError("File not found")
+        return blob.get_blob_properties().etag
+
+    def stat(self, filename):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        client = self._sync_client()
+
+        blob = client.get_blob_client(container=self.bucket_name, blob=filename)
+        try:
+            props = blob.get_blob_properties()
+        except ResourceNotFoundError:
+            raise FileNotFoundError("File not found")
+        return ObjectStat(props.size, props.etag, props.content_settings.content_encoding)
+
+    def size(self, filename):
+        client = self._sync_client()
+
+        blob = client.get_blob_client(container=self.bucket_name, blob=filename)
+        if not blob.exists():
+            raise FileNotFoundError("File not found")
+        return blob.get_blob_properties().size
+
+    def load_range(self, filename: str, start: int, end: int | None = None) -> Generator:
+        client = self._sync_client()
+
+        def generate(filename: str = filename) -> Generator:
+            blob = client.get_blob_client(container=self.bucket_name, blob=filename)
+            length = None if end is None else end - start + 1
+            yield from blob.download_blob(offset=start, length=length).chunks()
+
+        return generate()
+
+    def pool_stats(self):
+        if self._session is None:
+            return {}
+        return requests_pool_stats(self._session)
+
+    def _sync_client(self):
+        # Built once and shared by all threads: BlobServiceClient is thread-safe and its transport keeps the pool.
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import requests
+                    from azure.core.pipeline.transport import RequestsTransport
+                    from azure.storage.blob import BlobServiceClient
+
+                    pool = PoolSettings.from_config(self.app)
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=pool.max_connections, pool_maxsize=pool.max_connections
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    transport = RequestsTransport(
+                        session=session,
+                        session_owner=False,
+                        connection_timeout=pool.connect_timeout,
+                        read_timeout=pool.read_timeout,
+                    )
+                    self._session = session
+                    self._client = BlobServiceClient(
+                        account_url=self.account_url,
+                        credential={"account_name": self.account_name, "account_key": self.account_key},
+                        transport=transport,
+                        retry_total=pool.max_retries,
+                    )
+        return self._client
@@ -1,15 +1,29 @@
 """Abstract interface for file storage implementations."""
 
 from abc import ABC, abstractmethod
-from collections.abc import Generator
+from collections.abc import Callable, Generator, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
 
 from flask import Flask
 
 
+@dataclass(frozen=True)
+class ObjectStat:
+    """Size, version tag and stored ``Content-Encoding`` of an object, as returned by one HEAD / stat."""
+
+    size: int
+    etag: Optional[str] = None
+    content_encoding: Optional[str] = None
+
+
 class BaseStorage(ABC):
     """Interface for file storage."""
 
     app = None
+    # Concurrency of the default batch implementations (one request per object).
+    batch_max_workers = 16
 
     def __init__(self, app: Flask):
         self.app = app
@@ -20,6 +34,7 @@ class BaseStorage(ABC):
 
     @abstractmethod
     def load_once(self, filename: str) -> bytes:
+        # Implementations raise ``FileNotFoundError`` for a missing object (``load_many`` relies on it).
         raise NotImplementedError
 
     @abstractmethod
@@ -37,3 +52,83 @@ class BaseStorage(ABC):
     @abstractmethod
     def delete(self, filename):
         raise NotImplementedError
+
+    def size(self, filename) -> int:
+        """Return the object size in bytes; raises ``FileNotFoundError`` if it does not exist."""
+        return len(self.load_once(filename))
+
+    def load_range(self, filename: str, start: int, end: int | None = None) -> Generator:
+        """Stream bytes ``start..end`` (inclusive, like an HTTP Range; ``end=None`` means to the end).
+
+        The default skips through ``load_stream``; backends override it with a native range read.
+        """
+
+        def generate() -> Generator:
+            position = 0
+            for chunk in self.load_stream(filename):
+                chunk_end = position + len(chunk)
+                if chunk_end > start:
+                    piece = chunk[max(start - position, 0) :]
+                    if end is not None and chunk_end > end + 1:
+                        piece = piece[: len(piece) - (chunk_end - end - 1)]
+                        yield piece
+                        return
+                    yield piece
+                position = chunk_end
+
+        return generate()
+
+    def local_path(self, filename) -> str | None:
+        """Filesystem path of the object if it can be served straight from local disk, else None."""
+        return None
+
+    def presigned_url(self, filename, expires_s: int = 900) -> str | None:
+        """Time-limited GET URL signed locally, or None if the backend cannot produce one."""
+        return None
+
+    def pool_stats(self) -> dict:
+        """Connection pool utilization of the backend client (empty if it has no HTTP pool)."""
+        return {}
+
+    def etag(self, filename) -> str | None:
+        """Return an opaque version tag of the object (None if the backend cannot tell).
+
+        Raises ``FileNotFoundError`` if the object does not exist.
+        """
+        return None
+
+    def stat(self, filename) -> ObjectStat:
+        """Size, ETag and Content-Encoding of the object; raises ``FileNotFoundError`` if it does not exist.
+
+        The default costs two round trips; backends override it with a single HEAD.
+        """
+        return ObjectStat(self.size(filename), self.etag(filename))
+
+    def _fan_out(self, fn: Callable, items: list) -> list:
+        """Run ``fn`` over ``items`` on a thread pool; results are returned in input order."""
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.batch_max_workers, len(items))) as pool:
+            return list(pool.map(fn, items))
+
+    def exists_many(self, filenames: Iterable[str]) -> dict[str, bool]:
+        filenames = list(dict.fromkeys(filenames))
+        return dict(zip(filenames, self._fan_out(self.exists, filenames)))
+
+    def load_many(self, filenames: Iterable[str]) -> dict[str, bytes | None]:
+        """Load several objects; missing ones map to None."""
+
+        def load(filename: str) -> bytes | None:
+            try:
+                return self.load_once(filename)
+            except FileNotFoundError:
+                return None
+
+        filenames = list(dict.fromkeys(filenames))
+        return dict(zip(filenames, self._fan_out(load, filenames)))
+
+    def save_many(self, items: Mapping[str, bytes]):
+        self._fan_out(lambda item: self.save(*item), list(items.items()))
+
+    def delete_many(self, filenames: Iterable[str]):
+        self._fan_out(self.delete, list(dict.fromkeys(filenames)))
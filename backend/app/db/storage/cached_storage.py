@@ -0,0 +1,344 @@
+"""Size-bounded local disk cache tier in front of any storage backend."""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Generator
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from flask import Flask
+
+from .base_storage import BaseStorage, ObjectStat
+
+
+@dataclass
+class _Entry:
+    key: str
+    size: int
+    etag: Optional[str]
+    validated_at: float
+
+
+class DiskLRUCache:
+    """On-disk LRU cache of remote objects with a total byte limit.
+
+    Each object is stored as ``<sha1(key)>.bin`` plus a ``.json`` sidecar (key, size, etag,
+    validated_at); both are written to a temporary file first and moved into place with
+    ``os.replace``, so readers never see a partial file. The index is rebuilt from the sidecars on
+    startup, oldest access first.
+
+    An entry younger than ``revalidate_after_s`` is served without touching the backend. Older
+    entries are revalidated by comparing their ETag with the backend's current one and only
+    re-downloaded when it changed. ``revalidate_after_s=None`` treats objects as immutable.
+    Concurrent readers of the same missing key share a single fetch.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, revalidate_after_s: Optional[float] = 300.0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.revalidate_after_s = revalidate_after_s
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, threading.Event] = {}
+        self._bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "refreshed": 0, "evictions": 0, "fetch_errors": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _base(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def path_of(self, key: str) -> str:
+        return self._base(key) + ".bin"
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            data_path = meta_path[: -len(".json")] + ".bin"
+            try:
+                with open(meta_path, encoding="utf-8") as f:
+                    entry = _Entry(**json.load(f))
+                entries.append((os.path.getatime(data_path), entry))
+            except (OSError, ValueError, TypeError):
+                for path in (meta_path, data_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+        for _, entry in sorted(entries, key=lambda item: item[0]):
+            self._index[entry.key] = entry
+            self._bytes += entry.size
+        with self._lock:
+            self._evict()
+
+    def _write_meta(self, entry: _Entry):
+        meta_path = self._base(entry.key) + ".json"
+        tmp = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f)
+        os.replace(tmp, meta_path)
+
+    def _remove(self, key: str):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        base = self._base(key)
+        for path in (base + ".bin", base + ".json"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        # Never evict the most recently used entry: it is the one the caller is about to read.
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key = next(iter(self._index))
+            self._remove(key)
+            self.stats["evictions"] += 1
+
+    def fresh_path(self, key: str) -> Optional[str]:
+        """Path of a cached copy that does not need revalidation yet, or None; never fetches."""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or not (
+                self.revalidate_after_s is None or time.time() - entry.validated_at < self.revalidate_after_s
+            ):
+                return None
+            path = self.path_of(key)
+            if not os.path.exists(path):
+                return None
+            self._index.move_to_end(key)
+            self.stats["hits"] += 1
+            return path
+
+    def fresh_entry(self, key: str) -> Optional[_Entry]:
+        """Index entry of a cached copy that does not need revalidation yet, or None; never fetches."""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or not (
+                self.revalidate_after_s is None or time.time() - entry.validated_at < self.revalidate_after_s
+            ):
+                return None
+            return entry if os.path.exists(self.path_of(key)) else None
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def get_path(
+        self,
+        key: str,
+        fetch_to: Callable[[str], Optional[str]],
+        current_etag: Optional[Callable[[], Optional[str]]] = None,
+    ) -> str:
+        """Return the local path of an up-to-date copy of ``key``.
+
+        Args:
+            fetch_to: downloads the object to the given path and returns its ETag (or None).
+                Raises ``FileNotFoundError`` when the object does not exist.
+            current_etag: returns the backend's current ETag, used to revalidate stale entries.
+        """
+        while True:
+            with self._lock:
+                entry = self._index.get(key)
+                path = self.path_of(key)
+                if entry is not None and not os.path.exists(path):
+                    self._remove(key)
+                    entry = None
+                if entry is not None and (
+                    self.revalidate_after_s is None or time.time() - entry.validated_at < self.revalidate_after_s
+                ):
+                    self._index.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return path
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    done = self._inflight[key] = threading.Event()
+                    break
+            # Another thread is fetching this key: wait for it, then look again.
+            waiter.wait()
+
+        try:
+            if entry is not None and current_etag is not None and entry.etag is not None:
+                try:
+                    etag = current_etag()
+                except FileNotFoundError:
+                    self.invalidate(key)
+                    raise
+                if etag == entry.etag:
+                    with self._lock:
+                        entry.validated_at = time.time()
+                        self._write_meta(entry)
+                        self._index.move_to_end(key)
+                        self.stats["revalidated"] += 1
+                    return path
+
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                etag = fetch_to(tmp)
+            except BaseException:
+                with self._lock:
+                    self.stats["fetch_errors"] += 1
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            size = os.path.getsize(tmp)
+            with self._lock:
+                self._remove(key)
+                os.replace(tmp, path)
+                new_entry = _Entry(key=key, size=size, etag=etag, validated_at=time.time())
+                self._write_meta(new_entry)
+                self._index[key] = new_entry
+                self._bytes += size
+                self.stats["refreshed" if entry is not None else "misses"] += 1
+                self._evict()
+            return path
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    def read_bytes(self, key: str, fetch_to, current_etag=None) -> bytes:
+        for _ in range(2):
+            path = self.get_path(key, fetch_to, current_etag)
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                # Evicted between lookup and open by a concurrent insert: fetch again.
+                continue
+        raise FileNotFoundError(key)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._index), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class CachedStorage(BaseStorage):
+    """Wrap any ``BaseStorage`` backend with a local ``DiskLRUCache``.
+
+    Reads are served from the cache (revalidated by ETag when the backend supports ``etag()``),
+    writes and deletes go through to the backend and update the cache.
+    """
+
+    def __init__(self, app: Flask, backend: BaseStorage, cache: DiskLRUCache):
+        super().__init__(app)
+        self.backend = backend
+        self.cache = cache
+
+    def _fetch_to(self, filename: str, target_filepath: str) -> Optional[str]:
+        # ETag first: if the object changes during the download, the next revalidation refreshes it.
+        etag = self.backend.etag(filename)
+        self.backend.download(filename, target_filepath)
+        return etag
+
+    def _path(self, filename: str) -> str:
+        return self.cache.get_path(
+            filename,
+            lambda tmp: self._fetch_to(filename, tmp),
+            lambda: self.backend.etag(filename),
+        )
+
+    def save(self, filename, data):
+        self.backend.save(filename, data)
+        self.cache.invalidate(filename)
+
+    def load_once(self, filename: str) -> bytes:
+        return self.cache.read_bytes(
+            filename,
+            lambda tmp: self._fetch_to(filename, tmp),
+            lambda: self.backend.etag(filename),
+        )
+
+    def load_stream(self, filename: str) -> Generator:
+        def generate(filename: str = filename) -> Generator:
+            with open(self._path(filename), "rb") as f:
+                while chunk := f.read(64 * 1024):
+                    yield chunk
+
+        return generate()
+
+    def size(self, filename) -> int:
+        path = self.cache.fresh_path(filename)
+        if path is not None:
+            return os.path.getsize(path)
+        return self.backend.size(filename)
+
+    def load_range(self, filename: str, start: int, end: Optional[int] = None) -> Generator:
+        # Ranges are served from disk only when the object is already cached; otherwise they go straight to the
+        # backend's range read, so a viewer fetching a few pages does not pull the whole file through the cache.
+        path = self.cache.fresh_path(filename)
+        if path is None:
+            return self.backend.load_range(filename, start, end)
+
+        def generate() -> Generator:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                # Evicted since the lookup.
+                yield from self.backend.load_range(filename, start, end)
+                return
+            with f:
+                f.seek(start)
+                remaining = None if end is None else end - start + 1
+                while remaining is None or remaining > 0:
+                    chunk = f.read(64 * 1024 if remaining is None else min(64 * 1024, remaining))
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+
+        return generate()
+
+    def download(self, filename, target_filepath):
+        shutil.copyfile(self._path(filename), target_filepath)
+
+    def exists(self, filename):
+        return self.backend.exists(filename)
+
+    def delete(self, filename):
+        self.backend.delete(filename)
+        self.cache.invalidate(filename)
+
+    def exists_many(self, filenames):
+        return self.backend.exists_many(filenames)
+
+    def save_many(self, items):
+        self.backend.save_many(items)
+        for filename in items:
+            self.cache.invalidate(filename)
+
+    def delete_many(self, filenames):
+        filenames = list(filenames)
+        self.backend.delete_many(filenames)
+        for filename in filenames:
+            self.cache.invalidate(filename)
+
+    def etag(self, filename) -> Optional[str]:
+        return self.backend.etag(filename)
+
+    def stat(self, filename) -> ObjectStat:
+        entry = self.cache.fresh_entry(filename)
+        if entry is not None:
+            # The cached copy is what local_path() serves, so its size and tag describe that representation.
+            return ObjectStat(entry.size, entry.etag)
+        return self.backend.stat(filename)
+
+    def local_path(self, filename) -> Optional[str]:
+        return self.cache.fresh_path(filename)
+
+    def presigned_url(self, filename, expires_s: int = 900) -> Optional[str]:
+        return self.backend.presigned_url(filename, expires_s)
+
+    def pool_stats(self) -> dict:
+        return self.backend.pool_stats()
+
+    def metrics(self) -> dict:
+        return self.cache.metrics()
@@ -0,0 +1,69 @@
+"""Connection pool settings shared by the storage backends, and pool utilization snapshots."""
+
+from dataclasses import dataclass
+
+from flask import Flask
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    max_connections: int
+    connect_timeout: float
+    read_timeout: float
+    max_retries: int
+
+    @classmethod
+    def from_config(cls, app: Flask) -> "PoolSettings":
+        config = app.config
+        return cls(
+            max_connections=int(config.get("STORAGE_MAX_POOL_CONNECTIONS", 50)),
+            connect_timeout=float(config.get("STORAGE_CONNECT_TIMEOUT", 10)),
+            read_timeout=float(config.get("STORAGE_READ_TIMEOUT", 60)),
+            max_retries=int(config.get("STORAGE_MAX_RETRIES", 3)),
+        )
+
+
+def urllib3_pool_stats(manager) -> dict:
+    """Aggregate utilization of every host pool held by a urllib3 ``PoolManager``.
+
+    ``in_use`` is the number of connections currently checked out, ``opened`` the number of
+    connections created over the pool's lifetime (it keeps growing when connections are not reused).
+    """
+    stats = {"pools": 0, "max_connections": 0, "in_use": 0, "idle": 0, "opened": 0, "requests": 0}
+    pools = getattr(manager, "pools", None)
+    if pools is None:
+        return stats
+    with pools.lock:
+        host_pools = list(pools._container.values())
+    for pool in host_pools:
+        queue = getattr(pool, "pool", None)
+        if queue is None:
+            continue
+        available = queue.qsize()
+        idle = sum(1 for conn in list(queue.queue) if conn is not None)
+        stats["pools"] += 1
+        stats["max_connections"] += queue.maxsize
+        stats["in_use"] += max(queue.maxsize - available, 0)
+        stats["idle"] += idle
+        stats["opened"] += getattr(pool, "num_connections", 0)
+        stats["requests"] += getattr(pool, "num_requests", 0)
+    return stats
+
+
+def botocore_pool_stats(client) -> dict:
+    """Pool utilization of a boto3 client (its endpoint's urllib3 session)."""
+    http_session = getattr(getattr(client, "_endpoint", None), "http_session", None)
+    manager = getattr(http_session, "_manager", None)
+    return urllib3_pool_stats(manager) if manager is not None else {}
+
+
+def requests_pool_stats(session) -> dict:
+    """Pool utilization of a ``requests.Session`` (summed over its mounted adapters)."""
+    total: dict = {}
+    for adapter in dict.fromkeys(session.adapters.values()):
+        manager = getattr(adapter, "poolmanager", None)
+        if manager is None:
+            continue
+        for key, value in urllib3_pool_stats(manager).items():
+            total[key] = total.get(key, 0) + value
+    return total
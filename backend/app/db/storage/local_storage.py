@@ -4,7 +4,7 @@ from collections.abc import Generator
 
 from flask import Flask
 
-from .base_storage import BaseStorage
+from .base_storage import BaseStorage, ObjectStat
 
 
 class LocalStorage(BaseStorage):
@@ -12,28 +12,28 @@ class LocalStorage(BaseStorage):
 
     def __init__(self, app: Flask):
         super().__init__(app)
-        folder = self.app.config.get("STORAGE_LOCAL_PATH")
-        if not os.path.isabs(folder):
-            folder = os.path.join(app.root_path, folder)
-        self.folder = folder
+        # Relative to the working directory, like the ingestion pipeline that writes {STORAGE_LOCAL_PATH}/<paper_id>/
+        self.folder = os.path.abspath(self.app.config.get("STORAGE_LOCAL_PATH"))
+        self._root = os.path.realpath(self.folder)
+
+    def _full_path(self, filename: str) -> str:
+        """Resolve ``filename`` under the storage root; keys escaping it (``..``, absolute, symlinks) do not exist."""
+        path = os.path.realpath(os.path.join(self._root, filename))
+        if os.path.commonpath([self._root, path]) != self._root:
+            raise FileNotFoundError("File not found")
+        return path
 
     def save(self, filename, data):
-        if not self.folder or self.folder.endswith("/"):
-            filename = self.folder + filename
-        else:
-            filename = self.folder + "/" + filename
+        filename = self._full_path(filename)
 
         folder = os.path.dirname(filename)
         os.makedirs(folder, exist_ok=True)
 
-        with open(os.path.join(os.getcwd(), filename), "wb") as f:
+        with open(filename, "wb") as f:
             f.write(data)
 
     def load_once(self, filename: str) -> bytes:
-        if not self.folder or self.folder.endswith("/"):
-            filename = self.folder + filename
-        else:
-            filename = self.folder + "/" + filename
+        filename = self._full_path(filename)
 
         if not os.path.exists(filename):
             raise FileNotFoundError("File not found")
@@ -45,25 +45,19 @@ class LocalStorage(BaseStorage):
 
     def load_stream(self, filename: str) -> Generator:
         def generate(filename: str = filename) -> Generator:
-            if not self.folder or self.folder.endswith("/"):
-                filename = self.folder + filename
-            else:
-                filename = self.folder + "/" + filename
+            filename = self._full_path(filename)
 
             if not os.path.exists(filename):
                 raise FileNotFoundError("File not found")
 
             with open(filename, "rb") as f:
-                while chunk := f.read(4096):  # Read in chunks of 4KB
+                while chunk := f.read(64 * 1024):  # Read in chunks of 64KB
                     yield chunk
 
         return generate()
 
     def download(self, filename, target_filepath):
-        if not self.folder or self.folder.endswith("/"):
-            filename = self.folder + filename
-        else:
-            filename = self.folder + "/" + filename
+        filename = self._full_path(filename)
 
         if not os.path.exists(filename):
             raise FileNotFoundError("File not found")
@@ -71,17 +65,69 @@ class LocalStorage(BaseStorage):
         shutil.copyfile(filename, target_filepath)
 
     def exists(self, filename):
-        if not self.folder or self.folder.endswith("/"):
-            filename = self.folder + filename
-        else:
-            filename = self.folder + "/" + filename
+        try:
+            filename = self._full_path(filename)
+        except FileNotFoundError:
+            return False
 
         return os.path.exists(filename)
 
     def delete(self, filename):
-        if not self.folder or self.folder.endswith("/"):
-            filename = self.folder + filename
-        else:
-            filename = self.folder + "/" + filename
+        try:
+            filename = self._full_path(filename)
+        except FileNotFoundError:
+            return
         if os.path.exists(filename):
             os.remove(filename)
+
+    def etag(self, filename):
+        filename = self._full_path(filename)
+
+        if not os.path.exists(filename):
+            raise FileNotFoundError("File not found")
+        stat = os.stat(filename)
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    def stat(self, filename):
+        filename = self._full_path(filename)
+
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            raise FileNotFoundError("File not found")
+        return ObjectStat(stat.st_size, f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+    def local_path(self, filename):
+        try:
+            filename = self._full_path(filename)
+        except FileNotFoundError:
+            return None
+
+        return filename if os.path.isfile(filename) else None
+
+    def size(self, filename):
+        filename = self._full_path(filename)
+
+        if not os.path.exists(filename):
+            raise FileNotFoundError("File not found")
+        return os.path.getsize(filename)
+
+    def load_range(self, filename: str, start: int, end: int | None = None) -> Generator:
+        def generate(filename: str = filename) -> Generator:
+            filename = self._full_path(filename)
+
+            if not os.path.exists(filename):
+                raise FileNotFoundError("File not found")
+
+            with open(filename, "rb") as f:
+                f.seek(start)
+                remaining = None if end is None else end - start + 1
+                while remaining is None or remaining > 0:
+                    chunk = f.read(4096 if remaining is None else min(4096, remaining))
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+
+        return generate()
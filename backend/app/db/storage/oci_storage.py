@@ -1,11 +1,12 @@
 from collections.abc import Generator
-from contextlib import closing
 
 import boto3
+from botocore.client import Config
 from botocore.exceptions import ClientError
 from flask import Flask
 
-from .base_storage import BaseStorage
+from .base_storage import BaseStorage, ObjectStat
+from .connection_pool import PoolSettings, botocore_pool_stats
 
 
 class OCIStorage(BaseStorage):
@@ -13,12 +14,20 @@ class OCIStorage(BaseStorage):
         super().__init__(app)
         app_config = self.app.config
         self.bucket_name = app_config.get("OCI_BUCKET_NAME")
+        pool = PoolSettings.from_config(app)
         self.client = boto3.client(
             "s3",
             aws_secret_access_key=app_config.get("OCI_SECRET_KEY"),
             aws_access_key_id=app_config.get("OCI_ACCESS_KEY"),
             endpoint_url=app_config.get("OCI_ENDPOINT"),
             region_name=app_config.get("OCI_REGION"),
+            config=Config(
+                max_pool_connections=pool.max_connections,
+                connect_timeout=pool.connect_timeout,
+                read_timeout=pool.read_timeout,
+                retries={"max_attempts": pool.max_retries, "mode": "standard"},
+                tcp_keepalive=True,
+            ),
         )
 
     def save(self, filename, data):
@@ -26,8 +35,7 @@ class OCIStorage(BaseStorage):
 
     def load_once(self, filename: str) -> bytes:
         try:
-            with closing(self.client) as client:
-                data = client.get_object(Bucket=self.bucket_name, Key=filename)["Body"].read()
+            data = self.client.get_object(Bucket=self.bucket_name, Key=filename)["Body"].read()
         except ClientError as ex:
             if ex.response["Error"]["Code"] == "NoSuchKey":
                 raise FileNotFoundError("File not found")
@@ -38,9 +46,8 @@ class OCIStorage(BaseStorage):
     def load_stream(self, filename: str) -> Generator:
         def generate(filename: str = filename) -> Generator:
             try:
-                with closing(self.client) as client:
-                    response = client.get_object(Bucket=self.bucket_name, Key=filename)
-                    yield from response["Body"].iter_chunks()
+                response = self.client.get_object(Bucket=self.bucket_name, Key=filename)
+                yield from response["Body"].iter_chunks()
             except ClientError as ex:
                 if ex.response["Error"]["Code"] == "NoSuchKey":
                     raise FileNotFoundError("File not found")
@@ -50,16 +57,78 @@ class OCIStorage(BaseStorage):
         return generate()
 
     def download(self, filename, target_filepath):
-        with closing(self.client) as client:
-            client.download_file(self.bucket_name, filename, target_filepath)
+        self.client.download_file(self.bucket_name, filename, target_filepath)
 
     def exists(self, filename):
-        with closing(self.client) as client:
-            try:
-                client.head_object(Bucket=self.bucket_name, Key=filename)
-                return True
-            except:
-                return False
+        try:
+            self.client.head_object(Bucket=self.bucket_name, Key=filename)
+            return True
+        except:
+            return False
 
     def delete(self, filename):
         self.client.delete_object(Bucket=self.bucket_name, Key=filename)
+
+    def presigned_url(self, filename, expires_s: int = 900):
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket_name, "Key": filename}, ExpiresIn=expires_s
+        )
+
+    def pool_stats(self):
+        return botocore_pool_stats(self.client)
+
+    def etag(self, filename):
+        try:
+            return self.client.head_object(Bucket=self.bucket_name, Key=filename)["ETag"]
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError("File not found")
+            else:
+                raise
+
+
+    def stat(self, filename):
+        try:
+            head = self.client.head_object(Bucket=self.bucket_name, Key=filename)
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError("File not found")
+            else:
+                raise
+        return ObjectStat(head["ContentLength"], head["ETag"], head.get("ContentEncoding"))
+
+    def size(self, filename):
+        try:
+            return self.client.head_object(Bucket=self.bucket_name, Key=filename)["ContentLength"]
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError("File not found")
+            else:
+                raise
+
+    def load_range(self, filename: str, start: int, end: int | None = None) -> Generator:
+        def generate(filename: str = filename) -> Generator:
+            byte_range = f"bytes={start}-{'' if end is None else end}"
+            try:
+                response = self.client.get_object(Bucket=self.bucket_name, Key=filename, Range=byte_range)
+                yield from response["Body"].iter_chunks()
+            except ClientError as ex:
+                if ex.response["Error"]["Code"] == "NoSuchKey":
+                    raise FileNotFoundError("File not found")
+                else:
+                    raise
+
+        return generate()
+
+    def delete_many(self, filenames):
+        # DeleteObjects takes at most 1000 keys per request.
+        keys = list(dict.fromkeys(filenames))
+        for start in range(0, len(keys), 1000):
+            response = self.client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys[start : start + 1000]], "Quiet": True},
+            )
+            errors = response.get("Errors") or []
+            if errors:
+                failed = ", ".join(f"{e.get('Key')}: {e.get('Code')}" for e in errors[:5])
+                raise RuntimeError(f"delete_objects failed for {len(errors)} keys ({failed})")
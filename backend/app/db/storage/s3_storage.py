@@ -1,12 +1,12 @@
 from collections.abc import Generator
-from contextlib import closing
 
 import boto3
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from flask import Flask
 
-from .base_storage import BaseStorage
+from .base_storage import BaseStorage, ObjectStat
+from .connection_pool import PoolSettings, botocore_pool_stats
 
 
 class S3Storage(BaseStorage):
@@ -16,9 +16,19 @@ class S3Storage(BaseStorage):
         super().__init__(app)
         app_config = self.app.config
         self.bucket_name = app_config.get("S3_BUCKET_NAME")
+        # One long-lived client per process; boto3 clients are thread-safe and keep a connection pool.
+        pool = PoolSettings.from_config(app)
+        config = Config(
+            s3={"addressing_style": app_config.get("S3_ADDRESS_STYLE")},
+            max_pool_connections=pool.max_connections,
+            connect_timeout=pool.connect_timeout,
+            read_timeout=pool.read_timeout,
+            retries={"max_attempts": pool.max_retries, "mode": "standard"},
+            tcp_keepalive=True,
+        )
         if app_config.get("S3_USE_AWS_MANAGED_IAM"):
             session = boto3.Session()
-            self.client = session.client("s3")
+            self.client = session.client("s3", config=config)
         else:
             self.client = boto3.client(
                 "s3",
@@ -26,7 +36,7 @@ class S3Storage(BaseStorage):
                 aws_access_key_id=app_config.get("S3_ACCESS_KEY"),
                 endpoint_url=app_config.get("S3_ENDPOINT"),
                 region_name=app_config.get("S3_REGION"),
-                config=Config(s3={"addressing_style": app_config.get("S3_ADDRESS_STYLE")}),
+                config=config,
             )
         # create bucket
         try:
@@ -47,8 +57,7 @@ class S3Storage(BaseStorage):
 
     def load_once(self, filename: str) -> bytes:
         try:
-            with closing(self.client) as client:
-                data = client.get_object(Bucket=self.bucket_name, Key=filename)["Body"].read()
+            data = self.client.get_object(Bucket=self.bucket_name, Key=filename)["Body"].read()
         except ClientError as ex:
             if ex.response["Error"]["Code"] == "NoSuchKey":
                 raise FileNotFoundError("File not found")
@@ -59,9 +68,8 @@ class S3Storage(BaseStorage):
     def load_stream(self, filename: str) -> Generator:
         def generate(filename: str = filename) -> Generator:
             try:
-                with closing(self.client) as client:
-                    response = client.get_object(Bucket=self.bucket_name, Key=filename)
-                    yield from response["Body"].iter_chunks()
+                response = self.client.get_object(Bucket=self.bucket_name, Key=filename)
+                yield from response["Body"].iter_chunks()
             except ClientError as ex:
                 if ex.response["Error"]["Code"] == "NoSuchKey":
                     raise FileNotFoundError("File not found")
@@ -71,16 +79,78 @@ class S3Storage(BaseStorage):
         return generate()
 
     def download(self, filename, target_filepath):
-        with closing(self.client) as client:
-            client.download_file(self.bucket_name, filename, target_filepath)
+        self.client.download_file(self.bucket_name, filename, target_filepath)
 
     def exists(self, filename):
-        with closing(self.client) as client:
-            try:
-                client.head_object(Bucket=self.bucket_name, Key=filename)
-                return True
-            except:
-                return False
+        try:
+            self.client.head_object(Bucket=self.bucket_name, Key=filename)
+            return True
+        except:
+            return False
 
     def delete(self, filename):
         self.client.delete_object(Bucket=self.bucket_name, Key=filename)
+
+    def presigned_url(self, filename, expires_s: int = 900):
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket_name, "Key": filename}, ExpiresIn=expires_s
+        )
+
+    def pool_stats(self):
+        return botocore_pool_stats(self.client)
+
+    def etag(self, filename):
+        try:
+            return self.client.head_object(Bucket=self.bucket_name, Key=filename)["ETag"]
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError("File not found")
+            else:
+                raise
+
+
+    def stat(self, filename):
+        try:
+            head = self.client.head_object(Bucket=self.bucket_name, Key=filename)
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError("File not found")
+            else:
+                raise
+        return ObjectStat(head["ContentLength"], head["ETag"], head.get("ContentEncoding"))
+
+    def size(self, filename):
+        try:
+            return self.client.head_object(Bucket=self.bucket_name, Key=filename)["ContentLength"]
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError("File not found")
+            else:
+                raise
+
+    def load_range(self, filename: str, start: int, end: int | None = None) -> Generator:
+        def generate(filename: str = filename) -> Generator:
+            byte_range = f"bytes={start}-{'' if end is None else end}"
+            try:
+                response = self.client.get_object(Bucket=self.bucket_name, Key=filename, Range=byte_range)
+                yield from response["Body"].iter_chunks()
+            except ClientError as ex:
+                if ex.response["Error"]["Code"] == "NoSuchKey":
+                    raise FileNotFoundError("File not found")
+                else:
+                    raise
+
+        return generate()
+
+    def delete_many(self, filenames):
+        # DeleteObjects takes at most 1000 keys per request.
+        keys = list(dict.fromkeys(filenames))
+        for start in range(0, len(keys), 1000):
+            response = self.client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys[start : start + 1000]], "Quiet": True},
+            )
+            errors = response.get("Errors") or []
+            if errors:
+                failed = ", ".join(f"{e.get('Key')}: {e.get('Code')}" for e in errors[:5])
+                raise RuntimeError(f"delete_objects failed for {len(errors)} keys ({failed})")
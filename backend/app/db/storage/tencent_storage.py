@@ -2,8 +2,10 @@ from collections.abc import Generator
 
 from flask import Flask
 from qcloud_cos import CosConfig, CosS3Client
+from qcloud_cos.cos_exception import CosServiceError
 
-from .base_storage import BaseStorage
+from .base_storage import BaseStorage, ObjectStat
+from .connection_pool import PoolSettings, requests_pool_stats
 
 
 class TencentStorage(BaseStorage):
@@ -13,25 +15,35 @@ class TencentStorage(BaseStorage):
         super().__init__(app)
         app_config = self.app.config
         self.bucket_name = app_config.get("TENCENT_COS_BUCKET_NAME")
+        pool = PoolSettings.from_config(app)
         config = CosConfig(
             Region=app_config.get("TENCENT_COS_REGION"),
             SecretId=app_config.get("TENCENT_COS_SECRET_ID"),
             SecretKey=app_config.get("TENCENT_COS_SECRET_KEY"),
             Scheme=app_config.get("TENCENT_COS_SCHEME"),
+            Timeout=pool.read_timeout,
+            PoolConnections=pool.max_connections,
+            PoolMaxSize=pool.max_connections,
         )
-        self.client = CosS3Client(config)
+        self.client = CosS3Client(config, retry=pool.max_retries)
 
     def save(self, filename, data):
         self.client.put_object(Bucket=self.bucket_name, Body=data, Key=filename)
 
     def load_once(self, filename: str) -> bytes:
-        data = self.client.get_object(Bucket=self.bucket_name, Key=filename)["Body"].get_raw_stream().read()
+        try:
+            response = self.client.get_object(Bucket=self.bucket_name, Key=filename)
+        except CosServiceError as ex:
+            if ex.get_error_code() == "NoSuchKey" or ex.get_status_code() == 404:
+                raise FileNotFoundError("File not found")
+            raise
+        data = response["Body"].get_raw_stream().read()
         return data
 
     def load_stream(self, filename: str) -> Generator:
         def generate(filename: str = filename) -> Generator:
             response = self.client.get_object(Bucket=self.bucket_name, Key=filename)
-            yield from response["Body"].get_stream(chunk_size=4096)
+            yield from response["Body"].get_stream(chunk_size=64 * 1024)
 
         return generate()
 
@@ -44,3 +56,36 @@ class TencentStorage(BaseStorage):
 
     def delete(self, filename):
         self.client.delete_object(Bucket=self.bucket_name, Key=filename)
+
+    def presigned_url(self, filename, expires_s: int = 900):
+        return self.client.get_presigned_download_url(Bucket=self.bucket_name, Key=filename, Expired=expires_s)
+
+    def pool_stats(self):
+        return requests_pool_stats(self.client._session)
+
+    def etag(self, filename):
+        if not self.client.object_exists(Bucket=self.bucket_name, Key=filename):
+            raise FileNotFoundError("File not found")
+        return self.client.head_object(Bucket=self.bucket_name, Key=filename).get("ETag")
+
+    def stat(self, filename):
+        try:
+            head = self.client.head_object(Bucket=self.bucket_name, Key=filename)
+        except CosServiceError as ex:
+            if ex.get_status_code() == 404:
+                raise FileNotFoundError("File not found")
+            raise
+        return ObjectStat(int(head["Content-Length"]), head.get("ETag"), head.get("Content-Encoding"))
+
+    def size(self, filename):
+        if not self.client.object_exists(Bucket=self.bucket_name, Key=filename):
+            raise FileNotFoundError("File not found")
+        return int(self.client.head_object(Bucket=self.bucket_name, Key=filename)["Content-Length"])
+
+    def load_range(self, filename: str, start: int, end: int | None = None) -> Generator:
+        def generate(filename: str = filename) -> Generator:
+            byte_range = f"bytes={start}-{'' if end is None else end}"
+            response = self.client.get_object(Bucket=self.bucket_name, Key=filename, Range=byte_range)
+            yield from response["Body"].get_stream(chunk_size=64 * 1024)
+
+        return generate()
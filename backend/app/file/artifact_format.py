@@ -0,0 +1,123 @@
+"""
+报告 / 译文等文本产物在对象存储上的编码格式。
+
+新格式（utf8-v1）：
+- 正文为 UTF-8，可选 zstd / gzip 压缩；
+- 对象设置正确的 Content-Type / Content-Encoding；
+- 对象元数据记录未压缩正文的 sha256（x-oss-meta-sha256）与格式版本（x-oss-meta-artifact-format）。
+
+旧格式：每个字节写成 8 位 ASCII 0/1 再用空格连接（" ".join(format(b, "08b") ...)），体积约 9 倍。
+过渡期内 decode_artifact 同时识别两种格式；存量对象用 scripts/migrate_report_objects.py 批量迁移。
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+try:
+    import zstandard  # 可选依赖
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+ARTIFACT_FORMAT = "utf8-v1"
+MARKDOWN_CONTENT_TYPE = "text/markdown; charset=utf-8"
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# 旧格式：若干个 8 位 0/1 组，用单个空格分隔
+_LEGACY_BITSTRING_RE = re.compile(rb"[01]{8}(?: [01]{8})*")
+
+
+class ArtifactChecksumError(ValueError):
+    """解码后的正文与元数据里的 sha256 不一致。"""
+
+
+@dataclass
+class EncodedArtifact:
+    body: bytes
+    content_type: str
+    content_encoding: Optional[str]
+    metadata: Dict[str, str] = field(default_factory=dict)
+
+
+def default_compression() -> Optional[str]:
+    """REPORT_COMPRESSION=zstd|gzip|none|auto，默认 gzip（浏览器直接拿预签名 URL 时兼容性最好）。"""
+    value = (os.getenv("REPORT_COMPRESSION") or "gzip").lower()
+    if value == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    return None if value in ("", "none", "identity") else value
+
+
+def encode_artifact(text: str, compression: Optional[str] = "default",
+                    content_type: str = MARKDOWN_CONTENT_TYPE) -> EncodedArtifact:
+    raw = text.encode("utf-8")
+    if compression == "default":
+        compression = default_compression()
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd 压缩需要安装 zstandard：pip install zstandard")
+        body = zstandard.ZstdCompressor(level=10).compress(raw)
+    elif compression == "gzip":
+        # mtime=0：相同内容得到相同字节，ETag 稳定
+        body = gzip.compress(raw, compresslevel=6, mtime=0)
+    elif compression is None:
+        body = raw
+    else:
+        raise ValueError(f"unsupported compression: {compression}")
+    metadata = {
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "artifact-format": ARTIFACT_FORMAT,
+        "raw-size": str(len(raw)),
+    }
+    return EncodedArtifact(body=body, content_type=content_type,
+                           content_encoding=compression, metadata=metadata)
+
+
+def is_legacy_bitstring(data: bytes) -> bool:
+    data = data.strip()
+    return data[:8].strip(b"01") == b"" and _LEGACY_BITSTRING_RE.fullmatch(data) is not None
+
+
+def decode_legacy_bitstring(data: bytes) -> bytes:
+    """旧格式解码：整体按二进制大整数解析再 to_bytes，避免逐字节的 Python 循环。"""
+    bits = data.strip().replace(b" ", b"")
+    if not bits:
+        return b""
+    return int(bits, 2).to_bytes(len(bits) // 8, "big")
+
+
+def _decompress(data: bytes) -> bytes:
+    # 以魔数为准：HTTP 客户端可能已经按 Content-Encoding 自动解压过
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("对象为 zstd 压缩，需要安装 zstandard：pip install zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def decode_artifact_bytes(data: bytes, content_encoding: Optional[str] = None,
+                          metadata: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    返回未压缩的 UTF-8 正文字节；兼容新格式（含压缩）与旧 bit-string 格式。
+    content_encoding 仅作参考，是否压缩以魔数判断。
+    """
+    metadata = {k.lower(): v for k, v in (metadata or {}).items()}
+    raw = _decompress(data)
+    if metadata.get("artifact-format") != ARTIFACT_FORMAT and is_legacy_bitstring(raw):
+        return decode_legacy_bitstring(raw)
+    expected = metadata.get("sha256")
+    if expected and hashlib.sha256(raw).hexdigest() != expected:
+        raise ArtifactChecksumError(f"sha256 mismatch: expected {expected}")
+    return raw
+
+
+def decode_artifact(data: bytes, content_encoding: Optional[str] = None,
+                    metadata: Optional[Dict[str, str]] = None) -> str:
+    return decode_artifact_bytes(data, content_encoding, metadata).decode("utf-8")
@@ -0,0 +1,239 @@
+"""
+论文图片的内容寻址存储（CAS）。
+
+- 图片对象键只由内容决定：cas/sha256/<前两位>/<sha256><扩展名>，扩展名按文件头识别（不取文件名，
+  a.jpg 与 b.JPEG 是同一个对象），同一张图（logo、arXiv 多版本共用的图、
+  重复解析）全站只存一份，CDN 缓存也能跨论文共享；对象内容不可变，带长期 Cache-Control；
+- 每篇论文一个清单 hf_papers/{paper_id}/assets.manifest.json，记录原图片名 -> sha256 / 对象键；
+- Markdown 里的 images/<name> 引用改写为 CAS 地址（配置了 ASSET_PUBLIC_BASE_URL 时为完整 URL，
+  否则为对象键本身，可直接交给 FileDonwloader.oss_images_url 签名）；
+- 引用计数：每个 (sha256, paper_id) 一个空标记对象 cas/refs/<sha256>/<paper_id>，写入是幂等的；
+  论文不再引用某张图时删掉标记，该 sha256 下没有任何标记了才删除图片本体。
+
+并发安全的顺序：上传方先写引用标记，再 head 并按需上传本体；回收方先删自己的标记，确认没有其它标记后
+先读出本体字节再删除，删除之后再检查一次标记，有新标记（并发的上传方已写标记、且可能在删除前 head 到本体而跳过上传）
+就用读出的字节把本体补回去。于是上传方的标记要么早于回收方的某次检查（本体被保留或补回），
+要么晚于第二次检查，此时本体已被删除，上传方的 head 发现缺失而重新上传。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from .asset_uploader import AssetUploader, UploadSummary, UploadTask
+
+CAS_PREFIX = "cas/sha256"
+REFS_PREFIX = "cas/refs"
+MANIFEST_NAME = "assets.manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# ![alt](images/name "title") 与 <img src="images/name">
+_MD_IMAGE_REF_RE = re.compile(r'(!\[[^\]]*\]\(\s*)(?:\./)?images/([^)\s"]+)')
+_HTML_IMAGE_REF_RE = re.compile(r'(<img\b[^>]*?\bsrc=["\'])(?:\./)?images/([^"\']+)', re.I)
+
+
+def sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(chunk_size), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+
+def cas_key(digest: str, suffix: str = "") -> str:
+    return f"{CAS_PREFIX}/{digest[:2]}/{digest}{suffix.lower()}"
+
+
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF8", ".gif"),
+)
+_SUFFIX_ALIASES = {".jpeg": ".jpg", ".jpe": ".jpg", ".tif": ".tiff"}
+
+
+def content_suffix(path: Path) -> str:
+    """由文件头决定的扩展名（同样的字节总得到同一个 CAS 键）；认不出的格式退回规范化后的文件扩展名。"""
+    with open(path, "rb") as f:
+        head = f.read(16)
+    for signature, suffix in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return suffix
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    suffix = path.suffix.lower()
+    return _SUFFIX_ALIASES.get(suffix, suffix)
+
+
+def ref_key(digest: str, paper_id: str) -> str:
+    return f"{REFS_PREFIX}/{digest}/{paper_id}"
+
+
+def asset_url(key: str) -> str:
+    base = os.getenv("ASSET_PUBLIC_BASE_URL", "").rstrip("/")
+    return f"{base}/{key}" if base else key
+
+
+@dataclass
+class AssetEntry:
+    sha256: str
+    key: str
+    size: int
+
+
+@dataclass
+class AssetManifest:
+    paper_id: str
+    assets: Dict[str, AssetEntry] = field(default_factory=dict)
+    version: int = 1
+
+    def digests(self) -> set:
+        return {entry.sha256 for entry in self.assets.values()}
+
+    def keys_by_digest(self) -> Dict[str, List[str]]:
+        """sha256 -> 对象键；旧清单里同一内容可能因扩展名不同对应多个键，全部列出才能都回收。"""
+        keys: Dict[str, List[str]] = {}
+        for entry in self.assets.values():
+            if entry.key not in keys.setdefault(entry.sha256, []):
+                keys[entry.sha256].append(entry.key)
+        return keys
+
+    def to_json(self) -> bytes:
+        return json.dumps(asdict(self), ensure_ascii=False, sort_keys=True, indent=1).encode("utf-8")
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "AssetManifest":
+        raw = json.loads(data)
+        assets = {name: AssetEntry(**entry) for name, entry in raw.get("assets", {}).items()}
+        return cls(paper_id=raw["paper_id"], assets=assets, version=raw.get("version", 1))
+
+
+def rewrite_markdown(text: str, manifest: AssetManifest) -> str:
+    """把 images/<name> 引用替换为 CAS 地址；清单里没有的图片保持原样。"""
+
+    def replace(match: re.Match) -> str:
+        entry = manifest.assets.get(match.group(2))
+        if entry is None:
+            return match.group(0)
+        return match.group(1) + asset_url(entry.key)
+
+    return _HTML_IMAGE_REF_RE.sub(replace, _MD_IMAGE_REF_RE.sub(replace, text))
+
+
+class ContentAddressedAssetStore:
+    """
+    target 需要提供 head / put_file / put_bytes / get_bytes / delete / has_prefix
+    （asset_uploader.OssV2Target、StorageTarget）。has_prefix 返回 None 表示无法判断，此时从不删除图片本体。
+    """
+
+    def __init__(self, target, uploader: Optional[AssetUploader] = None, max_workers: int = 8):
+        self.target = target
+        self.uploader = uploader or AssetUploader(target)
+        self.max_workers = max(1, max_workers)
+
+    @staticmethod
+    def manifest_key(folder: str) -> str:
+        return f"{folder}/{MANIFEST_NAME}"
+
+    def load_manifest(self, folder: str) -> Optional[AssetManifest]:
+        data = self.target.get_bytes(self.manifest_key(folder))
+        return AssetManifest.from_json(data) if data else None
+
+    def build_manifest(self, paper_id: str, image_paths: Iterable[Path]) -> Tuple[AssetManifest, List[UploadTask]]:
+        image_paths = list(image_paths)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="asset-hash") as pool:
+            digests = list(pool.map(sha256_file, image_paths))
+        manifest = AssetManifest(paper_id=paper_id)
+        tasks: Dict[str, UploadTask] = {}
+        for path, digest in zip(image_paths, digests):
+            key = cas_key(digest, content_suffix(path))
+            size = path.stat().st_size
+            manifest.assets[path.name] = AssetEntry(sha256=digest, key=key, size=size)
+            # 同一篇论文里的重复图片只上传一次
+            tasks.setdefault(key, UploadTask(path, key, size=size, cache_control=IMMUTABLE_CACHE_CONTROL))
+        return manifest, list(tasks.values())
+
+    def _fan_out(self, fn, items: list) -> None:
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items)), thread_name_prefix="asset-ref") as pool:
+            list(pool.map(fn, items))
+
+    def publish(self, paper_id: str, folder: str, image_paths: Iterable[Path],
+                markdown_paths: Iterable[Path] = ()) -> Tuple[AssetManifest, UploadSummary]:
+        """
+        上传一篇论文的图片到 CAS，并把本地 Markdown 中的图片引用改写为 CAS 地址（原地改写，需在上传 Markdown 前调用）。
+        图片有上传失败时不写清单、不回收旧引用，重跑即可补齐。
+        """
+        manifest, tasks = self.build_manifest(paper_id, image_paths)
+        previous = self.load_manifest(folder)
+
+        # 1) 先写引用标记（幂等），再上传本体
+        self._fan_out(lambda digest: self.target.put_bytes(ref_key(digest, paper_id), b""),
+                      sorted(manifest.digests()))
+        summary = self.uploader.upload(tasks)
+        if not summary.ok:
+            return manifest, summary
+
+        for path in markdown_paths:
+            text = path.read_text(encoding="utf-8")
+            rewritten = rewrite_markdown(text, manifest)
+            if rewritten != text:
+                path.write_text(rewritten, encoding="utf-8")
+
+        self.target.put_bytes(self.manifest_key(folder), manifest.to_json(), "application/json")
+
+        # 2) 回收这篇论文不再引用的图片
+        if previous is not None:
+            stale = sorted(previous.digests() - manifest.digests())
+            keys = previous.keys_by_digest()
+            self._fan_out(lambda digest: self.release(paper_id, digest, keys[digest]), stale)
+        return manifest, summary
+
+    def release(self, paper_id: str, digest: str, keys: Iterable[str]) -> bool:
+        """删除 (digest, paper_id) 的引用；没有其它引用时删除该内容的全部图片本体（keys），返回是否删除了本体。"""
+        keys = list(dict.fromkeys(keys))
+        refs_prefix = f"{REFS_PREFIX}/{digest}/"
+        self.target.delete(ref_key(digest, paper_id))
+        if self.target.has_prefix(refs_prefix) is not False:
+            return False
+        saved = {key: self.target.get_bytes(key) for key in keys}
+        for key in keys:
+            self.target.delete(key)
+        if self.target.has_prefix(refs_prefix) is not False:
+            # 检查与删除之间有论文新引用了这张图，它可能已 head 到本体而跳过上传，补回本体
+            for key, data in saved.items():
+                if data is not None:
+                    self._restore(key, data)
+            logger.warning("cas: {} gained a reference while being released, restored", ", ".join(keys))
+            return False
+        logger.info("cas: released {} (no references left)", ", ".join(keys))
+        return True
+
+    def _restore(self, key: str, data: bytes) -> None:
+        # 走 put_file，与正常上传的 Content-Type（按扩展名）和 Cache-Control 一致
+        with tempfile.NamedTemporaryFile(suffix=Path(key).suffix, delete=False) as f:
+            f.write(data)
+        try:
+            self.target.put_file(UploadTask(Path(f.name), key, size=len(data), cache_control=IMMUTABLE_CACHE_CONTROL))
+        finally:
+            os.unlink(f.name)
+
+    def release_paper(self, folder: str) -> int:
+        """删除一篇论文的全部图片引用与清单，返回删除的图片本体数。"""
+        manifest = self.load_manifest(folder)
+        if manifest is None:
+            return 0
+        keys = manifest.keys_by_digest()
+        released = sum(self.release(manifest.paper_id, digest, digest_keys) for digest, digest_keys in keys.items())
+        self.target.delete(self.manifest_key(folder))
+        return released
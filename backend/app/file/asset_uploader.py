@@ -0,0 +1,249 @@
+"""
+论文资产（PDF / MinerU 图片 / JSON / Markdown）并发上传。
+
+- 有界线程池并发上传，避免 60+ 张图逐个串行 round trip；
+- 大文件走分片上传（alibabacloud_oss_v2 Uploader）；
+- 逐文件按 size / ETag 判断远端是否已是同一份，已存在则跳过，部分上传的目录可以直接重跑修复；
+- 失败按指数退避重试；
+- 结束时只输出一条汇总日志。
+
+上传目标两种：OssV2Target（alibabacloud_oss_v2 客户端）与 StorageTarget（db.ext_storage 的 Storage 抽象）。
+"""
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+
+@dataclass
+class UploadTask:
+    local_path: Path
+    key: str
+    size: int = 0
+    cache_control: Optional[str] = None
+
+
+@dataclass
+class RemoteObject:
+    size: Optional[int]
+    etag: Optional[str] = None
+
+
+@dataclass
+class UploadSummary:
+    uploaded: int = 0
+    skipped: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    bytes_uploaded: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def merge(self, other: "UploadSummary") -> "UploadSummary":
+        self.uploaded += other.uploaded
+        self.skipped += other.skipped
+        self.failed += other.failed
+        self.bytes_uploaded += other.bytes_uploaded
+        self.elapsed_s += other.elapsed_s
+        return self
+
+    def __str__(self) -> str:
+        text = (f"uploaded={self.uploaded} skipped={self.skipped} failed={len(self.failed)} "
+                f"bytes={self.bytes_uploaded} elapsed={self.elapsed_s:.2f}s")
+        if self.failed:
+            text += " failed_keys=" + ",".join(k for k, _ in self.failed[:10])
+        return text
+
+
+def _content_type(path: Path) -> Optional[str]:
+    if path.suffix.lower() == ".md":
+        return "text/markdown; charset=utf-8"
+    return mimetypes.guess_type(path.name)[0]
+
+
+def _file_md5(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(chunk_size), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+
+class OssV2Target:
+    """alibabacloud_oss_v2 客户端上传目标；>= multipart_threshold 的文件走分片上传。"""
+
+    def __init__(self, client, bucket: str,
+                 multipart_threshold: int = 16 * 1024 * 1024,
+                 part_size: int = 8 * 1024 * 1024,
+                 part_parallel: int = 4):
+        self.client = client
+        self.bucket = bucket
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self.part_parallel = part_parallel
+
+    def head(self, key: str) -> Optional[RemoteObject]:
+        import alibabacloud_oss_v2 as oss
+        try:
+            result = self.client.head_object(oss.HeadObjectRequest(bucket=self.bucket, key=key))
+        except oss.exceptions.OperationError as e:
+            err = e.unwrap()
+            if isinstance(err, oss.exceptions.ServiceError) and err.status_code == 404:
+                return None
+            raise
+        return RemoteObject(size=result.content_length, etag=result.etag)
+
+    def put_file(self, task: UploadTask) -> None:
+        import alibabacloud_oss_v2 as oss
+        request = oss.PutObjectRequest(bucket=self.bucket, key=task.key,
+                                       content_type=_content_type(task.local_path),
+                                       cache_control=task.cache_control)
+        if task.size >= self.multipart_threshold:
+            uploader = self.client.uploader(part_size=self.part_size, parallel_num=self.part_parallel,
+                                            leave_parts_on_error=False)
+            uploader.upload_file(request, filepath=str(task.local_path))
+        else:
+            self.client.put_object_from_file(request, str(task.local_path))
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        import alibabacloud_oss_v2 as oss
+        self.client.put_object(oss.PutObjectRequest(bucket=self.bucket, key=key, body=data,
+                                                    content_type=content_type))
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        import alibabacloud_oss_v2 as oss
+        from .oss_reader import is_not_found
+        try:
+            result = self.client.get_object(oss.GetObjectRequest(bucket=self.bucket, key=key))
+        except Exception as e:
+            if is_not_found(e):
+                return None
+            raise
+        with result.body as body_stream:
+            return body_stream.read()
+
+    def delete(self, key: str) -> None:
+        import alibabacloud_oss_v2 as oss
+        self.client.delete_object(oss.DeleteObjectRequest(bucket=self.bucket, key=key))
+
+    def has_prefix(self, prefix: str) -> Optional[bool]:
+        """前缀下是否还有对象。"""
+        import alibabacloud_oss_v2 as oss
+        result = self.client.list_objects_v2(oss.ListObjectsV2Request(bucket=self.bucket, prefix=prefix, max_keys=1))
+        return bool(result.contents)
+
+
+class StorageTarget:
+    """db.ext_storage.Storage 抽象上的上传目标；该抽象没有 size/ETag，只能按是否存在跳过。"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def head(self, key: str) -> Optional[RemoteObject]:
+        return RemoteObject(size=None) if self.storage.exists(key) else None
+
+    def put_file(self, task: UploadTask) -> None:
+        self.storage.save(task.key, task.local_path.read_bytes())
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        self.storage.save(key, data)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            return self.storage.load_once(key)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        self.storage.delete(key)
+
+    def has_prefix(self, prefix: str) -> Optional[bool]:
+        return None  # Storage 抽象不支持 list，无法判断
+
+
+class AssetUploader:
+    def __init__(self, target, max_workers: int = 8, retries: int = 3, backoff_s: float = 0.5):
+        self.target = target
+        self.max_workers = max(1, max_workers)
+        self.retries = max(0, retries)
+        self.backoff_s = backoff_s
+
+    def _is_same(self, task: UploadTask, remote: Optional[RemoteObject]) -> bool:
+        if remote is None:
+            return False
+        if remote.size is None:
+            return True  # 目标不提供 size，存在即视为已上传
+        if remote.size != task.size:
+            return False
+        etag = (remote.etag or "").strip('"').lower()
+        # 分片上传的 ETag 形如 "<hash>-<parts>"，不是内容 MD5，只能按 size 判断
+        if not etag or "-" in etag:
+            return True
+        return etag == _file_md5(task.local_path)
+
+    def _upload_one(self, task: UploadTask) -> bool:
+        """返回 True 表示实际上传，False 表示跳过；重试耗尽则抛出最后一次异常。"""
+        attempt = 0
+        while True:
+            try:
+                if self._is_same(task, self.target.head(task.key)):
+                    return False
+                self.target.put_file(task)
+                return True
+            except Exception:
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.backoff_s * (2 ** attempt))
+                attempt += 1
+
+    def upload(self, tasks: Iterable[UploadTask]) -> UploadSummary:
+        start = time.perf_counter()
+        summary = UploadSummary()
+        tasks = list(tasks)
+        for task in tasks:
+            if not task.size:
+                task.size = task.local_path.stat().st_size
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="asset-upload") as pool:
+            futures = {pool.submit(self._upload_one, task): task for task in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    if future.result():
+                        summary.uploaded += 1
+                        summary.bytes_uploaded += task.size
+                    else:
+                        summary.skipped += 1
+                except Exception as e:
+                    summary.failed.append((task.key, f"{type(e).__name__}: {e}"))
+        summary.elapsed_s = time.perf_counter() - start
+        return summary
+
+
+def collect_paper_assets(assets: dict, folder: str, include_images: bool = True) -> List[UploadTask]:
+    """
+    把 find_assets 的结果映射成对象键：
+    PDF / JSON / Markdown -> {folder}/{name}，图片 -> {folder}/images/{name}
+    图片走内容寻址存储（asset_store）时传 include_images=False。
+    """
+    tasks: List[UploadTask] = []
+    for category in ("pdfs", "jsons", "docs"):
+        tasks += [UploadTask(p, f"{folder}/{p.name}") for p in assets.get(category, [])]
+    if include_images:
+        tasks += [UploadTask(p, f"{folder}/images/{p.name}") for p in assets.get("images", [])]
+    return tasks
+
+
+def log_summary(paper_id: str, summary: UploadSummary) -> None:
+    if summary.ok:
+        logger.info("upload assets {}: {}", paper_id, summary)
+    else:
+        logger.error("upload assets {}: {}; errors={}", paper_id, summary, summary.failed[:5])
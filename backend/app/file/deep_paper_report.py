@@ -16,6 +16,8 @@ import time
 from typing import Iterator, List, Dict, Optional, Callable, Tuple
 from datetime import datetime
 
+from ..llm.monitoring import LLMCallTracker, TokenUsage
+
 try:
     import requests
 except Exception:
@@ -139,24 +141,112 @@ def detect_attrs(md: str) -> Dict[str, bool]:
     flags["tbl_count"] = len(re.findall(r'^\s*\|', md, flags=re.MULTILINE))
     return flags
 
+# -------- Token 预算 --------
+CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+TRUNCATED_MARK = "…（已截断）"
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：CJK 字符按 1 字 1 token，其余按约 4 字符 1 token。"""
+    if not text:
+        return 0
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int, mark: str = TRUNCATED_MARK) -> str:
+    """把文本截断到 max_tokens 以内（二分查找前缀长度，尽量在换行处断开）。"""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    room = max_tokens - estimate_tokens(mark)
+    if room <= 0:
+        return ""
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= room:
+            lo = mid
+        else:
+            hi = mid - 1
+    head = text[:lo]
+    nl = head.rfind("\n")
+    if nl > lo * 0.8:
+        head = head[:nl]
+    return head.rstrip() + mark
+
+def fit_rows(rows: List[str], max_tokens: int, empty: str) -> str:
+    """按行累加直到超出预算，超出部分以“其余 N 项已省略”收尾。"""
+    if not rows:
+        return empty
+    if max_tokens <= 0:
+        return ""
+    out: List[str] = []
+    used = 0
+    for i, row in enumerate(rows):
+        cost = estimate_tokens(row) + 1
+        if used + cost > max_tokens:
+            rest = f"（其余 {len(rows) - i} 项已省略）"
+            while out and used + estimate_tokens(rest) > max_tokens:
+                used -= estimate_tokens(out.pop()) + 1
+                rest = f"（其余 {len(rows) - len(out)} 项已省略）"
+            out.append(rest)
+            break
+        out.append(row)
+        used += cost
+    return "\n".join(out)
+
+@dataclass
+class PromptComponentBudget:
+    max_tokens: int
+    priority: int          # 数值越大越先被裁剪
+    min_tokens: int = 0
+
+def _default_components() -> Dict[str, PromptComponentBudget]:
+    return {
+        "abstract":  PromptComponentBudget(max_tokens=1500,  priority=0, min_tokens=300),
+        "outline":   PromptComponentBudget(max_tokens=16000, priority=1, min_tokens=1500),
+        "images":    PromptComponentBudget(max_tokens=2000,  priority=2, min_tokens=200),
+        "websearch": PromptComponentBudget(max_tokens=3000,  priority=3, min_tokens=0),
+    }
+
+@dataclass
+class PromptBudget:
+    """深度解读 Prompt 的 token 预算：每个组件有独立上限，总量超限时按 priority 从低到高优先级依次裁剪。"""
+    total_tokens: int = int(os.environ.get("DEEP_REPORT_PROMPT_MAX_TOKENS", "24000"))
+    components: Dict[str, PromptComponentBudget] = field(default_factory=_default_components)
+
 # -------- Prompt 生成（自适应） --------
-def extract_outline(sections: List[PaperSection], max_items=18) -> str:
+def extract_outline(sections: List[PaperSection], max_items=18, max_tokens: Optional[int] = None) -> str:
+    if not sections:
+        return "（未检测到章节标题）"
+    if max_tokens is None:
+        rows = []
+        for s in sections:
+            rows.append(f"- [{'#'*s.level} {s.title} {s.text}]")
+        return "\n".join(rows)
+    # 先保证每个标题都在，剩余预算平均分给各章节正文；用不完的额度顺延给后面的章节
+    heads = [f"- [{'#'*s.level} {s.title}" for s in sections]
+    head_cost = sum(estimate_tokens(h) + 2 for h in heads)
+    if head_cost > max_tokens:
+        return fit_rows([h + "]" for h in heads], max_tokens, "（未检测到章节标题）")
+    remaining = max_tokens - head_cost
     rows = []
-    for s in sections:
-        rows.append(f"- [{'#'*s.level} {s.title} {s.text}]")
-    return "\n".join(rows) if rows else "（未检测到章节标题）"
-
-def build_image_inventory(images: List[PaperImage], max_items:int=30) -> str:
+    for i, (h, s) in enumerate(zip(heads, sections)):
+        share = remaining // (len(sections) - i)
+        body = truncate_to_tokens(s.text, share) if s.text else ""
+        remaining -= estimate_tokens(body)
+        rows.append(f"{h} {body}]" if body else f"{h}]")
+    return "\n".join(rows)
+
+def build_image_inventory(images: List[PaperImage], max_items:int=30, max_tokens: Optional[int] = None) -> str:
     rows = []
     for i, im in enumerate(images[:max_items], 1):
         rows.append(f"{i}. ({im.context_heading or '全文'}) {im.alt or 'figure'} → {im.url}")
+    if max_tokens is not None:
+        return fit_rows(rows, max_tokens, "（源文未检测到图片链接）")
     return "\n".join(rows) if rows else "（源文未检测到图片链接）"
 
-def generate_adaptive_prompt(parsed: ParsedPaper) -> str:
-    attrs = detect_attrs(parsed.raw_text)
-    outline = extract_outline(parsed.sections)
-    images  = build_image_inventory(parsed.images)
-
+def _adaptive_outline_spec(attrs: Dict[str, bool]) -> Tuple[List[str], List[str]]:
     sections = ["1. 论文速览（1 句问题定义 + 3 句贡献）"]
     if attrs["is_survey"]:
         sections += [
@@ -205,19 +295,24 @@ def generate_adaptive_prompt(parsed: ParsedPaper) -> str:
         layout.append("- 表格：SOTA/消融用 Markdown 表格；统一指标与小数位数")
     if attrs["has_algo"]:
         layout.append("- 若原文有伪代码：转写为更清晰的伪代码块并配注释")
+    return sections, layout
 
-    prompt = f"""你是一名资深学术研究员与技术评审专家。请对下面论文做“深度解读”，输出**中文图文报告**（严格复用源 MD 的图片链接）。
+def _render_prompt(parsed: ParsedPaper, parts: Dict[str, str], adaptive: bool, attrs: Optional[Dict[str, bool]]) -> str:
+    head = f"""你是一名资深学术研究员与技术评审专家。请对下面论文做“深度解读”，输出**中文图文报告**（严格复用源 MD 的图片链接）。
 
 【标题】{parsed.title}
 【作者】{"；".join(parsed.authors) if parsed.authors else "（未解析到作者）"}
-【摘要】{parsed.abstract}
+【摘要】{parts["abstract"]}
 
 【原文结构（截断展示）】
-{outline}
+{parts["outline"]}
 
 【图片清单（来自源 MD）】
-{images}
-
+{parts["images"]}
+"""
+    if adaptive:
+        sections, layout = _adaptive_outline_spec(attrs)
+        prompt = head + """
 【必须包含的章节】
 """ + "\n".join(sections) + """
 
@@ -231,8 +326,80 @@ def generate_adaptive_prompt(parsed: ParsedPaper) -> str:
 - 若为“综述”，产出分类法、代表性工作对照矩阵与研究空白图谱。
 - 若与“桥梁/结构健康监测”等垂域相关，将方法映射到该域的业务指标与监管要求。
 """
+    else:
+        prompt = head
+    if parts.get("websearch"):
+        prompt += "\n\n【WebSearch 增强材料】\n" + parts["websearch"]
+    return prompt
+
+def build_budgeted_prompt(parsed: ParsedPaper,
+                          adaptive: bool = True,
+                          web_results: Optional[List[Tuple[str, List[Tuple[str, str, str]]]]] = None,
+                          budget: Optional[PromptBudget] = None) -> Tuple[str, Dict]:
+    """
+    按组件预算组装深度解读 Prompt，返回 (prompt, token 报告)。
+    - 每个组件（outline/images/abstract/websearch）先裁剪到自身 max_tokens
+    - 总量仍超出 total_tokens 时，按 priority 从大到小依次压缩到 min_tokens
+    """
+    budget = budget or PromptBudget()
+    attrs = detect_attrs(parsed.raw_text) if adaptive else None
+    if adaptive:
+        outline_fn = lambda n: extract_outline(parsed.sections, max_tokens=n)
+    else:
+        outline_fn = lambda n: fit_rows([f"- [{'#'*s.level} {s.title}]" for s in parsed.sections], n, "（未检测到章节标题）")
+    renderers: Dict[str, Callable[[int], str]] = {
+        "abstract": lambda n: truncate_to_tokens(parsed.abstract, n),
+        "outline": outline_fn,
+        "images": lambda n: build_image_inventory(parsed.images, max_tokens=n),
+        "websearch": lambda n: format_web_results(web_results or [], max_tokens=n),
+    }
+    comps = budget.components
+    parts = {name: render(comps[name].max_tokens) for name, render in renderers.items()}
+    fixed = estimate_tokens(_render_prompt(parsed, {name: "" for name in renderers}, adaptive, attrs))
+    used = {name: estimate_tokens(text) for name, text in parts.items()}
+    total = fixed + sum(used.values())
+    truncated = [name for name in renderers if used[name] >= comps[name].max_tokens * 0.98 and used[name] > 0]
+
+    for name in sorted(renderers, key=lambda n: comps[n].priority, reverse=True):
+        if total <= budget.total_tokens:
+            break
+        target = max(comps[name].min_tokens, used[name] - (total - budget.total_tokens))
+        if target >= used[name]:
+            continue
+        parts[name] = renderers[name](target)
+        total -= used[name]
+        used[name] = estimate_tokens(parts[name])
+        total += used[name]
+        if name not in truncated:
+            truncated.append(name)
+
+    prompt = _render_prompt(parsed, parts, adaptive, attrs)
+    report = {
+        "total_tokens": estimate_tokens(prompt),
+        "budget_tokens": budget.total_tokens,
+        "fixed_tokens": fixed,
+        "components": {
+            name: {"tokens": used[name], "max_tokens": comps[name].max_tokens, "priority": comps[name].priority}
+            for name in renderers
+        },
+        "truncated": truncated,
+    }
+    return prompt, report
+
+def generate_adaptive_prompt(parsed: ParsedPaper, budget: Optional[PromptBudget] = None) -> str:
+    prompt, _ = build_budgeted_prompt(parsed, adaptive=True, budget=budget)
     return prompt
 
+def save_prompt(out_dir: str, prompt_name: str, prompt: str, report: Dict) -> str:
+    """保存 prompt，并在同目录写入 <prompt>.tokens.json 记录最终 token 数。"""
+    prompt_path = os.path.join(out_dir, prompt_name)
+    with open(prompt_path, "w", encoding="utf-8") as f:
+        f.write(prompt)
+    tokens_path = os.path.splitext(prompt_path)[0] + ".tokens.json"
+    with open(tokens_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return prompt_path
+
 # ------- WebSearch -------
 def websearch(query: str, provider: str = "bing", topk: int = 5) -> List[Tuple[str,str,str]]:
     out: List[Tuple[str,str,str]] = []
@@ -258,18 +425,36 @@ def websearch(query: str, provider: str = "bing", topk: int = 5) -> List[Tuple[s
         return []
     return out[:topk]
 
-def weave_web_results_to_prompt(prompt: str, topics: List[str], provider: str) -> str:
-    lines = []
+def collect_web_results(topics: List[str], provider: str) -> List[Tuple[str, List[Tuple[str, str, str]]]]:
+    results = []
     for q in topics:
         items = websearch(q, provider=provider, topk=5)
-        if not items: 
-            continue
+        if items:
+            results.append((q, items))
+    return results
+
+def format_web_results(results: List[Tuple[str, List[Tuple[str, str, str]]]], max_tokens: Optional[int] = None) -> str:
+    lines = []
+    for q, items in results:
         lines.append(f"- 主题：{q}")
         for (t,u,s) in items:
             lines.append(f"  - [{t}]({u}) — {s}")
+    if max_tokens is not None:
+        return fit_rows(lines, max_tokens, "") if lines else ""
+    return "\n".join(lines)
+
+def weave_web_results_to_prompt(prompt: str, topics: List[str], provider: str) -> str:
+    lines = format_web_results(collect_web_results(topics, provider))
     if not lines:
         return prompt
-    return prompt + "\n\n【WebSearch 增强材料】\n" + "\n".join(lines)
+    return prompt + "\n\n【WebSearch 增强材料】\n" + lines
+
+def web_topics(parsed: ParsedPaper) -> List[str]:
+    return [
+        f"{parsed.title} 复现",
+        "related work 2023..2025",
+        "ablation study methodology for this topic",
+    ]
 
 # ------- LLM -------
 class LLMAdapter:
@@ -278,6 +463,13 @@ class LLMAdapter:
     def generate_stream(self, prompt: str) -> str:
         raise NotImplementedError
 
+def _usage_from_json(j: dict) -> Optional[TokenUsage]:
+    usage = j.get("usage") if isinstance(j, dict) else None
+    if not usage:
+        return None
+    return TokenUsage(input_tokens=usage.get("prompt_tokens") or 0,
+                      output_tokens=usage.get("completion_tokens") or 0)
+
 class OpenAIAdapter(LLMAdapter):
     """
     - generate(prompt) -> str：一次性返回完整结果（与你原来的行为一致）
@@ -315,12 +507,15 @@ class OpenAIAdapter(LLMAdapter):
                 "stream": False
             }
             url = f"{self.base_url}/chat/completions"
-            # 为了更稳健，显式区分连接超时与读取超时
-            resp = requests.post(url, headers=headers, json=data,
-                                 timeout=(10, self.timeout))
-            resp.raise_for_status()
-            j = resp.json()
-            return j["choices"][0]["message"]["content"]
+            with LLMCallTracker(self.model, call_site="report") as call:
+                call.sent()
+                # 为了更稳健，显式区分连接超时与读取超时
+                resp = requests.post(url, headers=headers, json=data,
+                                     timeout=(10, self.timeout))
+                resp.raise_for_status()
+                j = resp.json()
+                call.usage(_usage_from_json(j))
+                return j["choices"][0]["message"]["content"]
         except Exception as e:
             return f"【占位】OpenAI 调用失败：{e}\n请复制 prompt 手动到模型中生成。"
 
@@ -357,41 +552,46 @@ class OpenAIAdapter(LLMAdapter):
         url = f"{self.base_url}/chat/completions"
 
         try:
-            with requests.post(url, headers=headers, json=data,
-                               stream=True, timeout=(10, self.timeout)) as resp:
-                resp.raise_for_status()
-
-                # iter_lines 会按行（\n）拆分 SSE；decode_unicode=True 自动解码为 str
-                for raw_line in resp.iter_lines(decode_unicode=True):
-                    if not raw_line:
-                        # 心跳/空行，忽略
-                        continue
-
-                    # 典型行形如：data: {json...}
-                    if raw_line.startswith("data:"):
-                        payload = raw_line[len("data:"):].strip()
-                        if payload == "[DONE]":
-                            break
-                        # 解析 JSON，并按 OpenAI SSE 的 delta 结构取内容
-                        try:
-                            j = requests.utils.json.loads(payload)
-                            # OpenAI/兼容返回格式：
-                            # j["choices"][0]["delta"]["content"]（流式）
-                            # 或 fallback: j["choices"][0]["message"]["content"]（个别实现可能直接给整段）
-                            choices = j.get("choices") or []
-                            if choices:
-                                delta = choices[0].get("delta") or {}
-                                if "content" in delta and delta["content"] is not None:
-                                    yield delta["content"]
-                                else:
-                                    # 个别兼容实现可能把片段塞在 message.content
-                                    msg = choices[0].get("message") or {}
-                                    content = msg.get("content")
-                                    if content:
-                                        yield content
-                        except Exception:
-                            # 如果某些实现不是标准 JSON（极少数网关），直接忽略该行
+            with LLMCallTracker(self.model, call_site="report") as call:
+                call.sent()
+                with requests.post(url, headers=headers, json=data,
+                                   stream=True, timeout=(10, self.timeout)) as resp:
+                    resp.raise_for_status()
+
+                    # iter_lines 会按行（\n）拆分 SSE；decode_unicode=True 自动解码为 str
+                    for raw_line in resp.iter_lines(decode_unicode=True):
+                        if not raw_line:
+                            # 心跳/空行，忽略
                             continue
+
+                        # 典型行形如：data: {json...}
+                        if raw_line.startswith("data:"):
+                            payload = raw_line[len("data:"):].strip()
+                            if payload == "[DONE]":
+                                break
+                            # 解析 JSON，并按 OpenAI SSE 的 delta 结构取内容
+                            try:
+                                j = requests.utils.json.loads(payload)
+                                # OpenAI/兼容返回格式：
+                                # j["choices"][0]["delta"]["content"]（流式）
+                                # 或 fallback: j["choices"][0]["message"]["content"]（个别实现可能直接给整段）
+                                call.usage(_usage_from_json(j))
+                                choices = j.get("choices") or []
+                                if choices:
+                                    delta = choices[0].get("delta") or {}
+                                    if "content" in delta and delta["content"] is not None:
+                                        call.first_token()
+                                        yield delta["content"]
+                                    else:
+                                        # 个别兼容实现可能把片段塞在 message.content
+                                        msg = choices[0].get("message") or {}
+                                        content = msg.get("content")
+                                        if content:
+                                            call.first_token()
+                                            yield content
+                            except Exception:
+                                # 如果某些实现不是标准 JSON（极少数网关），直接忽略该行
+                                continue
         except Exception as e:
             yield f"\n【占位】OpenAI 流式调用失败：{e}\n请复制 prompt 手动到模型中生成。"
             return
@@ -562,6 +762,7 @@ def deep_analysis_strem_run(
     返回：
       {
         "prompt_path": <保存的 prompt 文件>,
+        "prompt_tokens": <最终 prompt 的估算 token 数>,
         "report_path": <最终报告文件>,
         "content": <最终完整 Markdown 字符串>
       }
@@ -575,41 +776,15 @@ def deep_analysis_strem_run(
     # 2) 解析结构
     parsed = parse_markdown(md)
 
-    # 3) 生成 prompt
-    if adaptive:
-        prompt = generate_adaptive_prompt(parsed)
-        prompt_name = "prompt_adaptive_zh.txt"
-    else:
-        outline = "\n".join([f"- [{'#'*s.level} {s.title}]" for s in parsed.sections]) or "（未检测到章节标题）"
-        images  = build_image_inventory(parsed.images)
-        prompt = (
-            "你是一名资深学术研究员与技术评审专家。请对下面论文做“深度解读”，"
-            "输出**中文图文报告**（严格复用源 MD 的图片链接）。\n\n"
-            f"【标题】{parsed.title}\n"
-            f"【作者】{'；'.join(parsed.authors) if parsed.authors else '（未解析到作者）'}\n"
-            f"【摘要】{parsed.abstract}\n\n"
-            "【原文结构（截断展示）]\n"
-            f"{outline}\n\n"
-            "【图片清单（来自源 MD）]\n"
-            f"{images}\n"
-        )
-        prompt_name = "prompt_zh.txt"
-
-    # 4) （可选）WebSearch 增强
-    if use_websearch:
-        topics = [
-            f"{parsed.title} 复现",
-            "related work 2023..2025",
-            "ablation study methodology for this topic",
-        ]
-        prompt = weave_web_results_to_prompt(prompt, topics, provider=search_provider)
+    # 3) 生成 prompt（按组件 token 预算裁剪）
+    web_results = collect_web_results(web_topics(parsed), search_provider) if use_websearch else None
+    prompt, prompt_report = build_budgeted_prompt(parsed, adaptive=adaptive, web_results=web_results)
+    prompt_name = "prompt_adaptive_zh.txt" if adaptive else "prompt_zh.txt"
 
-    # 5) 保存 prompt
-    prompt_path = os.path.join(out_dir, prompt_name)
-    with open(prompt_path, "w", encoding="utf-8") as f:
-        f.write(prompt)
+    # 4) 保存 prompt 与 token 统计
+    prompt_path = save_prompt(out_dir, prompt_name, prompt, prompt_report)
 
-    # 6) 选择 LLM 适配器
+    # 5) 选择 LLM 适配器
     adapter = pick_adapter(model)
 
     # 输出文件路径
@@ -629,7 +804,7 @@ def deep_analysis_strem_run(
             sys.stdout.write(chunk)
             sys.stdout.flush()
 
-    # 7) 调用模型：优先流式，自动降级
+    # 6) 调用模型：优先流式，自动降级
     final_md: str = ""
     try:
         if adapter is None:
@@ -673,13 +848,13 @@ def deep_analysis_strem_run(
         _emit(f"\n【警告】LLM 生成失败：{e}，已回退到报告骨架。\n")
         final_md = build_report_skeleton(parsed)
 
-    # 8) 统一在完成后做图片注入与清洗
+    # 7) 统一在完成后做图片注入与清洗
     try:
         final_md = inject_images_into_sections(final_md, parsed)
     except Exception as e:
         _emit(f"\n【提示】注图阶段发生异常：{e}（已保留原文）。\n")
 
-    # 9) 覆盖写入最终文件，并清理临时文件
+    # 8) 覆盖写入最终文件，并清理临时文件
     with open(report_path, "w", encoding="utf-8") as f:
         f.write(final_md)
     try:
@@ -690,6 +865,7 @@ def deep_analysis_strem_run(
 
     return {
         "prompt_path": prompt_path,
+        "prompt_tokens": prompt_report["total_tokens"],
         "report_path": report_path,
         "content": final_md,
     }
@@ -735,40 +911,12 @@ def deep_analysis_run(md_text: str, out_dir: str, model: str="none", use_websear
     # with open(md_path, "r", encoding="utf-8", errors="ignore") as f:
     #     md = f.read()
     parsed = parse_markdown(md_text)
-    if adaptive:
-        prompt = generate_adaptive_prompt(parsed)
-        prompt_name = "prompt_adaptive_zh.txt"
-    else:
-        # 简化版固定 Prompt（少用）
-        outline = "\n".join([f"- [{'#'*s.level} {s.title}]" for s in parsed.sections]) or "（未检测到章节标题）"
-        images  = build_image_inventory(parsed.images)
-        prompt = f"""你是一名资深学术研究员与技术评审专家。请对下面论文做“深度解读”，输出**中文图文报告**（严格复用源 MD 的图片链接）。
-
-【标题】{parsed.title}
-【作者】{"；".join(parsed.authors) if parsed.authors else "（未解析到作者）"}
-【摘要】{parsed.abstract}
+    web_results = collect_web_results(web_topics(parsed), search_provider) if use_websearch else None
+    prompt, prompt_report = build_budgeted_prompt(parsed, adaptive=adaptive, web_results=web_results)
+    prompt_name = "prompt_adaptive_zh.txt" if adaptive else "prompt_zh.txt"
 
-【原文结构（截断展示）】
-{outline}
-
-【图片清单（来自源 MD）】
-{images}
-"""
-        prompt_name = "prompt_zh.txt"
-
-    # WebSearch 增强（可选）
-    if use_websearch:
-        topics = [
-            f"{parsed.title} 复现",
-            "related work 2023..2025",
-            "ablation study methodology for this topic"
-        ]
-        prompt = weave_web_results_to_prompt(prompt, topics, provider=search_provider)
-
-    # 保存 prompt
-    prompt_path = os.path.join(out_dir, prompt_name)
-    with open(prompt_path, "w", encoding="utf-8") as f:
-        f.write(prompt)
+    # 保存 prompt 与 token 统计（只落盘备查，本函数只返回报告正文）
+    save_prompt(out_dir, prompt_name, prompt, prompt_report)
 
     # 调用模型或输出骨架
     # report_path = os.path.join(out_dir, "report_zh.md")
@@ -804,40 +952,12 @@ def deep_analysis_run_test(md_path: str, out_dir: str, model: str="none", use_we
         md = f.read()
 
     parsed = parse_markdown(md)
-    if adaptive:
-        prompt = generate_adaptive_prompt(parsed)
-        prompt_name = "prompt_adaptive_zh.txt"
-    else:
-        # 简化版固定 Prompt（少用）
-        outline = "\n".join([f"- [{'#'*s.level} {s.title}]" for s in parsed.sections]) or "（未检测到章节标题）"
-        images  = build_image_inventory(parsed.images)
-        prompt = f"""你是一名资深学术研究员与技术评审专家。请对下面论文做“深度解读”，输出**中文图文报告**（严格复用源 MD 的图片链接）。
-
-【标题】{parsed.title}
-【作者】{"；".join(parsed.authors) if parsed.authors else "（未解析到作者）"}
-【摘要】{parsed.abstract}
-
-【原文结构（截断展示）】
-{outline}
-
-【图片清单（来自源 MD）】
-{images}
-"""
-        prompt_name = "prompt_zh.txt"
-
-    # WebSearch 增强（可选）
-    if use_websearch:
-        topics = [
-            f"{parsed.title} 复现",
-            "related work 2023..2025",
-            "ablation study methodology for this topic"
-        ]
-        prompt = weave_web_results_to_prompt(prompt, topics, provider=search_provider)
+    web_results = collect_web_results(web_topics(parsed), search_provider) if use_websearch else None
+    prompt, prompt_report = build_budgeted_prompt(parsed, adaptive=adaptive, web_results=web_results)
+    prompt_name = "prompt_adaptive_zh.txt" if adaptive else "prompt_zh.txt"
 
-    # 保存 prompt
-    prompt_path = os.path.join(out_dir, prompt_name)
-    with open(prompt_path, "w", encoding="utf-8") as f:
-        f.write(prompt)
+    # 保存 prompt 与 token 统计
+    prompt_path = save_prompt(out_dir, prompt_name, prompt, prompt_report)
 
     # 调用模型或输出骨架
     # report_path = os.path.join(out_dir, "report_zh.md")
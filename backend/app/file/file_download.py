@@ -1,17 +1,20 @@
 import os
 from pathlib import Path
-import re
+import tempfile
 from typing import Optional
 
 from .deep_paper_report import IMAGE_RE, PaperImage
 from .deep_paper_report import deep_analysis_run, deep_analysis_strem_run
 from loguru import logger
-from playwright.sync_api import sync_playwright, Error as PlaywrightError
 
-from .hf_papers_download_or_parser_to_oss import PaperFileDownloadAndParser
+from .hf_papers_download_or_parser_to_oss import PaperFileDownloadAndParser, oss_reader
 
 from .md_bilingual import translate_markdown_file
+from .artifact_format import decode_artifact_bytes, encode_artifact
+from .presign import PresignedUrlCache
+from .pdf_fetcher import default_fetcher, normalize_paper_id
 from ..db.ext_storage import storage
+from ..db.storage.cached_storage import DiskLRUCache
 import alibabacloud_oss_v2 as oss
 
 
@@ -39,84 +42,67 @@ cfg.endpoint = required_envs.get("ALIYUN_OSS_ENDPOINT")
 # 使用配置好的信息创建OSS客户端
 client = oss.Client(cfg)
 
+# 图片预签名 URL：本地签名，缓存到过期前几分钟
+presigned_urls = PresignedUrlCache(
+    client,
+    required_envs.get("ALIYUN_OSS_BUCKET_NAME"),
+    expires_s=int(os.getenv("PRESIGN_EXPIRES_S", "3600")),
+)
+
+# 报告 / 译文的本地磁盘 LRU 缓存；OSS_CACHE_DIR 置空则关闭
+_oss_cache_dir = os.getenv("OSS_CACHE_DIR", ".cache/oss")
+oss_cache: Optional[DiskLRUCache] = (
+    DiskLRUCache(
+        _oss_cache_dir,
+        max_bytes=int(os.getenv("OSS_CACHE_MAX_MB", 1024)) * 1024 * 1024,
+        revalidate_after_s=float(os.getenv("OSS_CACHE_REVALIDATE_S", 300)),
+    )
+    if _oss_cache_dir
+    else None
+)
+
 def download_paper_by_id(paper_id: str, pdf_file_root) -> None:
     """
-    使用浏览器(Playwright)下载 arXiv 论文 PDF 到 pdf_file_root 目录。
+    下载 arXiv 论文 PDF 到 pdf_file_root/{paper_id}/ 目录，返回 (save_path, pid_dir)。
+    先走共享连接池的 HTTP 直连，失败才回退到常驻浏览器池（见 pdf_fetcher）。
     Args:
         paper_id: 论文 ID（支持带版本号，如 '2401.12345' 或 '2401.12345v2'）
     """
-    os.makedirs(pdf_file_root, exist_ok=True)
-
-    # 构造 URL（arXiv 的直链形如 /pdf/{id}.pdf）
-    # 若传入包含空格或非法字符，这里做个简单清洗
-    pid = re.sub(r"[^0-9A-Za-z.\-v]", "", paper_id)
-    pdf_url = f"https://arxiv.org/pdf/{pid}.pdf"
-    ##创建一个以paper_id命名的文件夹
-    pid_dir = os.path.join(pdf_file_root, paper_id)
-    if not os.path.exists(pid_dir):
-        os.makedirs(pid_dir)
-    save_path = os.path.join(pid_dir, f"{pid}.pdf")
-    # object storage key for saving the PDF via Storage
-    storage_key = f"papers/{paper_id}/{pid}.pdf"
-    
-    if os.path.exists(save_path):
-        # 文件已存在则跳过下载
-        return save_path,pid_dir
-    try:
-        with sync_playwright() as p:
-            # 启动无头浏览器，设置常见 UA，规避部分站点的简单拦截
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent=(
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/120.0.0.0 Safari/537.36"
-                )
-            )
-
-            # 方式1：用浏览器上下文的 request 客户端直接 GET（依旧走浏览器栈，稳定省心）
-            resp = context.request.get(pdf_url, timeout=60_000)
-            if resp.ok:
-                pdf_bytes = resp.body()
-                with open(save_path, "wb") as f:
-                    f.write(pdf_bytes)
-                # Save to OSS (or configured storage) as well
-                try:
-                    # avoid duplicate uploads if already exists
-                    if not storage.exists(storage_key):
-                        storage.save(storage_key, pdf_bytes)
-                except Exception as _e:
-                    # best-effort upload; do not fail download
-                    print(f"storage save failed for {storage_key}: {_e}")
-            else:
-                # 方式2（回退）：进入摘要页点击“PDF”按钮并捕获下载事件
-                # 有些站点会对直链做限制时可触发下载事件保存
-                page = context.new_page()
-                page.goto(f"https://arxiv.org/abs/{pid}", wait_until="domcontentloaded")
-                with page.expect_download() as dl_info:
-                    # “Download PDF” 链接文字通常包含 "PDF"
-                    # 也可以更精确地选择  a[href*="/pdf/"]
-                    page.locator('a[href*="/pdf/"]').first.click()
-                download = dl_info.value
-                # 将下载保存到目标路径
-                download.save_as(save_path)
-                # Read file bytes and save to storage
-                try:
-                    with open(save_path, "rb") as f:
-                        file_bytes = f.read()
-                    if not storage.exists(storage_key):
-                        storage.save(storage_key, file_bytes)
-                except Exception as _e:
-                    print(f"storage save failed for {storage_key}: {_e}")
+    result = default_fetcher().fetch(paper_id, pdf_file_root)
+    if not result.ok:
+        # 让上层知道失败原因
+        raise RuntimeError(f"PDF 下载失败: {result.error}")
+    if result.source != "cache":
+        # object storage key for saving the PDF via Storage
+        storage_key = f"papers/{paper_id}/{normalize_paper_id(paper_id)}.pdf"
+        try:
+            # avoid duplicate uploads if already exists
+            if not storage.exists(storage_key):
+                with open(result.path, "rb") as f:
+                    storage.save(storage_key, f.read())
+        except Exception as _e:
+            # best-effort upload; do not fail download
+            print(f"storage save failed for {storage_key}: {_e}")
+    return result.path, result.pid_dir
 
-            context.close()
-            browser.close()
 
-        # 你之前函数返回 None，这里也保持一致；如需返回路径，可改为 return save_path
-        return save_path,pid_dir
-    except PlaywrightError as e:
-        # 让上层知道失败原因
-        raise RuntimeError(f"Playwright 下载失败: {e}") from e
+def _fetch_first(keys, fetch, head_only=()):
+    """
+    按 keys 的优先级逐个读取，返回第一个存在的 (key, value)；全部落空返回 (None, None)。
+    fetch 先查本地磁盘缓存（oss_cache），未命中才对 OSS 发一次 GET，404 映射为 None 并记入负缓存，
+    不再先 HEAD 探测：热点论文完全不走 OSS，冷读也只有一次 GET。
+    head_only 中的 key 只确认存在（一次 HEAD），不下载，返回 (key, HEAD 结果)。
+    """
+    for key in keys:
+        if key in head_only:
+            info = oss_reader.head(key)
+            if info is not None:
+                return key, info
+            continue
+        value = fetch(key)
+        if value is not None:
+            return key, value
+    return None, None
 
 
 class FileDonwloader():
@@ -128,105 +114,86 @@ class FileDonwloader():
         path = download_paper_by_id(paper_id=paper_id,pdf_file_root=self.pdf_file_root)
         return path
     
+    @staticmethod
     def oss_images_url(key:str):
-        bucket=required_envs.get("ALIYUN_OSS_BUCKET_NAME")
-        if client.is_object_exist(
-            bucket=bucket,
-            key=key
-        ):
-            pre_result = client.presign(
-                oss.GetObjectRequest(
-                    bucket=bucket,  # 指定存储空间名称
-                    key=key,        # 指定对象键名
-                )
-            )
-            return pre_result.url
-        else:
-            logger.exception("{key} is no oss exist")
+        # 一次 HEAD（带负缓存）确认存在，签名在本地完成并缓存；批量签名请用 presign.sign_markdown，不做存在性检查
+        if not oss_reader.exists(key):
+            logger.warning(f"{key} is no oss exist")
+            return None
+        return presigned_urls.url(key)
     
     
     @staticmethod
-    def oss_dowload_deep_analysis_file(key:str,folder:str,is_local=False) -> Optional[str]:
-        bucket=required_envs.get("ALIYUN_OSS_BUCKET_NAME")
-        if client.is_object_exist(
-            bucket=bucket,
-            key=key
-        ):
-        # 执行获取对象的请求，指定存储空间名称和对象名称
-            result = client.get_object(oss.GetObjectRequest(
-                bucket=bucket,  # 指定存储空间名称
-                key=key,  # 指定对象键名
-            ))
-                # 输出获取对象的结果信息，用于检查请求是否成功
-            print(f'status code: {result.status_code},'
-                f' request id: {result.request_id},')
-            # ========== 方式1：完整读取 ==========
-            with result.body as body_stream:
-                data = body_stream.read()
-                print(f"文件读取完成，数据长度：{len(data)} bytes")
-                if is_local:
-                    if not os.path.exists(folder):
-                        os.makedirs(folder)
-                    with open(key, 'wb') as f:
-                        f.write(data)
-                    print(f"文件下载完成，保存至路径：{key}")
-                    return key
-                else:
-                    ##data 转 str
-                    if isinstance(data,bytes):
-                        data = bytes(int(b, 2) for b in data.strip().split())
-                    data = data.decode('utf-8')
-                    # imgs = [PaperImage(alt=a, url=u, context_heading=None) for a,u in IMAGE_RE.findall(data)]
-                    # import pdb
-                    # pdb.set_trace()
-                    # for image in imgs:
-                    #     image_key = folder+"/" +image.url
-                    #     image_url = FileDonwloader.oss_images_url(image_key)
-                    #     print(image_url)
-                    return data
-        else:
+    def _oss_fetch_decoded(key: str, target_path: str) -> Optional[str]:
+        """GET 对象、解码为 UTF-8 正文写到 target_path，返回对象 ETag；对象不存在抛 FileNotFoundError。"""
+        # 一次 GET：404 直接映射为不存在，不再先 is_object_exist
+        fetched = oss_reader.get_bytes(key)
+        if fetched is None:
+            raise FileNotFoundError(key)
+        data, result = fetched
+        # 输出获取对象的结果信息，用于检查请求是否成功
+        print(f'status code: {result.status_code},'
+              f' request id: {result.request_id},')
+        print(f"文件读取完成，数据长度：{len(data)} bytes")
+        # 新格式（UTF-8 + 可选压缩 + sha256 元数据）与旧 bit-string 格式都能读
+        data = decode_artifact_bytes(data, result.content_encoding, result.metadata)
+        with open(target_path, 'wb') as f:
+            f.write(data)
+        return result.etag
+
+    @staticmethod
+    def _oss_current_etag(key: str) -> Optional[str]:
+        info = oss_reader.head(key)
+        if info is None:
+            raise FileNotFoundError(key)
+        return info.etag
+
+    @staticmethod
+    def _oss_read_cached(key: str, folder: str, is_local: bool = False) -> Optional[str]:
+        """
+        经本地磁盘 LRU 缓存读取对象（已解码的正文）；热点论文重复打开不再走 OSS。
+        缓存条目过了 OSS_CACHE_REVALIDATE_S 才用 ETag 回源校验，未变化则不重新下载。
+        """
+        try:
+            if oss_cache is None:
+                fd, tmp = tempfile.mkstemp(suffix=".md")
+                os.close(fd)
+                try:
+                    FileDonwloader._oss_fetch_decoded(key, tmp)
+                    with open(tmp, 'rb') as f:
+                        data = f.read()
+                finally:
+                    os.remove(tmp)
+            else:
+                data = oss_cache.read_bytes(
+                    key,
+                    lambda tmp: FileDonwloader._oss_fetch_decoded(key, tmp),
+                    lambda: FileDonwloader._oss_current_etag(key),
+                )
+        except FileNotFoundError:
             print(f"{key} is no exist")
             return None
-    
+        if is_local:
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+            with open(key, 'wb') as f:
+                f.write(data)
+            print(f"文件下载完成，保存至路径：{key}")
+            return key
+        ##data 转 str
+        return data.decode('utf-8')
+
+    @staticmethod
+    def oss_dowload_deep_analysis_file(key:str,folder:str,is_local=False) -> Optional[str]:
+        return FileDonwloader._oss_read_cached(key, folder, is_local)
 
     @staticmethod
     def oss_dowload_file(key:str,folder:str,is_local=False) -> Optional[str]:
-        bucket=required_envs.get("ALIYUN_OSS_BUCKET_NAME")
-        if client.is_object_exist(
-            bucket=bucket,
-            key=key
-        ):
-        # 执行获取对象的请求，指定存储空间名称和对象名称
-            result = client.get_object(oss.GetObjectRequest(
-                bucket=bucket,  # 指定存储空间名称
-                key=key,  # 指定对象键名
-            ))
-                # 输出获取对象的结果信息，用于检查请求是否成功
-            print(f'status code: {result.status_code},'
-                f' request id: {result.request_id},')
-            # ========== 方式1：完整读取 ==========
-            with result.body as body_stream:
-                data = body_stream.read()
-                print(f"文件读取完成，数据长度：{len(data)} bytes")
-                if is_local:
-                    if not os.path.exists(folder):
-                        os.makedirs(folder)
-                    with open(key, 'wb') as f:
-                        f.write(data)
-                    print(f"文件下载完成，保存至路径：{key}")
-                    return key
-                else:
-                    ##data 转 str
-                    # if isinstance(data,bytes):
-                    #     data = bytes(int(b, 2) for b in data.strip().split())
-                    data = data.decode('utf-8')
-                    return data
-        else:
-            print(f"{key} is no exist")
-            return None
+        return FileDonwloader._oss_read_cached(key, folder, is_local)
+
     @staticmethod
     def upload_report_to_oss(md_text: str, key: str) -> Optional[str]:
-        """Upload the downloaded PDF to Aliyun OSS and return the object key when configured."""
+        """Upload a Markdown report to Aliyun OSS as UTF-8 (optionally compressed) with its sha256 in object metadata."""
                 
         # 用于记录上传进度的字典
         progress_state = {'saved': 0}
@@ -236,7 +203,7 @@ class FileDonwloader():
             rate = int(100 * (float(written) / float(total)))
             print(f'\r上传进度：{rate}% ', end='')
             
-        data = " ".join(format(b, "08b") for b in md_text.encode("utf-8"))
+        artifact = encode_artifact(md_text)
         bucket=required_envs.get("ALIYUN_OSS_BUCKET_NAME")
         if client.is_object_exist(
             bucket=bucket,
@@ -249,10 +216,16 @@ class FileDonwloader():
                 oss.PutObjectRequest(
                     bucket=bucket,  # 存储空间名称
                     key=key,
-                    body=data,
+                    body=artifact.body,
+                    content_type=artifact.content_type,
+                    content_encoding=artifact.content_encoding,
+                    metadata=artifact.metadata,
                     progress_fn=_progress_fn# 对象名称
                 )
             )
+            oss_reader.forget(key)
+            if oss_cache is not None:
+                oss_cache.invalidate(key)
             print(f"\n上传成功，ETag: {result.etag}"
             f"状态码: {result.status_code}, 请求ID: {result.request_id}"
             )
@@ -272,11 +245,15 @@ class FileDonwloader():
         key_md   = f"{folder}/{paper_id}.md"
         out_bi   = Path(folder) / f"{paper_id}_report.md"  # 本地目标路径
         
-        report_md_content = FileDonwloader.oss_dowload_deep_analysis_file(key=key_report_md, folder=folder, is_local=is_local)
-        if report_md_content:
-            return report_md_content
+        # report 优先，再退到 md；缓存命中的不走 OSS
+        hit_key, hit = _fetch_first(
+            [key_report_md, key_md],
+            fetch=lambda key: FileDonwloader.oss_dowload_deep_analysis_file(key=key, folder=folder, is_local=is_local),
+        )
+        if hit_key == key_report_md:
+            return hit
         # 2) 再试普通 md
-        md_path = FileDonwloader.oss_dowload_file(key=key_md, folder=folder, is_local=is_local)
+        md_path = hit if hit_key == key_md else None
         if md_path:
             # 尝试把 md 解读 report（若失败则退回 md）
             # md_text = None
@@ -328,13 +305,19 @@ class FileDonwloader():
         key_md   = f"{folder}/{paper_id}.md"
         key_pdf  = f"{folder}/{paper_id}.pdf"
         out_bi   = Path(folder) / f"{paper_id}.bilingual.md"  # 本地目标路径
+        # 按 bilingual.md → md → pdf 的优先级取第一个存在的；Markdown 经磁盘缓存读取，pdf 只确认存在
+        hit_key, hit = _fetch_first(
+            [key_bi, key_md, key_pdf],
+            fetch=lambda key: FileDonwloader.oss_dowload_file(key=key, folder=folder, is_local=is_local),
+            head_only=(key_pdf,),
+        )
+
         # 1) 先试 bilingual.md
-        bi_path = FileDonwloader.oss_dowload_file(key=key_bi, folder=folder, is_local=is_local)
-        if bi_path:
-            return bi_path
+        if hit_key == key_bi:
+            return hit
 
         # 2) 再试普通 md
-        md_path = FileDonwloader.oss_dowload_file(key=key_md, folder=folder, is_local=is_local)
+        md_path = hit if hit_key == key_md else None
         if md_path:
             # 尝试把 md 翻译成 bilingual（若失败则退回 md）
             md_text = None
@@ -364,8 +347,7 @@ class FileDonwloader():
             return md_path
 
         # 3) 试 pdf → 解析/翻译
-        pdf_path = FileDonwloader.oss_dowload_file(key=key_pdf, folder=folder, is_local=is_local)
-        if pdf_path:
+        if hit_key == key_pdf:
             try:
                 data = PaperFileDownloadAndParser.parse(paper_id=paper_id)
                 # 兼容两种可能的返回字段
@@ -7,6 +7,8 @@ from typing import Dict,Any
 import json
 from loguru import logger
 import requests
+
+from .local_pdf_parser import parse_pdf_local
 PARSE_TIMEOUT = 1800    # nginx配置30分钟超时
 MINERU_CFG = {
     # 'output_dir': './outputs',
@@ -95,5 +97,15 @@ class FileToMarkdown():
             print("使用mineru解析器")
             md_content = parse_pdf(file_path=file_path,file_name_dir=file_name_dir)
             return md_content
+        if parser_type=="local":
+            print("使用本地pypdfium2解析器")
+            return parse_pdf_local(file_path=file_path,file_name_dir=file_name_dir)
+        if parser_type=="auto":
+            # 优先 MinerU；GPU 解析服务不可用（连接失败、超时、5xx）时退回本地解析
+            try:
+                return parse_pdf(file_path=file_path,file_name_dir=file_name_dir)
+            except (requests.RequestException, OSError) as e:
+                logger.warning(f'MinerU 解析失败，改用本地解析: {e}')
+                return parse_pdf_local(file_path=file_path,file_name_dir=file_name_dir)
         
         raise NotImplementedError("Subclasses must implement this method.")
\ No newline at end of file
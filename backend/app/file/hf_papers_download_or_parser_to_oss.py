@@ -1,15 +1,27 @@
 import os
-import base64
 from pathlib import Path
-import re
 from typing import Dict, Any, Optional
 from ..db.repositories.paper_repo_supabase import PaperRepositorySupabase
 from loguru import logger
 import requests
-from playwright.sync_api import sync_playwright, Error as PlaywrightError
 import alibabacloud_oss_v2 as oss
 
 from .md_bilingual import translate_markdown_file
+from .asset_uploader import (
+    AssetUploader,
+    OssV2Target,
+    StorageTarget,
+    UploadSummary,
+    collect_paper_assets,
+    log_summary,
+)
+from .oss_reader import OssReader
+from .pdf_fetcher import default_fetcher
+from .ingest_pipeline import ItemResult, Pipeline, Stage
+from .ingest_manifest import default_manifest, dir_fingerprint
+from .mineru_stream import stream_mineru_response
+from .mineru_shard import ShardedMineruParser, count_pages, shared_balancer
+from .asset_store import ContentAddressedAssetStore
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -32,71 +44,32 @@ cfg.endpoint = required_envs.get("ALIYUN_OSS_ENDPOINT")
 
 # 使用配置好的信息创建OSS客户端
 client = oss.Client(cfg)
+# 单次 GET 读取 + 不存在 key 的短 TTL 负缓存
+oss_reader = OssReader(
+    client,
+    required_envs.get("ALIYUN_OSS_BUCKET_NAME"),
+    negative_ttl_s=float(os.getenv("OSS_NEGATIVE_CACHE_TTL_S", "30")),
+)
 
 
 def download_paper_by_id(paper_id: str,pdf_file_root) -> None:
     """
-    使用浏览器(Playwright)下载 arXiv 论文 PDF 到 pdf_file_root 目录。
+    下载 arXiv 论文 PDF 到 pdf_file_root/{paper_id}/ 目录，返回 (save_path, pid_dir)。
+    先走共享连接池的 HTTP 直连，失败才回退到常驻浏览器池（见 pdf_fetcher）。
     Args:
         paper_id: 论文 ID（支持带版本号，如 '2401.12345' 或 '2401.12345v2'）
     """
-    os.makedirs(pdf_file_root, exist_ok=True)
-
-    # 构造 URL（arXiv 的直链形如 /pdf/{id}.pdf）
-    # 若传入包含空格或非法字符，这里做个简单清洗
-    pid = re.sub(r"[^0-9A-Za-z.\-v]", "", paper_id)
-    pdf_url = f"https://arxiv.org/pdf/{pid}.pdf"
-    ##创建一个以paper_id命名的文件夹
-    pid_dir = os.path.join(pdf_file_root, paper_id)
-    if not os.path.exists(pid_dir):
-        os.makedirs(pid_dir)
-    save_path = os.path.join(pid_dir, f"{pid}.pdf")
-    
-    if os.path.exists(save_path):
-        # 文件已存在则跳过下载
-        print(f'文件 {save_path} 已存在，跳过下载。')
-        return save_path,pid_dir
-    try:
-        with sync_playwright() as p:
-            # 启动无头浏览器，设置常见 UA，规避部分站点的简单拦截
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent=(
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/120.0.0.0 Safari/537.36"
-                )
-            )
-
-            # 方式1：用浏览器上下文的 request 客户端直接 GET（依旧走浏览器栈，稳定省心）
-            resp = context.request.get(pdf_url, timeout=60_000)
-            if resp.ok:
-                with open(save_path, "wb") as f:
-                    f.write(resp.body())
-            else:
-                # 方式2（回退）：进入摘要页点击“PDF”按钮并捕获下载事件
-                # 有些站点会对直链做限制时可触发下载事件保存
-                page = context.new_page()
-                page.goto(f"https://arxiv.org/abs/{pid}", wait_until="domcontentloaded")
-                with page.expect_download() as dl_info:
-                    # “Download PDF” 链接文字通常包含 "PDF"
-                    # 也可以更精确地选择  a[href*="/pdf/"]
-                    page.locator('a[href*="/pdf/"]').first.click()
-                download = dl_info.value
-                # 将下载保存到目标路径
-                download.save_as(save_path)
-
-            context.close()
-            browser.close()
-
-        # 你之前函数返回 None，这里也保持一致；如需返回路径，可改为 return save_path
-        return save_path,pid_dir
-    except PlaywrightError as e:
+    result = default_fetcher().fetch(paper_id, pdf_file_root)
+    if not result.ok:
         # 让上层知道失败原因
-        raise RuntimeError(f"Playwright 下载失败: {e}") from e
+        raise RuntimeError(f"PDF 下载失败: {result.error}")
+    if result.source == "cache":
+        print(f'文件 {result.path} 已存在，跳过下载。')
+    return result.path, result.pid_dir
     
 
 PARSE_TIMEOUT = 1800    # nginx配置30分钟超时
+MINERU_STREAM_CHUNK_SIZE = 256 * 1024
 MINERU_CFG = {
     # 'output_dir': './outputs',
     # 'lang_list': 'ch',    # [ch|ch_server|ch_lite|en|korean|japan|chinese_cht|ta|te|ka|th|el|latin|arabic|east_slavic|cyrillic|devanagari]，文档语言类型，可提升 OCR 准确率，仅用于 pipeline 后端
@@ -124,6 +97,15 @@ def parse_pdf(file_path:str,file_name_dir) -> Dict[str, Any]:
     md_file_path = os.path.join(file_name_dir, file_name.replace('.pdf','.md'))
     if not os.path.exists(md_file_path):
         logger.info(f'开始解析: {file_name}')
+        # 长 PDF 按页分片，并发提交到 PARSE_URLS 中的各个 MinerU 服务
+        shard_pages = int(os.getenv("PARSE_SHARD_PAGES", "0"))
+        if shard_pages > 0:
+            n_pages = count_pages(file_path)
+            if n_pages and n_pages > shard_pages:
+                parser = ShardedMineruParser(MINERU_CFG, pages_per_shard=shard_pages,
+                                             timeout_s=PARSE_TIMEOUT, balancer=shared_balancer())
+                md_content, _ = parser.parse(file_path, file_name_dir, n_pages=n_pages)
+                return md_content
         with open(file_path, 'rb') as f:
             files = {'files': (str(file_name), f, 'application/pdf')}
             data = MINERU_CFG
@@ -131,56 +113,24 @@ def parse_pdf(file_path:str,file_name_dir) -> Dict[str, Any]:
                 os.getenv("PARSE_URL"), 
                 files=files, 
                 data=data, 
-                timeout=PARSE_TIMEOUT
+                timeout=PARSE_TIMEOUT,
+                stream=True,
             )
-            
-        response.raise_for_status()
-        res = response.json()
+
+        # 边读边写盘：md / middle_json 直接写文件，图片 base64 增量解码，不再 response.json()
+        with response:
+            response.raise_for_status()
+            results = stream_mineru_response(
+                response.iter_content(chunk_size=MINERU_STREAM_CHUNK_SIZE), file_name_dir)
     else:
         logger.info(f'文件已解析，跳过: {file_name}')
         return ""
 
-    for key,value in res['results'].items():  
-        md_content = value.get('md_content', '')
-        middle_json = value.get('middle_json', '')
-        md_content_path = os.path.join(file_name_dir, key+".md")
-        with open(md_content_path,"w",encoding="utf-8") as file:
-            file.write(md_content)
-        middle_json_path = os.path.join(file_name_dir, key+".jsonl")
-        with open(middle_json_path,"w",encoding="utf-8") as file:
-            file.write(middle_json)
+    md_content = ""
+    for key, result in results.items():
+        md_content = result.read_markdown()
         logger.info(f'Markdown内容已提取, 长度: {len(md_content)} 字符')
-        images = value.get('images', {})
-        for img_name, img_data in images.items():
-            if not os.path.exists(file_name_dir+'/images'):
-                os.makedirs(file_name_dir+'/images')
-            try:
-                m = re.match(r"^data:(image/[\w\+\-\.]+);base64,(.*)$", img_data, flags=re.S | re.I)
-                mime = None
-                data = img_data
-                if m:
-                    mime, data = m.group(1).lower(), m.group(2)
-
-                # 2) 清洗+补 padding
-                data = re.sub(r"\s+", "", data)
-                if (pad := (-len(data)) % 4):
-                    data += "=" * pad
-                raw = base64.b64decode(data, validate=False)
-            except Exception:
-            # 兼容 url-safe base64
-                raw = base64.urlsafe_b64decode(data)
-                
-                # 依据 mime 猜扩展名
-                ext_map = {
-                    "image/jpeg": "jpg", "image/jpg": "jpg", "image/png": "png",
-                    "image/webp": "webp", "image/gif": "gif", "image/bmp": "bmp",
-                    "image/tiff": "tiff", "image/x-icon": "ico", "image/svg+xml": "svg",
-                }
-                ext = "." + ext_map.get(mime, "bin")
-            img_path = os.path.join(file_name_dir+'/images', img_name)
-            with open(img_path, 'wb') as img_file:
-                img_file.write(raw)
-            logger.info(f'图片已保存: {img_path}')
+        logger.info(f'图片已保存: {len(result.images)} 张, 共 {result.image_bytes} 字节')
     return md_content
 
 from pathlib import Path
@@ -268,112 +218,62 @@ def find_assets(
 def donwload_md_to_local(paper_id: str,is_local=False) -> Optional[str]:
     folder = "hf_papers/"+paper_id
     key = folder + f"/{paper_id}.md"
-    bucket=required_envs.get("ALIYUN_OSS_BUCKET_NAME")
-
-    if client.is_object_exist(
-        bucket=bucket,
-        key=key
-    ):
-    # 执行获取对象的请求，指定存储空间名称和对象名称
-        result = client.get_object(oss.GetObjectRequest(
-            bucket=bucket,  # 指定存储空间名称
-            key=key,  # 指定对象键名
-        ))
-            # 输出获取对象的结果信息，用于检查请求是否成功
-        print(f'status code: {result.status_code},'
-            f' request id: {result.request_id},')
-        # ========== 方式1：完整读取 ==========
-        with result.body as body_stream:
-            data = body_stream.read()
-            print(f"文件读取完成，数据长度：{len(data)} bytes")
-            if is_local:
-                if not os.path.exists(folder):
-                    os.makedirs(folder)
-                with open(key, 'wb') as f:
-                    f.write(data)
-                print(f"文件下载完成，保存至路径：{key}")
-                return key
-            else:
-                ##data 转 str
-                data = data.decode('utf-8')
-                return data
-    else:
+    # 一次 GET：不存在直接返回 None，不再先 is_object_exist
+    fetched = oss_reader.get_bytes(key)
+    if fetched is None:
         print(f"{key} is no exist")
-
-
-def upload_pdf_to_oss(file_path: str, paper_id: str) -> Optional[str]:
-    """Upload the downloaded PDF to Aliyun OSS and return the object key when configured."""
-    
+        return None
+    data, result = fetched
+    # 输出获取对象的结果信息，用于检查请求是否成功
+    print(f'status code: {result.status_code},'
+        f' request id: {result.request_id},')
+    print(f"文件读取完成，数据长度：{len(data)} bytes")
+    if is_local:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(key, 'wb') as f:
+            f.write(data)
+        print(f"文件下载完成，保存至路径：{key}")
+        return key
+    ##data 转 str
+    return data.decode('utf-8')
+
+
+def upload_pdf_to_oss(file_path: str, paper_id: str, target=None) -> UploadSummary:
+    """
+    并发上传论文目录下的 PDF / 图片 / JSON / Markdown。
+    逐文件按 size/ETag 跳过远端已有的对象，所以部分上传的目录重跑即可补齐。
+    target 默认是 alibabacloud_oss_v2 客户端；ASSET_UPLOAD_TARGET=storage 时走 Storage 抽象。
+    图片默认写入内容寻址存储（asset_store），Markdown 中的图片引用先改写为 CAS 地址再上传；
+    ASSET_STORE_MODE=paper 时沿用旧的 {folder}/images/{name} 布局。
+    """
     folder = "hf_papers/"+paper_id
-    folder_images = folder + "/images" 
-    key = folder + f"/{paper_id}.pdf"
-    
-    # 用于记录上传进度的字典
-    progress_state = {'saved': 0}
-
-    def _progress_fn(n, written, total):
-        progress_state['saved'] += n
-        rate = int(100 * (float(written) / float(total)))
-        print(f'\r上传进度：{rate}% ', end='')
-
-    bucket=required_envs.get("ALIYUN_OSS_BUCKET_NAME")
-    if client.is_object_exist(
-        bucket=bucket,
-        key=key
-    ):
-        print(f'对象 {key} 已存在于存储空间 {required_envs.get("ALIYUN_OSS_BUCKET_NAME")} 中，跳过上传。')
-        return "对象已存在，跳过上传。"
-    else:
-        all_files = find_assets(folder)
-        for pdf_file in all_files['pdfs']:
-            key = folder + f"/{pdf_file.name}"
-            result = client.put_object_from_file(
-                oss.PutObjectRequest(
-                    bucket=bucket,  # 存储空间名称
-                    key=key,
-                    progress_fn=_progress_fn# 对象名称
-                ),
-                str(pdf_file)          # 本地文件路径
-            )
-            print(f"\n{pdf_file}上传成功，ETag: {result.etag}"
-            f"{pdf_file}状态码: {result.status_code}, 请求ID: {result.request_id}"
-        )
-        for image_file in all_files['images']:
-            key = folder_images + f"/{image_file.name}"
-            result = client.put_object_from_file(
-                oss.PutObjectRequest(
-                    bucket=bucket,  # 存储空间名称
-                    key=key,
-                    progress_fn=_progress_fn# 对象名称
-                ),
-                str(image_file)          # 本地文件路径
-            )
-            print(f"\n{image_file}上传成功，ETag: {result.etag}"
-            f"{image_file}状态码: {result.status_code}, 请求ID: {result.request_id}")
-        for json_file in all_files['jsons']:
-            key = folder + f"/{json_file.name}"
-            result = client.put_object_from_file(
-                oss.PutObjectRequest(
-                    bucket=bucket,  # 存储空间名称
-                    key=key,
-                    progress_fn=_progress_fn# 对象名称
-                ),
-                str(json_file)          # 本地文件路径
-            )
-            print(f"\n{json_file}上传成功，ETag: {result.etag}"
-            f"{json_file}状态码: {result.status_code}, 请求ID: {result.request_id}")
-        for md_file in all_files['docs']:
-            key = folder + f"/{md_file.name}"
-            result = client.put_object_from_file(
-                oss.PutObjectRequest(
-                    bucket=bucket,  # 存储空间名称
-                    key=key,
-                    progress_fn=_progress_fn# 对象名称
-                ),
-                str(md_file)          # 本地文件路径
-            )
-            print(f"\n{md_file}上传成功，ETag: {result.etag}"
-            f"{md_file}状态码: {result.status_code}, 请求ID: {result.request_id}") 
+    if target is None:
+        if os.getenv("ASSET_UPLOAD_TARGET") == "storage":
+            from ..db.ext_storage import storage
+            target = StorageTarget(storage)
+        else:
+            target = OssV2Target(client, required_envs.get("ALIYUN_OSS_BUCKET_NAME"))
+    all_files = find_assets(file_path or folder)
+    uploader = AssetUploader(
+        target,
+        max_workers=int(os.getenv("ASSET_UPLOAD_WORKERS", "8")),
+        retries=int(os.getenv("ASSET_UPLOAD_RETRIES", "3")),
+    )
+    use_cas = os.getenv("ASSET_STORE_MODE", "cas") == "cas"
+    summary = UploadSummary()
+    if use_cas and all_files.get("images"):
+        store = ContentAddressedAssetStore(target, uploader)
+        _, image_summary = store.publish(paper_id, folder, all_files["images"], all_files.get("docs", []))
+        summary.merge(image_summary)
+        if not image_summary.ok:
+            # Markdown 尚未改写为 CAS 地址，先不上传，重跑时补齐
+            all_files = {**all_files, "docs": []}
+    tasks = collect_paper_assets(all_files, folder, include_images=not use_cas)
+    summary.merge(uploader.upload(tasks))
+    oss_reader.forget(*(task.key for task in tasks))
+    log_summary(paper_id, summary)
+    return summary
 
 
 
@@ -393,26 +293,124 @@ class PaperFileDownloadAndParser:
         paper_id_list = paper_db.get_all_paper_id()
         return paper_id_list
     
+    @staticmethod
+    def _download_stage(paper_id: str) -> Dict[str, Any]:
+        manifest = default_manifest()
+        if manifest.is_current(paper_id, "download"):
+            pdf = manifest.get(paper_id, "download")["artifacts"]["pdf"]
+            return {"paper_id": paper_id, "pdf_path": pdf["path"], "pid_dir": os.path.dirname(pdf["path"]),
+                    "pdf_sha256": pdf["sha256"]}
+        pdf_file_root = os.getenv("STORAGE_LOCAL_PATH", 'hf_papers')
+        with manifest.track(paper_id, "download") as record:
+            path, pid_dir = download_paper_by_id(paper_id, pdf_file_root)
+            record.file("pdf", path)
+        return {"paper_id": paper_id, "pdf_path": path, "pid_dir": pid_dir,
+                "pdf_sha256": record.artifacts["pdf"]["sha256"]}
+
+    @staticmethod
+    def _parse_stage(job: Dict[str, Any]) -> Dict[str, Any]:
+        manifest = default_manifest()
+        md_path = os.path.join(job["pid_dir"], Path(job["pdf_path"]).stem + ".md")
+        # 解析结果由 PDF 内容决定，以 PDF 的 sha256 作为输入指纹
+        if not manifest.is_current(job["paper_id"], "parse", job.get("pdf_sha256")):
+            with manifest.track(job["paper_id"], "parse") as record:
+                job["markdown_content"] = parse_pdf(file_path=job["pdf_path"], file_name_dir=job["pid_dir"])
+                record.file("markdown", md_path, mutable=True)
+                record.fingerprint = job.get("pdf_sha256")
+        if not job.get("markdown_content") and os.path.exists(md_path):
+            # 已解析过（parse_pdf 跳过时返回空串），从本地读回供翻译使用
+            with open(md_path, "r", encoding="utf-8") as f:
+                job["markdown_content"] = f.read()
+        return job
+
+    @staticmethod
+    def _translate_stage(job: Dict[str, Any]) -> Dict[str, Any]:
+        manifest = default_manifest()
+        job["translated_markdown_content"] = None
+        if manifest.is_current(job["paper_id"], "translate", job.get("pdf_sha256")):
+            return job
+        with manifest.track(job["paper_id"], "translate") as record:
+            if not job.get("markdown_content"):
+                # 没有可翻译的内容也要落一条记录，否则这篇论文在清单里永远是“未完成”；
+                # 不写指纹，之后解析出内容时 is_current 不成立，会重新翻译
+                record.value("skipped", "empty markdown")
+                return job
+            job["translated_markdown_content"] = translate_markdown_file(
+                paper_id=job["paper_id"], md_text=job["markdown_content"], is_local=True)
+            bilingual_path = os.path.join(os.getenv("STORAGE_LOCAL_PATH", "hf_papers"), job["paper_id"],
+                                          f"{job['paper_id']}.bilingual.md")
+            if os.path.exists(bilingual_path):
+                record.file("bilingual", bilingual_path, mutable=True)
+            record.fingerprint = job.get("pdf_sha256")
+        return job
+
+    @staticmethod
+    def _upload_stage(job: Dict[str, Any]) -> Dict[str, Any]:
+        manifest = default_manifest()
+        # 不能 pop：阶段重试会用同一个 job 再调一次，成功后才移除
+        pid_dir = job.get("pid_dir")
+        # 本地目录自上次上传后没有变化就不再逐个探测 OSS
+        if manifest.is_current(job["paper_id"], "upload", dir_fingerprint(pid_dir)):
+            job.pop("pid_dir", None)
+            return job
+        with manifest.track(job["paper_id"], "upload") as record:
+            summary = upload_pdf_to_oss(pid_dir, job["paper_id"])
+            if summary is not None and not summary.ok:
+                # 抛出以触发阶段重试；已上传的文件会被跳过
+                raise RuntimeError(f"upload incomplete for {job['paper_id']}: {summary}")
+            if summary is not None:
+                record.value("uploaded", summary.uploaded)
+                record.value("skipped", summary.skipped)
+            # 上传会原地改写 Markdown 中的图片地址，指纹取上传之后的目录状态
+            record.fingerprint = dir_fingerprint(pid_dir)
+        job.pop("pid_dir", None)
+        return job
+
     @staticmethod
     def parse(paper_id: str) -> Dict[str, Any]:
-        pdf_file_root =os.getenv("STORAGE_LOCAL_PATH",'hf_papers')
-        path, pid_dir = download_paper_by_id(paper_id, pdf_file_root)
-        md_content = parse_pdf(file_path=path, file_name_dir=pid_dir)
-        if md_content:
-            trans_md = translate_markdown_file(paper_id=paper_id,md_text=md_content,is_local=True)
-        upload_pdf_to_oss(pid_dir, paper_id)
-        return {
-            "paper_id": paper_id,
-            "pdf_path": path,
-            "markdown_content": md_content,
-            "translated_markdown_content": trans_md
-            }
-        
-        
+        job = PaperFileDownloadAndParser._download_stage(paper_id)
+        job = PaperFileDownloadAndParser._parse_stage(job)
+        job = PaperFileDownloadAndParser._translate_stage(job)
+        return PaperFileDownloadAndParser._upload_stage(job)
+
+    @staticmethod
+    def parse_many(paper_ids: Iterable[str], report_interval_s: float = 60) -> List[ItemResult]:
+        """
+        批量处理：下载(网络) / 解析(GPU) / 翻译(LLM) / 上传 四个阶段流水线并发，
+        每个阶段的并发数与队列长度可用环境变量 INGEST_<STAGE>_WORKERS / INGEST_QUEUE_SIZE 调整。
+        """
+        def env_int(name: str, default: int) -> int:
+            return int(os.getenv(name, str(default)))
+
+        queue_size = env_int("INGEST_QUEUE_SIZE", 2)
+        retries = env_int("INGEST_STAGE_RETRIES", 2)
+        cls = PaperFileDownloadAndParser
+        pipeline = Pipeline([
+            Stage("download", cls._download_stage, workers=env_int("INGEST_DOWNLOAD_WORKERS", 4),
+                  queue_size=queue_size, retries=retries),
+            Stage("parse", cls._parse_stage, workers=env_int("INGEST_PARSE_WORKERS", 1),
+                  queue_size=queue_size, retries=retries),
+            Stage("translate", cls._translate_stage, workers=env_int("INGEST_TRANSLATE_WORKERS", 2),
+                  queue_size=queue_size, retries=retries),
+            Stage("upload", cls._upload_stage, workers=env_int("INGEST_UPLOAD_WORKERS", 2),
+                  queue_size=queue_size, retries=retries),
+        ], report_interval_s=report_interval_s)
+        manifest = default_manifest()
+        paper_ids = list(dict.fromkeys(paper_ids))
+        manifest.reset_stale()
+        manifest.enqueue(paper_ids)
+        # 只调度清单里还有阶段未完成的论文，已完成的不再探测本地文件和 OSS
+        todo = manifest.outstanding(paper_ids)
+        logger.info(f"parse_many: {len(paper_ids)} papers, {len(paper_ids) - len(todo)} already complete")
+        return pipeline.run(todo)
+
+
 if __name__ == "__main__":
     paper_id = PaperFileDownloadAndParser.get_papers_id_list()[:20]
-    pdf_file_root = "hf_papers"
-    for pid in paper_id:
-        result = PaperFileDownloadAndParser.parse(pid)
-        print(f"解析完成: {result['paper_id']}, PDF路径: {result['pdf_path']}, Markdown内容长度: {len(result['markdown_content'])} 字符")
+    for item in PaperFileDownloadAndParser.parse_many(paper_id):
+        if not item.ok:
+            print(f"解析失败: {item.input}, 阶段: {item.failed_stage}, 错误: {item.error}")
+            continue
+        result = item.output
+        print(f"解析完成: {result['paper_id']}, PDF路径: {result['pdf_path']}, Markdown内容长度: {len(result['markdown_content'] or '')} 字符")
     # upload_pdf_to_oss("D:/LLM/project/upaper/hf_papers/2304.09355","2304.09355")
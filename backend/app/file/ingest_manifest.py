@@ -0,0 +1,358 @@
+"""
+论文入库流水线的本地状态清单（SQLite）。
+
+每篇论文每个阶段（download / parse / translate / upload）一行：状态、尝试次数、起止时间、耗时、错误、
+产物（本地路径 / 大小 / sha256）以及输入指纹。批处理据此只调度未完成的工作，
+不必再对每篇论文逐个探测本地文件和 OSS 对象是否存在。
+
+- 状态：pending / running / done / failed；
+- is_current(paper_id, stage, fingerprint)：已完成、输入指纹未变、记录的本地产物仍在且大小一致；
+- track(paper_id, stage) 上下文：进入时记 running，正常退出记 done，异常记 failed（异常照常抛出）；
+- 进程崩溃遗留的 running 行可用 reset_stale() 或 CLI 的 reset --status running 改回 pending。
+
+CLI:
+    python -m app.file.ingest_manifest summary
+    python -m app.file.ingest_manifest failures --stage parse --limit 20
+    python -m app.file.ingest_manifest show 2401.12345
+    python -m app.file.ingest_manifest reset --status failed [--stage upload] [--paper 2401.12345]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+STAGES = ("download", "parse", "translate", "upload")
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+_START_SQL = (
+    "INSERT INTO stages (paper_id, stage, status, attempts, started, updated) VALUES (?, ?, ?, 1, ?, ?) "
+    "ON CONFLICT (paper_id, stage) DO UPDATE SET status = excluded.status, "
+    "attempts = attempts + 1, started = excluded.started, finished = NULL, error = NULL, "
+    "updated = excluded.updated"
+)
+_IN_CHUNK = 500
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(chunk_size), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+
+def dir_fingerprint(root: str, ignore_suffixes: Iterable[str] = (".part",)) -> Optional[str]:
+    """目录下文件 (相对路径, 大小, mtime) 的摘要，只 stat 不读内容；目录不存在返回 None。"""
+    if not os.path.isdir(root):
+        return None
+    ignore_suffixes = tuple(ignore_suffixes)
+    entries = []
+    for base, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.endswith(ignore_suffixes):
+                continue
+            st = os.stat(os.path.join(base, name))
+            entries.append(f"{os.path.relpath(os.path.join(base, name), root)}\0{st.st_size}\0{int(st.st_mtime)}")
+    return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()
+
+
+class StageRecord:
+    """track() 里交给调用方的记录器：登记产物与输入指纹。"""
+
+    def __init__(self):
+        self.artifacts: Dict[str, Dict[str, Any]] = {}
+        self.fingerprint: Optional[str] = None
+
+    def file(self, name: str, path: str, digest: bool = True, mutable: bool = False) -> None:
+        """mutable=True：之后会被原地改写的文件（如上传时改写图片地址的 Markdown），只校验存在。"""
+        artifact: Dict[str, Any] = {"path": path}
+        if not mutable:
+            artifact["size"] = os.path.getsize(path)
+            if digest:
+                artifact["sha256"] = file_digest(path)
+        self.artifacts[name] = artifact
+
+    def value(self, name: str, value: Any) -> None:
+        self.artifacts[name] = {"value": value}
+
+
+class IngestManifest:
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            "paper_id TEXT NOT NULL, stage TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, started REAL, finished REAL, duration_s REAL, "
+            "error TEXT, artifacts TEXT, fingerprint TEXT, updated REAL NOT NULL, "
+            "PRIMARY KEY (paper_id, stage))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS stages_stage_status ON stages (stage, status)")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # ---------- 写 ----------
+    def enqueue(self, paper_ids: Iterable[str], stages: Iterable[str] = STAGES) -> None:
+        """登记待处理论文（已有记录的不变）。"""
+        now = time.time()
+        rows = [(pid, stage, PENDING, now) for pid in dict.fromkeys(paper_ids) for stage in stages]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO stages (paper_id, stage, status, updated) VALUES (?, ?, ?, ?)", rows)
+
+    def start(self, paper_id: str, stage: str) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(_START_SQL, (paper_id, stage, RUNNING, now, now))
+
+    def claim(self, paper_id: str, stage: str, lease_s: float = 6 * 3600) -> bool:
+        """
+        跨进程互斥：原子地把 (paper_id, stage) 置为 running 并返回 True；
+        已被其它进程置为 running 且未超过 lease_s 时返回 False（BEGIN IMMEDIATE 保证检查与写入之间没有其它写者）。
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status, started FROM stages WHERE paper_id = ? AND stage = ?",
+                               (paper_id, stage)).fetchone()
+            if row is not None and row["status"] == RUNNING and (row["started"] or 0) > now - lease_s:
+                return False
+            conn.execute(_START_SQL, (paper_id, stage, RUNNING, now, now))
+        return True
+
+    def finish(self, paper_id: str, stage: str, artifacts: Optional[dict] = None,
+               fingerprint: Optional[str] = None) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE stages SET status = ?, finished = ?, duration_s = ? - COALESCE(started, ?), error = NULL, "
+                "artifacts = ?, fingerprint = ?, updated = ? WHERE paper_id = ? AND stage = ?",
+                (DONE, now, now, now, json.dumps(artifacts or {}, ensure_ascii=False), fingerprint, now,
+                 paper_id, stage),
+            )
+
+    def fail(self, paper_id: str, stage: str, error: str) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE stages SET status = ?, finished = ?, duration_s = ? - COALESCE(started, ?), error = ?, "
+                "updated = ? WHERE paper_id = ? AND stage = ?",
+                (FAILED, now, now, now, error[:4000], now, paper_id, stage),
+            )
+
+    @contextmanager
+    def track(self, paper_id: str, stage: str) -> Iterator[StageRecord]:
+        record = StageRecord()
+        self.start(paper_id, stage)
+        try:
+            yield record
+        except BaseException as e:
+            self.fail(paper_id, stage, f"{type(e).__name__}: {e}")
+            raise
+        self.finish(paper_id, stage, record.artifacts, record.fingerprint)
+
+    def reset(self, paper_id: Optional[str] = None, stage: Optional[str] = None,
+              status: Optional[str] = FAILED) -> int:
+        """把匹配的行改回 pending，返回行数。status=None 表示不限状态。"""
+        clauses, params = [], []
+        for column, value in (("paper_id", paper_id), ("stage", stage), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = " AND ".join(clauses) or "1 = 1"
+        with self._transaction() as conn:
+            cur = conn.execute(f"UPDATE stages SET status = ?, updated = ? WHERE {where}",
+                               [PENDING, time.time(), *params])
+            return cur.rowcount
+
+    def reset_stale(self, older_than_s: float = 6 * 3600) -> int:
+        """超过 older_than_s 仍为 running 的行（进程已崩溃）改回 pending。"""
+        with self._transaction() as conn:
+            cur = conn.execute("UPDATE stages SET status = ?, updated = ? WHERE status = ? AND started < ?",
+                               (PENDING, time.time(), RUNNING, time.time() - older_than_s))
+            return cur.rowcount
+
+    # ---------- 读 ----------
+    def _rows(self, sql: str, params: Iterable[Any] = ()) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, list(params)).fetchall()
+        out = []
+        for row in rows:
+            item = dict(row)
+            item["artifacts"] = json.loads(item["artifacts"]) if item.get("artifacts") else {}
+            out.append(item)
+        return out
+
+    def get(self, paper_id: str, stage: str) -> Optional[dict]:
+        rows = self._rows("SELECT * FROM stages WHERE paper_id = ? AND stage = ?", (paper_id, stage))
+        return rows[0] if rows else None
+
+    def status(self, paper_id: str) -> Dict[str, dict]:
+        return {row["stage"]: row for row in self._rows("SELECT * FROM stages WHERE paper_id = ?", (paper_id,))}
+
+    def is_current(self, paper_id: str, stage: str, fingerprint: Optional[str] = None) -> bool:
+        """已完成、指纹一致（给了的话）、记录的本地产物仍存在且大小一致。"""
+        row = self.get(paper_id, stage)
+        if row is None or row["status"] != DONE:
+            return False
+        if fingerprint is not None and row["fingerprint"] != fingerprint:
+            return False
+        for artifact in row["artifacts"].values():
+            path = artifact.get("path")
+            if not path:
+                continue
+            if not os.path.exists(path):
+                return False
+            if "size" in artifact and os.path.getsize(path) != artifact["size"]:
+                return False
+        return True
+
+    def outstanding(self, paper_ids: Iterable[str], stages: Iterable[str] = STAGES) -> List[str]:
+        """按输入顺序返回还有阶段未完成的论文（只查清单，不碰文件系统和 OSS）。"""
+        paper_ids = list(dict.fromkeys(paper_ids))
+        stages = list(stages)
+        complete = set()
+        for i in range(0, len(paper_ids), _IN_CHUNK):
+            chunk = paper_ids[i:i + _IN_CHUNK]
+            rows = self._rows(
+                f"SELECT paper_id FROM stages WHERE status = ? AND stage IN ({','.join('?' * len(stages))}) "
+                f"AND paper_id IN ({','.join('?' * len(chunk))}) GROUP BY paper_id HAVING COUNT(*) = ?",
+                [DONE, *stages, *chunk, len(stages)],
+            )
+            complete.update(row["paper_id"] for row in rows)
+        return [pid for pid in paper_ids if pid not in complete]
+
+    def backing_off(self, paper_ids: Iterable[str], stage: str, max_attempts: int,
+                    backoff_s: float) -> List[str]:
+        """
+        该阶段失败后暂不重试的论文：attempts 达到 max_attempts 的不再自动重试（reset 后恢复），
+        其余在上次失败后 backoff_s * 2^(attempts-1) 内不重试。
+        """
+        paper_ids = list(dict.fromkeys(paper_ids))
+        now = time.time()
+        blocked = []
+        for i in range(0, len(paper_ids), _IN_CHUNK):
+            chunk = paper_ids[i:i + _IN_CHUNK]
+            rows = self._rows(
+                f"SELECT paper_id, attempts, updated FROM stages WHERE status = ? AND stage = ? "
+                f"AND paper_id IN ({','.join('?' * len(chunk))})",
+                [FAILED, stage, *chunk],
+            )
+            for row in rows:
+                attempts = row["attempts"] or 0
+                if attempts >= max_attempts or now - (row["updated"] or 0) < backoff_s * 2 ** max(attempts - 1, 0):
+                    blocked.append(row["paper_id"])
+        return blocked
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._rows(
+            "SELECT stage, status, COUNT(*) AS n, AVG(duration_s) AS avg_s FROM stages GROUP BY stage, status")
+        out: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            stage = out.setdefault(row["stage"], {})
+            stage[row["status"]] = row["n"]
+            if row["status"] == DONE and row["avg_s"] is not None:
+                stage["avg_done_s"] = round(row["avg_s"], 2)
+        return out
+
+    def failures(self, stage: Optional[str] = None, limit: int = 50) -> List[dict]:
+        if stage:
+            return self._rows("SELECT * FROM stages WHERE status = ? AND stage = ? ORDER BY updated DESC LIMIT ?",
+                              (FAILED, stage, limit))
+        return self._rows("SELECT * FROM stages WHERE status = ? ORDER BY updated DESC LIMIT ?", (FAILED, limit))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default: Optional[IngestManifest] = None
+_default_lock = threading.Lock()
+
+
+def default_manifest() -> IngestManifest:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = IngestManifest(os.getenv("INGEST_MANIFEST_PATH", ".cache/ingest_manifest.sqlite"))
+        return _default
+
+
+def _fmt_time(ts: Optional[float]) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) if ts else "-"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect and reset the paper ingestion manifest.")
+    parser.add_argument("--db", default=os.getenv("INGEST_MANIFEST_PATH", ".cache/ingest_manifest.sqlite"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("summary", help="counts per stage and status")
+    p_fail = sub.add_parser("failures", help="most recent failures")
+    p_fail.add_argument("--stage", help=f"one of {', '.join(STAGES)} or an extra stage such as report")
+    p_fail.add_argument("--limit", type=int, default=20)
+    p_show = sub.add_parser("show", help="all stages of one paper")
+    p_show.add_argument("paper_id")
+    p_reset = sub.add_parser("reset", help="mark matching rows pending so the next batch retries them")
+    p_reset.add_argument("--paper")
+    p_reset.add_argument("--stage", help=f"one of {', '.join(STAGES)} or an extra stage such as report")
+    p_reset.add_argument("--status", default=FAILED, help="status to match, or 'any'")
+    args = parser.parse_args(argv)
+
+    manifest = IngestManifest(args.db)
+    if args.command == "summary":
+        summary = manifest.summary()
+        print(f"{'stage':<10} {'pending':>8} {'running':>8} {'done':>8} {'failed':>8} {'avg_done_s':>11}")
+        # 流水线阶段在前，其余调用方记录的阶段（如预计算的 report）按名字排在后面
+        for stage in [*STAGES, *sorted(set(summary) - set(STAGES))]:
+            s = summary.get(stage, {})
+            print(f"{stage:<10} {s.get(PENDING, 0):>8} {s.get(RUNNING, 0):>8} {s.get(DONE, 0):>8} "
+                  f"{s.get(FAILED, 0):>8} {s.get('avg_done_s', '-'):>11}")
+    elif args.command == "failures":
+        for row in manifest.failures(args.stage, args.limit):
+            print(f"{row['paper_id']:<16} {row['stage']:<10} attempts={row['attempts']} "
+                  f"at={_fmt_time(row['updated'])}  {row['error']}")
+    elif args.command == "show":
+        status = manifest.status(args.paper_id)
+        if not status:
+            print(f"{args.paper_id}: not in manifest")
+        for stage in [*STAGES, *sorted(set(status) - set(STAGES))]:
+            row = status.get(stage)
+            if row is None:
+                continue
+            duration = f"{row['duration_s']:.1f}s" if row["duration_s"] is not None else "-"
+            print(f"{stage:<10} {row['status']:<8} attempts={row['attempts']} duration={duration} "
+                  f"finished={_fmt_time(row['finished'])}")
+            if row["error"]:
+                print(f"    error: {row['error']}")
+            for name, artifact in row["artifacts"].items():
+                print(f"    {name}: {json.dumps(artifact, ensure_ascii=False)}")
+    elif args.command == "reset":
+        status = None if args.status == "any" else args.status
+        print(f"reset {manifest.reset(args.paper, args.stage, status)} rows to pending")
+    manifest.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+多阶段并发流水线：下载 → MinerU 解析 → 翻译 → 上传 这类串行步骤互相重叠执行。
+
+- 每个阶段有独立的有界输入队列和 worker 数：下游慢时上游 put 阻塞（背压），不会无限堆积；
+- 每个阶段独立重试（指数退避），重试用尽后该条目标记失败并跳过后续阶段；
+- 论文 N 在翻译时，N+1 在解析、N+2 在下载；
+- stats() 给出每个阶段的处理数、失败数、重试数、忙碌时长、吞吐和当前队列深度，
+  run() 期间可按 report_interval_s 周期打印。
+
+用法:
+    pipeline = Pipeline([
+        Stage("download", download_fn, workers=4),
+        Stage("parse", parse_fn, workers=1),
+    ])
+    results = pipeline.run(items)
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Any], Any]  # 接收上一阶段的输出，返回交给下一阶段的值
+    workers: int = 1
+    queue_size: int = 2
+    retries: int = 2
+    backoff_s: float = 2.0
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    failed: int = 0
+    retried: int = 0
+    busy_s: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def as_dict(self, queue_depth: int, queue_size: int, workers: int) -> dict:
+        end = self.finished_at or time.monotonic()
+        wall = (end - self.started_at) if self.started_at else 0.0
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "busy_s": round(self.busy_s, 3),
+            "throughput_per_min": round(self.processed / wall * 60, 2) if wall > 0 else 0.0,
+            # 忙碌时长 / (墙钟 × worker 数)，接近 1 说明该阶段是瓶颈
+            "utilization": round(self.busy_s / (wall * workers), 3) if wall > 0 else 0.0,
+            "queue_depth": queue_depth,
+            "queue_size": queue_size,
+            "workers": workers,
+        }
+
+
+@dataclass
+class ItemResult:
+    index: int
+    input: Any
+    output: Any = None
+    error: Optional[str] = None
+    failed_stage: Optional[str] = None
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], report_interval_s: float = 0):
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        self.stages = stages
+        self.report_interval_s = report_interval_s
+        self._queues: List[queue.Queue] = []
+        self._stats: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    # ---------- 单个阶段 ----------
+    def _run_with_retry(self, stage: Stage, value: Any) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return stage.fn(value)
+            except Exception:
+                if attempt >= stage.retries:
+                    raise
+                attempt += 1
+                with self._lock:
+                    self._stats[stage.name].retried += 1
+                time.sleep(stage.backoff_s * (2 ** (attempt - 1)))
+
+    def _worker(self, idx: int, stage: Stage, done: List[int]) -> None:
+        inbox = self._queues[idx]
+        outbox = self._queues[idx + 1] if idx + 1 < len(self.stages) else None
+        stats = self._stats[stage.name]
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            result, value = item
+            start = time.monotonic()
+            try:
+                value = self._run_with_retry(stage, value)
+                ok = True
+            except Exception as e:
+                ok = False
+                result.error = f"{type(e).__name__}: {e}"
+                result.failed_stage = stage.name
+                logger.warning("pipeline stage {} failed for item {}: {}", stage.name, result.index, e)
+            elapsed = time.monotonic() - start
+            result.stage_seconds[stage.name] = round(elapsed, 3)
+            with self._lock:
+                stats.busy_s += elapsed
+                if ok:
+                    stats.processed += 1
+                else:
+                    stats.failed += 1
+            if ok:
+                if outbox is not None:
+                    outbox.put((result, value))  # 下游队列满时阻塞，即背压
+                else:
+                    result.output = value
+        # 本阶段最后一个退出的 worker 负责通知下游收尾
+        with self._lock:
+            done[idx] += 1
+            last = done[idx] == stage.workers
+            if last:
+                stats.finished_at = time.monotonic()
+        if last and outbox is not None:
+            for _ in range(self.stages[idx + 1].workers):
+                outbox.put(_STOP)
+
+    # ---------- 对外接口 ----------
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                stage.name: self._stats[stage.name].as_dict(
+                    self._queues[i].qsize(), self._queues[i].maxsize, stage.workers)
+                for i, stage in enumerate(self.stages)
+            } if self._queues else {}
+
+    def _report(self, stop: threading.Event) -> None:
+        while not stop.wait(self.report_interval_s):
+            summary = ", ".join(
+                f"{name}: done={s['processed']} failed={s['failed']} q={s['queue_depth']}/{s['queue_size']}"
+                for name, s in self.stats().items()
+            )
+            logger.info("pipeline progress | {}", summary)
+
+    def run(self, items: Iterable[Any]) -> List[ItemResult]:
+        """处理全部条目，按输入顺序返回结果。"""
+        now = time.monotonic()
+        self._queues = [queue.Queue(maxsize=max(1, s.queue_size)) for s in self.stages]
+        self._stats = {s.name: StageStats(started_at=now) for s in self.stages}
+        done = [0] * len(self.stages)
+
+        threads = []
+        for idx, stage in enumerate(self.stages):
+            stage.workers = max(1, stage.workers)
+            for n in range(stage.workers):
+                t = threading.Thread(target=self._worker, args=(idx, stage, done),
+                                     name=f"pipeline-{stage.name}-{n}", daemon=True)
+                t.start()
+                threads.append(t)
+
+        stop_report = threading.Event()
+        if self.report_interval_s > 0:
+            threading.Thread(target=self._report, args=(stop_report,), name="pipeline-report", daemon=True).start()
+
+        results: List[ItemResult] = []
+        try:
+            for i, item in enumerate(items):
+                result = ItemResult(index=i, input=item)
+                results.append(result)
+                self._queues[0].put((result, item))
+            for _ in range(self.stages[0].workers):
+                self._queues[0].put(_STOP)
+            for t in threads:
+                t.join()
+        finally:
+            stop_report.set()
+
+        ok = sum(r.ok for r in results)
+        logger.info("pipeline finished: {}/{} ok | {}", ok, len(results), self.stats())
+        return results
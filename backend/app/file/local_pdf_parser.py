@@ -0,0 +1,210 @@
+"""
+本地快速 PDF -> Markdown（不依赖 GPU 解析服务）。
+
+- pypdfium2 逐页取字符与字号，页面按批分给进程池并行提取（pdfium 不是线程安全的，也受 GIL 限制）；
+- 按字符数加权求正文字号，明显大于正文的短行视为标题，字号从大到小映射为 # / ## / ###；
+  同字号的连续标题行（折行的论文标题）合并为一个标题，连续行过多或过长则是放大字号的正文（如摘要），按段落处理；
+  正文字号但形如 "3.2 Method" 的编号行按编号层级补成标题；
+- 同一段落的折行合并、行尾连字符还原，正文中以 # 开头的行转义，保证 parse_markdown_into_chunks 只按真正的标题切分。
+
+结果只含文本（无图片、公式、表格结构），用于秒级预览，以及 MinerU 不可用时的兜底。
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from statistics import median
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+LOCAL_MD_SUFFIX = ".local.md"
+PAGES_PER_TASK = 8
+_HEADING_RATIO = 1.15
+_MAX_HEADING_CHARS = 120
+_MAX_HEADING_LINES = 3
+_MAX_HEADING_RUN_CHARS = 200
+_NUMBERED_RE = re.compile(r"^(?P<num>\d{1,2}(?:\.\d{1,2}){0,3})\.?\s+(?P<title>[A-Z][^.!?]{1,80})$")
+_SENTENCE_END = (".", "?", "!", ":", "。", "？", "！", "：")
+
+# (文本, 字号) 一行
+Line = Tuple[str, float]
+
+
+def _extract_pages(pdf_path: str, start: int, end: int) -> List[List[Line]]:
+    """子进程中执行：提取 [start, end) 页的行与行字号（字符数最多的字号）。"""
+    import pypdfium2
+    import pypdfium2.raw as pdfium_c
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    pages: List[List[Line]] = []
+    try:
+        for index in range(start, end):
+            page = pdf[index]
+            text_page = page.get_textpage()
+            lines: List[Line] = []
+            chars: List[str] = []
+            sizes: Counter = Counter()
+            try:
+                for i in range(pdfium_c.FPDFText_CountChars(text_page.raw)):
+                    ch = chr(pdfium_c.FPDFText_GetUnicode(text_page.raw, i))
+                    if ch in "\r\n":
+                        if chars:
+                            text = "".join(chars).strip()
+                            if text:
+                                lines.append((text, sizes.most_common(1)[0][0] if sizes else 0.0))
+                            chars, sizes = [], Counter()
+                        continue
+                    chars.append(ch)
+                    size = round(pdfium_c.FPDFText_GetFontSize(text_page.raw, i) * 2) / 2
+                    if size > 0 and not ch.isspace():
+                        sizes[size] += 1
+                text = "".join(chars).strip()
+                if text:
+                    lines.append((text, sizes.most_common(1)[0][0] if sizes else 0.0))
+            finally:
+                text_page.close()
+                page.close()
+            pages.append(lines)
+    finally:
+        pdf.close()
+    return pages
+
+
+def _body_size(pages: List[List[Line]]) -> float:
+    weights: Counter = Counter()
+    for lines in pages:
+        for text, size in lines:
+            if size:
+                weights[size] += len(text)
+    return weights.most_common(1)[0][0] if weights else 0.0
+
+
+def _heading_levels(pages: List[List[Line]], body: float) -> dict:
+    """标题字号 -> 级别；最多三级，更小的标题字号都归到第三级。"""
+    sizes = sorted({size for lines in pages for text, size in lines
+                    if body and size >= body * _HEADING_RATIO and len(text) <= _MAX_HEADING_CHARS},
+                   reverse=True)
+    return {size: min(i + 1, 3) for i, size in enumerate(sizes)}
+
+
+def _escape(text: str) -> str:
+    return "\\" + text if text.startswith("#") else text
+
+
+def lines_to_markdown(pages: List[List[Line]]) -> str:
+    body = _body_size(pages)
+    levels = _heading_levels(pages, body)
+    widths = [len(text) for lines in pages for text, size in lines if size == body]
+    typical = median(widths) if widths else 80
+
+    out: List[str] = []
+    paragraph: List[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            out.append(" ".join(paragraph))
+            out.append("")
+            paragraph.clear()
+
+    def append_body(text: str) -> None:
+        if paragraph and paragraph[-1].endswith("-") and text[:1].islower():
+            # 行尾连字符：exam-\nple -> example
+            paragraph[-1] = paragraph[-1][:-1] + text
+        else:
+            paragraph.append(text)
+
+    def is_page_number(text: str) -> bool:
+        return text.isdigit() and len(text) <= 4
+
+    def body_line(text: str, size: float) -> None:
+        numbered = _NUMBERED_RE.match(text) if size >= body else None
+        if numbered is not None and len(text) < typical:
+            flush()
+            depth = numbered.group("num").count(".") + 2
+            out.extend([f"{'#' * min(depth, 4)} {text}", ""])
+            return
+        append_body(_escape(text) if not paragraph else text)
+        # 明显短于正常行宽且以句末标点结尾，视为段落结束
+        if len(text) < typical * 0.7 and text.endswith(_SENTENCE_END):
+            flush()
+
+    for lines in pages:
+        lines = [(text, size) for text, size in lines if not is_page_number(text)]
+        i = 0
+        while i < len(lines):
+            text, size = lines[i]
+            level = levels.get(size)
+            if level is None:
+                body_line(text, size)
+                i += 1
+                continue
+            # 同字号的连续行作为一组：每行都短、行数少、总长有限才是（可能折行的）标题
+            j = i
+            while j < len(lines) and lines[j][1] == size:
+                j += 1
+            run = [t for t, _ in lines[i:j]]
+            heading = " ".join(run)
+            if (len(run) <= _MAX_HEADING_LINES and len(heading) <= _MAX_HEADING_RUN_CHARS
+                    and all(len(t) <= _MAX_HEADING_CHARS and len(t) < typical for t in run)
+                    and not heading.endswith(".")):
+                flush()
+                out.extend([f"{'#' * level} {heading}", ""])
+            else:
+                for t in run:
+                    body_line(t, size)
+            i = j
+        flush()  # 分页处断段
+    return "\n".join(out).strip() + "\n"
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv("LOCAL_PARSER_WORKERS", str(min(8, os.cpu_count() or 2))))
+            _pool = ProcessPoolExecutor(max_workers=max(1, workers))
+        return _pool
+
+
+def extract_lines(pdf_path: str) -> List[List[Line]]:
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        n_pages = len(pdf)
+    finally:
+        pdf.close()
+    ranges = [(s, min(s + PAGES_PER_TASK, n_pages)) for s in range(0, n_pages, PAGES_PER_TASK)]
+    if len(ranges) <= 1:
+        return _extract_pages(pdf_path, 0, n_pages)
+    pool = _process_pool()
+    futures = [pool.submit(_extract_pages, pdf_path, s, e) for s, e in ranges]
+    return [page for future in futures for page in future.result()]
+
+
+def parse_pdf_local(file_path: str, file_name_dir: str) -> str:
+    """
+    本地解析，结果写入 {file_name_dir}/{stem}.local.md 并返回。
+    不写 {stem}.md，以免挡住之后 MinerU 的正式解析（parse_pdf 以 .md 是否存在判断已解析）。
+    """
+    os.makedirs(file_name_dir, exist_ok=True)
+    out_path = os.path.join(file_name_dir, Path(file_path).stem + LOCAL_MD_SUFFIX)
+    if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(file_path):
+        with open(out_path, "r", encoding="utf-8") as f:
+            return f.read()
+    pages = extract_lines(file_path)
+    md_content = lines_to_markdown(pages)
+    with open(out_path + ".part", "w", encoding="utf-8") as f:
+        f.write(md_content)
+    os.replace(out_path + ".part", out_path)
+    logger.info(f'本地解析完成: {Path(file_path).name}, {len(pages)} 页, {len(md_content)} 字符')
+    return md_content
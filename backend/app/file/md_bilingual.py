@@ -31,6 +31,8 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Tuple, Dict
 
 from dotenv import load_dotenv
+
+from ..llm.monitoring import LLMCallTracker, TokenUsage
 # from hf_papers_download_or_parser_to_oss import donwload_md_to_local
 load_dotenv()
 
@@ -252,18 +254,24 @@ class Translator:
         }
         try:
             sess = self._ensure_session()
-            resp = sess.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                data=json.dumps(payload),
-                timeout=90,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            chinese = data["choices"][0]["message"]["content"].strip()
+            with LLMCallTracker(self.model, call_site="translate") as call:
+                call.sent()
+                resp = sess.post(
+                    f"{self.base_url}/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                    },
+                    data=json.dumps(payload),
+                    timeout=90,
+                )
+                resp.raise_for_status()
+                data = resp.json()
+                usage = data.get("usage") or {}
+                if usage:
+                    call.usage(TokenUsage(input_tokens=usage.get("prompt_tokens") or 0,
+                                          output_tokens=usage.get("completion_tokens") or 0))
+                chinese = data["choices"][0]["message"]["content"].strip()
             return chinese
         except Exception as e:
             return f"> 译文（API 调用失败: {e}）"
@@ -387,7 +395,7 @@ def translate_markdown_file(paper_id: str,md_text:str=None,is_local:bool=False)
     # out_path =(os.path.splitext(file_path)[0] + ".bilingual.md")
     out_md = render_bilingual_md(chunks, translations, style="blockquote")
     if is_local:
-        out_path = "hf_papers/"+paper_id + f"/{paper_id}.bilingual.md"
+        out_path = os.path.join(os.getenv("STORAGE_LOCAL_PATH", "hf_papers"), paper_id, f"{paper_id}.bilingual.md")
         with open(out_path, "w", encoding="utf-8") as f:
             f.write(out_md)
     # with open(out_path, "w", encoding="utf-8") as f:
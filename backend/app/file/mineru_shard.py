@@ -0,0 +1,378 @@
+"""
+长 PDF 按页分片并行解析。
+
+一篇 120 页的综述整篇提交给 MinerU 时会独占一个解析槽位半小时。分片模式下：
+- 按页拆成若干段（pypdfium2 物理拆成小 PDF；没有 pypdfium2 时从 PDF 对象里数页数，
+  每个分片整篇上传并用 start_page_id / end_page_id 指定页段）；
+- 各分片并发提交到一个或多个 MinerU 地址（PARSE_URLS，逗号分隔；未配置时用 PARSE_URL），
+  每个地址有并发上限，新分片总是交给在途请求最少的地址，失败的分片换一个地址重试；
+- 结果按页序拼接：Markdown 依次连接，middle_json 的 pdf_info 合并且 page_idx 加上分片起始页，
+  图片合并到同一个 images/ 目录。MinerU 的图片名一般是内容哈希，原样保留；同名但内容不同时
+  改名为 <stem>_p<起始页><ext> 并同步改写 Markdown / middle_json 中的引用，名字只取决于分片方案，重跑结果一致。
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from loguru import logger
+
+from .mineru_stream import MineruResult, stream_mineru_response
+
+SHARD_DIR_NAME = ".shards"
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+def parser_urls() -> List[str]:
+    urls = [u.strip() for u in os.getenv("PARSE_URLS", "").split(",") if u.strip()]
+    if not urls and os.getenv("PARSE_URL"):
+        urls = [os.getenv("PARSE_URL")]
+    return urls
+
+
+_PAGE_OBJ = re.compile(rb"/Type\s*/Page(?![s\w])")
+_STREAM = re.compile(rb"(?<!end)stream\r?\n(.*?)\r?\nendstream", re.S)
+
+
+def count_pages_raw(data: bytes) -> int:
+    """
+    不依赖 pypdfium2 的页数：数 /Type /Page 对象，PDF 1.5 起页对象可能在压缩的对象流（/ObjStm）里，一并解压计数。
+    有增量更新时可能偏多，只用于规划页段（超出的 end_page_id 由 MinerU 截断）。
+    """
+    n = len(_PAGE_OBJ.findall(data))
+    for m in _STREAM.finditer(data):
+        header = data[max(0, m.start() - 512):m.start()]
+        if b"/ObjStm" not in header[header.rfind(b" obj"):]:
+            continue
+        try:
+            n += len(_PAGE_OBJ.findall(zlib.decompress(m.group(1))))
+        except zlib.error:
+            continue
+    return n
+
+
+def count_pages(pdf_path: str) -> Optional[int]:
+    """页数；没有安装 pypdfium2 时按 count_pages_raw 估计，数不出来时返回 None。"""
+    try:
+        import pypdfium2
+    except ImportError:
+        with open(pdf_path, "rb") as f:
+            return count_pages_raw(f.read()) or None
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def plan_shards(n_pages: int, pages_per_shard: int) -> List[Tuple[int, int]]:
+    """[(start, end)]，闭区间、0 起；最后一段太短（不足一半）时并入前一段。"""
+    pages_per_shard = max(1, pages_per_shard)
+    ranges = [(s, min(s + pages_per_shard, n_pages) - 1) for s in range(0, n_pages, pages_per_shard)]
+    if len(ranges) > 1 and ranges[-1][1] - ranges[-1][0] + 1 < pages_per_shard / 2:
+        tail = ranges.pop()
+        ranges[-1] = (ranges[-1][0], tail[1])
+    return ranges
+
+
+def split_pdf(pdf_path: str, start: int, end: int, out_path: str) -> bool:
+    """把 [start, end] 页另存为 out_path；没有 pypdfium2 时返回 False。"""
+    try:
+        import pypdfium2
+    except ImportError:
+        return False
+    src = pypdfium2.PdfDocument(pdf_path)
+    dst = pypdfium2.PdfDocument.new()
+    try:
+        dst.import_pages(src, list(range(start, end + 1)))
+        dst.save(out_path)
+    finally:
+        dst.close()
+        src.close()
+    return True
+
+
+@dataclass
+class _Endpoint:
+    url: str
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    pages: int = 0
+    busy_s: float = 0.0
+    cooldown_until: float = 0.0
+
+
+class EndpointBalancer:
+    """在途请求最少优先；每个地址最多 max_concurrency 个在途请求；失败后冷却 cooldown_s 秒。"""
+
+    def __init__(self, urls: List[str], max_concurrency: int = 1, cooldown_s: float = 30.0):
+        if not urls:
+            raise ValueError("no MinerU parser URL configured (PARSE_URLS / PARSE_URL)")
+        self.endpoints = [_Endpoint(u) for u in dict.fromkeys(urls)]
+        self.max_concurrency = max(1, max_concurrency)
+        self.cooldown_s = cooldown_s
+        self._cond = threading.Condition()
+
+    def acquire(self, exclude: Optional[set] = None) -> _Endpoint:
+        exclude = exclude or set()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                # 排除本分片已失败过的地址、冷却中的地址；全部被排除时才放宽
+                eligible = [e for e in self.endpoints if e.url not in exclude] or self.endpoints
+                healthy = [e for e in eligible if e.cooldown_until <= now] or eligible
+                candidates = [e for e in healthy if e.in_flight < self.max_concurrency]
+                if candidates:
+                    endpoint = min(candidates, key=lambda e: (e.in_flight, e.busy_s))
+                    endpoint.in_flight += 1
+                    endpoint.requests += 1
+                    return endpoint
+                # 冷却到期也要重新评估，所以带超时等待
+                self._cond.wait(timeout=1.0)
+
+    def release(self, endpoint: _Endpoint, elapsed: float, pages: int, ok: bool) -> None:
+        with self._cond:
+            endpoint.in_flight -= 1
+            endpoint.busy_s += elapsed
+            if ok:
+                endpoint.pages += pages
+            else:
+                endpoint.failures += 1
+                endpoint.cooldown_until = time.monotonic() + self.cooldown_s
+            self._cond.notify_all()
+
+    def stats(self) -> List[dict]:
+        with self._cond:
+            return [{"url": e.url, "requests": e.requests, "failures": e.failures, "pages": e.pages,
+                     "busy_s": round(e.busy_s, 2), "in_flight": e.in_flight} for e in self.endpoints]
+
+
+@dataclass
+class Shard:
+    index: int
+    start: int
+    end: int
+    work_dir: str
+    pdf_path: str = ""
+    page_offset: int = 0  # 分片结果里 page_idx 需要加上的偏移
+    page_range: bool = False  # 整篇上传，用 start_page_id / end_page_id 指定页段
+    result: Optional[MineruResult] = None
+    endpoint: str = ""
+    attempts: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def pages(self) -> int:
+        return self.end - self.start + 1
+
+
+@dataclass
+class ShardedParseReport:
+    pages: int
+    shards: List[dict] = field(default_factory=list)
+    endpoints: List[dict] = field(default_factory=list)
+    renamed_images: Dict[str, str] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+
+class ShardedMineruParser:
+    def __init__(self, mineru_cfg: Dict[str, str], urls: Optional[List[str]] = None,
+                 pages_per_shard: int = 20, timeout_s: float = 1800, retries: int = 2,
+                 per_endpoint_concurrency: int = 1, balancer: Optional[EndpointBalancer] = None):
+        self.mineru_cfg = dict(mineru_cfg)
+        self.balancer = balancer or EndpointBalancer(urls or parser_urls(), per_endpoint_concurrency)
+        self.pages_per_shard = pages_per_shard
+        self.timeout_s = timeout_s
+        self.retries = retries
+
+    # ---------- 单个分片 ----------
+    def _post(self, url: str, shard: Shard, source_pdf: str) -> MineruResult:
+        data = dict(self.mineru_cfg)
+        if shard.page_range:
+            data.update(start_page_id=str(shard.start), end_page_id=str(shard.end))
+        upload_name = Path(source_pdf).name
+        with open(shard.pdf_path, "rb") as f:
+            response = requests.post(url, files={"files": (upload_name, f, "application/pdf")},
+                                     data=data, timeout=self.timeout_s, stream=True)
+        with response:
+            response.raise_for_status()
+            results = stream_mineru_response(response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                                             shard.work_dir)
+        if not results:
+            raise ValueError(f"empty MinerU result for shard {shard.index}")
+        return next(iter(results.values()))
+
+    def _run_shard(self, shard: Shard, source_pdf: str) -> Shard:
+        tried: set = set()
+        while True:
+            endpoint = self.balancer.acquire(exclude=tried)
+            shard.attempts += 1
+            start = time.monotonic()
+            try:
+                shard.result = self._post(endpoint.url, shard, source_pdf)
+            except Exception as e:
+                self.balancer.release(endpoint, time.monotonic() - start, shard.pages, ok=False)
+                tried.add(endpoint.url)
+                logger.warning("shard {} (pages {}-{}) failed on {}: {}",
+                               shard.index, shard.start, shard.end, endpoint.url, e)
+                if shard.attempts > self.retries:
+                    raise
+                continue
+            elapsed = time.monotonic() - start
+            self.balancer.release(endpoint, elapsed, shard.pages, ok=True)
+            shard.endpoint, shard.elapsed_s = endpoint.url, elapsed
+            return shard
+
+    # ---------- 拼接 ----------
+    @staticmethod
+    def _load_middle(path: Optional[str]) -> Optional[dict]:
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        return json.loads(text) if text.strip() else None
+
+    @staticmethod
+    def _rename_refs(value: Any, renames: Dict[str, str]) -> Any:
+        if isinstance(value, dict):
+            return {k: (renames.get(v, v) if k == "image_path" and isinstance(v, str)
+                        else ShardedMineruParser._rename_refs(v, renames)) for k, v in value.items()}
+        if isinstance(value, list):
+            return [ShardedMineruParser._rename_refs(v, renames) for v in value]
+        return value
+
+    @staticmethod
+    def _rename_md(md: str, renames: Dict[str, str]) -> str:
+        if not renames:
+            return md
+        pattern = re.compile(r"images/(" + "|".join(re.escape(n) for n in renames) + r")(?=[)\s\"'])")
+        return pattern.sub(lambda m: "images/" + renames[m.group(1)], md)
+
+    def _stitch(self, shards: List[Shard], out_dir: str, stem: str) -> Tuple[str, Dict[str, str]]:
+        images_dir = os.path.join(out_dir, "images")
+        os.makedirs(images_dir, exist_ok=True)
+        md_parts: List[str] = []
+        pdf_info: List[dict] = []
+        merged_meta: Dict[str, Any] = {}
+        all_renames: Dict[str, str] = {}
+        placed: Dict[str, int] = {}  # 图片名 -> 大小，用于判断同名是否同内容
+
+        for shard in shards:
+            result = shard.result
+            renames: Dict[str, str] = {}
+            for src in result.images:
+                name = os.path.basename(src)
+                dst = os.path.join(images_dir, name)
+                if name in placed:
+                    same = placed[name] == os.path.getsize(src) and Path(src).read_bytes() == Path(dst).read_bytes()
+                    if same:
+                        continue
+                    base, ext = os.path.splitext(name)
+                    name = f"{base}_p{shard.start}{ext}"
+                    renames[os.path.basename(src)] = name
+                    dst = os.path.join(images_dir, name)
+                shutil.move(src, dst)
+                placed[name] = os.path.getsize(dst)
+            all_renames.update({f"p{shard.start}:{k}": v for k, v in renames.items()})
+
+            md_parts.append(self._rename_md(result.read_markdown(), renames).strip("\n"))
+
+            middle = self._load_middle(result.middle_json_path)
+            if middle is not None:
+                middle = self._rename_refs(middle, renames)
+                pages = middle.get("pdf_info", [])
+                offset = shard.page_offset
+                # 整篇上传 + 页段参数时 MinerU 可能已给出绝对页码
+                if pages and offset and min(p.get("page_idx", 0) for p in pages) >= shard.start:
+                    offset = 0
+                for page in pages:
+                    page["page_idx"] = page.get("page_idx", 0) + offset
+                pdf_info.extend(pages)
+                for k, v in middle.items():
+                    if k != "pdf_info":
+                        merged_meta.setdefault(k, v)
+
+        md = "\n\n".join(p for p in md_parts if p) + "\n"
+        md_path = os.path.join(out_dir, f"{stem}.md")
+        middle_path = os.path.join(out_dir, f"{stem}.jsonl")
+        # 先写 middle_json，最后写 .md：.md 存在即表示解析完成
+        with open(middle_path + ".part", "w", encoding="utf-8") as f:
+            json.dump({"pdf_info": pdf_info, **merged_meta}, f, ensure_ascii=False)
+        os.replace(middle_path + ".part", middle_path)
+        with open(md_path + ".part", "w", encoding="utf-8") as f:
+            f.write(md)
+        os.replace(md_path + ".part", md_path)
+        return md, all_renames
+
+    # ---------- 对外接口 ----------
+    def parse(self, pdf_path: str, out_dir: str, n_pages: Optional[int] = None) -> Tuple[str, ShardedParseReport]:
+        began = time.monotonic()
+        n_pages = n_pages if n_pages is not None else count_pages(pdf_path)
+        if not n_pages:
+            raise ValueError(f"cannot determine page count of {pdf_path} (no pypdfium2 and no /Type /Page objects found)")
+        stem = Path(pdf_path).stem
+        shard_root = os.path.join(out_dir, SHARD_DIR_NAME)
+        shutil.rmtree(shard_root, ignore_errors=True)
+
+        shards: List[Shard] = []
+        for i, (start, end) in enumerate(plan_shards(n_pages, self.pages_per_shard)):
+            work_dir = os.path.join(shard_root, f"{i:03d}")
+            os.makedirs(work_dir, exist_ok=True)
+            shard = Shard(index=i, start=start, end=end, work_dir=work_dir)
+            shard_pdf = os.path.join(work_dir, f"{stem}.pdf")
+            if len(shards) == 0 and end == n_pages - 1:
+                shard.pdf_path = pdf_path  # 只有一段，不用拆
+            elif split_pdf(pdf_path, start, end, shard_pdf):
+                shard.pdf_path, shard.page_offset = shard_pdf, start
+            else:
+                shard.pdf_path, shard.page_offset, shard.page_range = pdf_path, start, True
+            shards.append(shard)
+
+        logger.info("sharded parse {}: {} pages -> {} shards over {} endpoints",
+                    Path(pdf_path).name, n_pages, len(shards), len(self.balancer.endpoints))
+        workers = min(len(shards), len(self.balancer.endpoints) * self.balancer.max_concurrency)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="mineru-shard") as pool:
+            futures = [pool.submit(self._run_shard, s, pdf_path) for s in shards]
+            shards = [f.result() for f in futures]
+
+        md, renames = self._stitch(shards, out_dir, stem)
+        shutil.rmtree(shard_root, ignore_errors=True)
+        report = ShardedParseReport(
+            pages=n_pages,
+            shards=[{"index": s.index, "pages": [s.start, s.end], "endpoint": s.endpoint,
+                     "attempts": s.attempts, "elapsed_s": round(s.elapsed_s, 2),
+                     "images": len(s.result.images)} for s in shards],
+            endpoints=self.balancer.stats(),
+            renamed_images=renames,
+            elapsed_s=round(time.monotonic() - began, 2),
+        )
+        logger.info("sharded parse {} done in {}s: {}", Path(pdf_path).name, report.elapsed_s, report.endpoints)
+        return md, report
+
+
+_shared_balancer: Optional[EndpointBalancer] = None
+_shared_lock = threading.Lock()
+
+
+def shared_balancer() -> EndpointBalancer:
+    """进程内共享：多篇论文同时分片解析时也按地址统一限流、均衡。"""
+    global _shared_balancer
+    with _shared_lock:
+        if _shared_balancer is None:
+            _shared_balancer = EndpointBalancer(
+                parser_urls(),
+                max_concurrency=int(os.getenv("PARSE_URL_MAX_CONCURRENCY", "1")),
+                cooldown_s=float(os.getenv("PARSE_URL_COOLDOWN_S", "30")),
+            )
+        return _shared_balancer
@@ -0,0 +1,407 @@
+"""
+MinerU 返回结果的流式解析。
+
+MinerU 的响应形如:
+    {"backend": ..., "version": ...,
+     "results": {"<name>": {"md_content": "...", "middle_json": "...",
+                            "images": {"<img>.jpg": "data:image/jpeg;base64,...", ...}}}}
+response.json() 会把 Markdown、中间 JSON 和全部 base64 图片同时放进内存（图片多的论文可达数百 MB）。
+这里边读边解析：
+- md_content / middle_json 直接写入磁盘；
+- 每张图片的 base64 边读边按 4 字符对齐解码写入图片文件；
+- 其它小字段照常返回。
+峰值内存只与读缓冲大小有关，与图片数量、图片大小无关。
+所有文件先写临时文件，完整读完后再 os.replace，中途失败不会留下半截的 .md（parse_pdf 以 .md 是否存在判断已解析）。
+"""
+from __future__ import annotations
+
+import binascii
+import codecs
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+_STR_SPECIAL_RE = re.compile(r'["\\]')
+_LITERAL_END = set(',}] \t\r\n')
+_WS = " \t\r\n"
+_FLUSH_CHARS = 64 * 1024
+
+
+class StreamedValue:
+    """已写入 sink 的字符串在返回结构里的占位。"""
+
+    def __init__(self, sink: "Sink"):
+        self.sink = sink
+
+    def __repr__(self) -> str:
+        return f"StreamedValue({getattr(self.sink, 'path', '?')})"
+
+
+class Sink:
+    def write(self, text: str) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        pass
+
+
+class _AtomicFileSink(Sink):
+    def __init__(self, path: str, mode: str, **kwargs):
+        self.path = path
+        self.tmp = f"{path}.part"
+        self.bytes_written = 0
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._file = open(self.tmp, mode, **kwargs)
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+class TextFileSink(_AtomicFileSink):
+    def __init__(self, path: str):
+        super().__init__(path, "w", encoding="utf-8", newline="")
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+        self.bytes_written += len(text)
+
+
+class Base64FileSink(_AtomicFileSink):
+    """
+    增量解码 base64（可带 data:image/...;base64, 前缀，兼容 url-safe 字母表与夹杂的空白），
+    每次只解码 4 字符对齐的部分，余下的留到下一块。
+    """
+
+    _PREFIX_PROBE = 256
+    _URLSAFE = str.maketrans("-_", "+/", " \t\r\n")
+
+    def __init__(self, path: str):
+        super().__init__(path, "wb")
+        self.mime: Optional[str] = None
+        self._head = ""  # 还没判断完前缀时暂存
+        self._prefix_done = False
+        self._carry = ""
+
+    def _strip_prefix(self, text: str) -> Optional[str]:
+        self._head += text
+        if self._head.startswith("data:"):
+            comma = self._head.find(",")
+            if comma < 0:
+                if len(self._head) < self._PREFIX_PROBE:
+                    return None
+                raise ValueError(f"malformed data URI in {self.path}")
+            header, body = self._head[5:comma], self._head[comma + 1:]
+            self.mime = header.split(";", 1)[0].lower() or None
+        elif len(self._head) < 5 and "data:".startswith(self._head):
+            return None
+        else:
+            body = self._head
+        self._head = ""
+        self._prefix_done = True
+        return body
+
+    def write(self, text: str) -> None:
+        if not self._prefix_done:
+            text = self._strip_prefix(text)
+            if text is None:
+                return
+        data = self._carry + text.translate(self._URLSAFE)
+        usable = len(data) - len(data) % 4
+        self._carry = data[usable:]
+        if usable:
+            raw = binascii.a2b_base64(data[:usable])
+            self._file.write(raw)
+            self.bytes_written += len(raw)
+
+    def close(self) -> None:
+        if not self._prefix_done:
+            self._prefix_done = True
+            self._carry += self._head.translate(self._URLSAFE)
+        tail = self._carry.rstrip("=")
+        if tail:
+            raw = binascii.a2b_base64(tail + "=" * (-len(tail) % 4))
+            self._file.write(raw)
+            self.bytes_written += len(raw)
+        super().close()
+
+
+class StreamingJsonParser:
+    """
+    按块读取的 JSON 解析器。on_string(path) 对每个字符串值调用一次：
+    返回 Sink 时字符串内容按块写入 sink，结果中以 StreamedValue 占位；返回 None 时正常物化。
+    path 是从根到该值的键/下标元组。
+    """
+
+    def __init__(self, chunks: Iterable[bytes], on_string: Callable[[Tuple], Optional[Sink]],
+                 encoding: str = "utf-8"):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._on_string = on_string
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+
+    # ---------- 缓冲 ----------
+    def _fill(self) -> bool:
+        while not self._eof:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._eof = True
+                text = self._decoder.decode(b"", final=True)
+            else:
+                if not chunk:
+                    continue
+                self.bytes_read += len(chunk)
+                text = self._decoder.decode(chunk)
+            if self._pos:
+                self._buf = self._buf[self._pos:]
+                self._pos = 0
+            if text:
+                self._buf += text
+                return True
+        return False
+
+    def _need(self, n: int) -> None:
+        while len(self._buf) - self._pos < n:
+            if not self._fill():
+                raise ValueError("unexpected end of JSON stream")
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError("unexpected end of JSON stream")
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"expected {char!r} at stream offset ~{self.bytes_read}")
+        self._pos += 1
+
+    # ---------- 值 ----------
+    def parse(self) -> Any:
+        value = self._value(())
+        while self._pos < len(self._buf) or self._fill():
+            if self._buf[self._pos:].strip(_WS):
+                raise ValueError("trailing data after JSON value")
+            self._pos = len(self._buf)
+        return value
+
+    def _value(self, path: Tuple) -> Any:
+        c = self._peek()
+        if c == "{":
+            return self._object(path)
+        if c == "[":
+            return self._array(path)
+        if c == '"':
+            return self._string(path)
+        return self._literal()
+
+    def _object(self, path: Tuple) -> Dict[str, Any]:
+        self._pos += 1
+        out: Dict[str, Any] = {}
+        if self._peek() == "}":
+            self._pos += 1
+            return out
+        while True:
+            if self._peek() != '"':
+                raise ValueError("expected object key")
+            key = self._read_string(None)
+            self._expect(":")
+            out[key] = self._value(path + (key,))
+            c = self._peek()
+            self._pos += 1
+            if c == "}":
+                return out
+            if c != ",":
+                raise ValueError(f"expected ',' or '}}' in object, got {c!r}")
+
+    def _array(self, path: Tuple) -> List[Any]:
+        self._pos += 1
+        out: List[Any] = []
+        if self._peek() == "]":
+            self._pos += 1
+            return out
+        while True:
+            out.append(self._value(path + (len(out),)))
+            c = self._peek()
+            self._pos += 1
+            if c == "]":
+                return out
+            if c != ",":
+                raise ValueError(f"expected ',' or ']' in array, got {c!r}")
+
+    def _literal(self) -> Any:
+        parts: List[str] = []
+        while True:
+            start = self._pos
+            while self._pos < len(self._buf) and self._buf[self._pos] not in _LITERAL_END:
+                self._pos += 1
+            parts.append(self._buf[start:self._pos])
+            if self._pos < len(self._buf) or not self._fill():
+                break
+        return json.loads("".join(parts))
+
+    def _string(self, path: Tuple) -> Any:
+        sink = self._on_string(path)
+        if sink is None:
+            return self._read_string(None)
+        try:
+            self._read_string(sink)
+        except BaseException:
+            sink.abort()
+            raise
+        sink.close()
+        return StreamedValue(sink)
+
+    def _read_string(self, sink: Optional[Sink]) -> Optional[str]:
+        self._pos += 1  # 开头的引号
+        parts: List[str] = []
+        pending = 0
+
+        def emit(text: str) -> None:
+            nonlocal pending
+            if not text:
+                return
+            parts.append(text)
+            pending += len(text)
+            if sink is not None and pending >= _FLUSH_CHARS:
+                sink.write("".join(parts))
+                parts.clear()
+                pending = 0
+
+        while True:
+            m = _STR_SPECIAL_RE.search(self._buf, self._pos)
+            if m is None:
+                emit(self._buf[self._pos:])
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise ValueError("unterminated JSON string")
+                continue
+            emit(self._buf[self._pos:m.start()])
+            self._pos = m.start()
+            if self._buf[self._pos] == '"':
+                self._pos += 1
+                break
+            emit(self._read_escape())
+
+        text = "".join(parts)
+        if sink is None:
+            return text
+        if text:
+            sink.write(text)
+        return None
+
+    def _read_escape(self) -> str:
+        self._need(2)
+        if self._buf[self._pos + 1] != "u":
+            esc = self._buf[self._pos:self._pos + 2]
+            self._pos += 2
+            return json.loads(f'"{esc}"')
+        self._need(6)
+        esc = self._buf[self._pos:self._pos + 6]
+        self._pos += 6
+        if 0xD800 <= int(esc[2:], 16) <= 0xDBFF:
+            # 代理对的后半部分
+            try:
+                self._need(6)
+            except ValueError:
+                pass
+            low = self._buf[self._pos:self._pos + 6]
+            if low.startswith("\\u"):
+                self._pos += 6
+                esc += low
+        return json.loads(f'"{esc}"')
+
+
+@dataclass
+class MineruResult:
+    name: str
+    md_path: Optional[str] = None
+    middle_json_path: Optional[str] = None
+    images: List[str] = field(default_factory=list)
+    image_bytes: int = 0
+
+    def read_markdown(self) -> str:
+        if not self.md_path:
+            return ""
+        with open(self.md_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+
+def stream_mineru_response(chunks: Iterable[bytes], out_dir: str) -> Dict[str, MineruResult]:
+    """
+    解析 MinerU 响应体（字节块迭代器，例如 response.iter_content(...)），把结果写入 out_dir:
+      <name>.md / <name>.jsonl / images/<img>
+    返回 {name: MineruResult}。
+    """
+    results: Dict[str, MineruResult] = {}
+    image_sinks: Dict[str, List[Base64FileSink]] = {}
+
+    def result_for(name: str) -> MineruResult:
+        return results.setdefault(name, MineruResult(name=name))
+
+    def on_string(path: Tuple) -> Optional[Sink]:
+        if len(path) < 3 or path[0] != "results":
+            return None
+        name, field_name = path[1], path[2]
+        result = result_for(name)
+        sink: Optional[Sink] = None
+        if len(path) == 3 and field_name == "md_content":
+            sink = TextFileSink(os.path.join(out_dir, f"{name}.md"))
+            result.md_path = sink.path
+        elif len(path) == 3 and field_name == "middle_json":
+            sink = TextFileSink(os.path.join(out_dir, f"{name}.jsonl"))
+            result.middle_json_path = sink.path
+        elif len(path) == 4 and field_name == "images":
+            img_name = os.path.basename(str(path[3]))
+            sink = Base64FileSink(os.path.join(out_dir, "images", img_name))
+            result.images.append(sink.path)
+            image_sinks.setdefault(name, []).append(sink)
+        return sink
+
+    parser = StreamingJsonParser(chunks, on_string)
+    try:
+        doc = parser.parse()
+    except BaseException:
+        # 已完成的图片保留，Markdown 不落盘以便下次重新解析
+        for result in results.values():
+            for path in (result.md_path, result.middle_json_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+        raise
+
+    # 中间结果不是字符串而是对象时（服务端版本差异）按原样序列化
+    for name, value in (doc.get("results") or {}).items():
+        middle = value.get("middle_json") if isinstance(value, dict) else None
+        if middle is not None and not isinstance(middle, (str, StreamedValue)):
+            result = result_for(name)
+            sink = TextFileSink(os.path.join(out_dir, f"{name}.jsonl"))
+            sink.write(json.dumps(middle, ensure_ascii=False))
+            sink.close()
+            result.middle_json_path = sink.path
+
+    for name, image_sink_list in image_sinks.items():
+        results[name].image_bytes = sum(sink.bytes_written for sink in image_sink_list)
+    logger.info("mineru response streamed: {} bytes read, {} results, {} images",
+                parser.bytes_read, len(results), sum(len(r.images) for r in results.values()))
+    return results
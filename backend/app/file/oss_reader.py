@@ -0,0 +1,127 @@
+"""
+OSS 读取：一次 GET 完成"判断存在 + 读取"，不再先 is_object_exist 再 get_object。
+
+- get / head 遇到 404（NoSuchKey）返回 None，不抛异常；
+- 已知不存在的 key 记入短 TTL 的负缓存，TTL 内再次读取直接返回 None，不发请求；
+- resolve_first(keys) 并发探测多个候选 key，按候选顺序返回第一个命中的。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence, Tuple, TypeVar
+
+import alibabacloud_oss_v2 as oss
+
+T = TypeVar("T")
+
+
+def is_not_found(error: BaseException) -> bool:
+    """alibabacloud_oss_v2 的 404（NoSuchKey / 无 body 的 HEAD 404）。"""
+    if isinstance(error, oss.exceptions.OperationError):
+        error = error.unwrap()
+    return isinstance(error, oss.exceptions.ServiceError) and (
+        error.status_code == 404 or error.code == "NoSuchKey"
+    )
+
+
+class OssReader:
+    def __init__(self, client, bucket: Optional[str],
+                 negative_ttl_s: float = 30.0,
+                 max_negative_entries: int = 4096,
+                 max_workers: int = 4):
+        self.client = client
+        self.bucket = bucket
+        self.negative_ttl_s = negative_ttl_s
+        self.max_negative_entries = max_negative_entries
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="oss-probe")
+
+    # ---------- 负缓存 ----------
+    def _known_missing(self, key: str) -> bool:
+        with self._lock:
+            expires = self._negative.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._negative[key]
+                return False
+            return True
+
+    def _mark_missing(self, key: str) -> None:
+        if self.negative_ttl_s <= 0:
+            return
+        with self._lock:
+            self._negative[key] = time.monotonic() + self.negative_ttl_s
+            self._negative.move_to_end(key)
+            while len(self._negative) > self.max_negative_entries:
+                self._negative.popitem(last=False)
+
+    def forget(self, *keys: str) -> None:
+        """对象刚写入后调用，清掉它的负缓存。"""
+        with self._lock:
+            for key in keys:
+                self._negative.pop(key, None)
+
+    # ---------- 单次请求 ----------
+    def _call(self, key: str, fn: Callable[[], T]) -> Optional[T]:
+        if self._known_missing(key):
+            return None
+        try:
+            return fn()
+        except Exception as e:
+            if is_not_found(e):
+                self._mark_missing(key)
+                return None
+            raise
+
+    def get(self, key: str):
+        """一次 GET；不存在返回 None。返回的 result.body 需要调用方读取并关闭。"""
+        return self._call(key, lambda: self.client.get_object(
+            oss.GetObjectRequest(bucket=self.bucket, key=key)))
+
+    def get_bytes(self, key: str) -> Optional[Tuple[bytes, Any]]:
+        """读取完整对象，返回 (data, result)；不存在返回 None。"""
+        result = self.get(key)
+        if result is None:
+            return None
+        with result.body as body_stream:
+            data = body_stream.read()
+        return data, result
+
+    def head(self, key: str):
+        """一次 HEAD；不存在返回 None。"""
+        return self._call(key, lambda: self.client.head_object(
+            oss.HeadObjectRequest(bucket=self.bucket, key=key)))
+
+    def exists(self, key: str) -> bool:
+        return self.head(key) is not None
+
+    def presign_if_exists(self, key: str) -> Optional[str]:
+        """HEAD 确认存在后本地签名（presign 本身不发网络请求）。"""
+        if self.head(key) is None:
+            return None
+        return self.client.presign(oss.GetObjectRequest(bucket=self.bucket, key=key)).url
+
+    # ---------- 多候选 ----------
+    def resolve_first(self, keys: Sequence[str],
+                      fetch: Optional[Callable[[str], Optional[T]]] = None) -> Optional[Tuple[str, T]]:
+        """
+        并发对每个候选 key 调用 fetch（默认 head），按 keys 的顺序返回第一个非 None 的 (key, value)。
+        排在前面的候选未返回前不会采用后面的结果，所以优先级与串行回退一致，总耗时不超过最慢的那次探测。
+        """
+        fetch = fetch or self.head
+        futures = [(key, self._pool.submit(fetch, key)) for key in keys]
+        try:
+            for key, future in futures:
+                value = future.result()
+                if value is not None:
+                    return key, value
+            return None
+        finally:
+            for _, future in futures:
+                future.cancel()
+
@@ -0,0 +1,354 @@
+"""
+arXiv PDF 下载：HTTP 直连为主，浏览器池兜底。
+
+- 共享的 requests.Session（连接池 + 对 429/5xx 的退避重试，遵守 Retry-After）；
+- 流式写入同目录下的临时文件，校验 %PDF 魔数后 os.replace 原子落盘，半截文件不会被当成已下载；
+- 按 host 限制并发数与请求速率（arXiv 礼貌抓取）；
+- HTTP 失败时才交给常驻的 Playwright 浏览器池（404 / 410 说明论文不存在，不再兜底）：浏览器只启动一次，几个 context 常驻复用；
+  Playwright 的同步 API 绑定线程，所以浏览器跑在独立线程上，任务经队列提交；
+- download_many(ids) 批量并发下载，返回逐个结果。
+"""
+from __future__ import annotations
+
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..llm.utils import RateLimiter
+
+ARXIV_PDF_URL = "https://arxiv.org/pdf/{pid}.pdf"
+ARXIV_ABS_URL = "https://arxiv.org/abs/{pid}"
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+PDF_MAGIC = b"%PDF"
+
+
+class PdfFetchError(RuntimeError):
+    pass
+
+
+class PdfNotFoundError(PdfFetchError):
+    """服务端明确答复不存在（404 / 410），浏览器也拿不到，不做兜底。"""
+
+
+@dataclass
+class FetchResult:
+    paper_id: str
+    path: Optional[str] = None
+    pid_dir: Optional[str] = None
+    source: str = ""  # cache / http / browser
+    size: int = 0
+    elapsed_s: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def normalize_paper_id(paper_id: str) -> str:
+    # 若传入包含空格或非法字符，这里做个简单清洗
+    return re.sub(r"[^0-9A-Za-z.\-v]", "", paper_id)
+
+
+class HostThrottle:
+    """每个 host 一个并发信号量 + 一个最小请求间隔。"""
+
+    def __init__(self, max_concurrency: int = 2, requests_per_minute: Optional[float] = 30):
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_minute = requests_per_minute
+        self._hosts: Dict[str, Tuple[threading.Semaphore, RateLimiter]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (threading.Semaphore(self.max_concurrency),
+                                     RateLimiter(self.requests_per_minute))
+            semaphore, limiter = self._hosts[host]
+        with semaphore:
+            limiter.throttle()
+            yield
+
+
+class BrowserPool:
+    """
+    常驻的无头 Chromium：一个专用线程持有 Playwright，预建 size 个 context 轮流使用。
+    submit(fn) 把 fn(context) 放到浏览器线程执行，返回 Future。
+    """
+
+    def __init__(self, size: int = 1, user_agent: str = USER_AGENT):
+        self.size = max(1, size)
+        self.user_agent = user_agent
+        self._jobs: "queue.Queue[Optional[Tuple[Callable, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="pdf-browser-pool", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            contexts = [browser.new_context(user_agent=self.user_agent, accept_downloads=True)
+                        for _ in range(self.size)]
+            logger.info("pdf browser pool started with {} contexts", len(contexts))
+            turn = 0
+            try:
+                while True:
+                    job = self._jobs.get()
+                    if job is None:
+                        break
+                    fn, future = job
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    context = contexts[turn % len(contexts)]
+                    turn += 1
+                    try:
+                        future.set_result(fn(context))
+                    except BaseException as e:  # noqa: BLE001 —— 交给调用方
+                        future.set_exception(e)
+                        # context 状态可能已坏（崩溃的页面、下载卡住），换一个新的
+                        try:
+                            context.close()
+                        except Exception:
+                            pass
+                        contexts[(turn - 1) % len(contexts)] = browser.new_context(
+                            user_agent=self.user_agent, accept_downloads=True)
+            finally:
+                for context in contexts:
+                    try:
+                        context.close()
+                    except Exception:
+                        pass
+                browser.close()
+
+    def submit(self, fn: Callable) -> Future:
+        self._ensure_started()
+        future: Future = Future()
+        self._jobs.put((fn, future))
+        return future
+
+    def close(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join(timeout=30)
+
+
+class PdfFetcher:
+    def __init__(self, max_per_host: int = 2, requests_per_minute: Optional[float] = 30,
+                 connect_timeout: float = 10, read_timeout: float = 120, retries: int = 3,
+                 browser_fallback: bool = True, browser_pool_size: int = 1,
+                 browser_timeout_s: float = 180, chunk_size: int = 256 * 1024):
+        self.throttle = HostThrottle(max_per_host, requests_per_minute)
+        self.timeout = (connect_timeout, read_timeout)
+        self.browser_timeout_s = browser_timeout_s
+        self.chunk_size = chunk_size
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/pdf,*/*"})
+        retry = Retry(
+            total=retries,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, max_per_host * 2), max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.browser_pool = BrowserPool(browser_pool_size) if browser_fallback else None
+        # 同一篇论文的并发下载只跑一次；save_path -> [锁, 使用者数]，无人使用时移除
+        self._inflight: Dict[str, list] = {}
+        self._inflight_lock = threading.Lock()
+
+    @staticmethod
+    def paths(paper_id: str, pdf_file_root: str) -> Tuple[str, str, str]:
+        """(pid, pid_dir, save_path)，与原 download_paper_by_id 的目录布局一致。"""
+        pid = normalize_paper_id(paper_id)
+        pid_dir = os.path.join(pdf_file_root, paper_id)
+        return pid, pid_dir, os.path.join(pid_dir, f"{pid}.pdf")
+
+    @contextmanager
+    def _paper_lock(self, save_path: str):
+        with self._inflight_lock:
+            entry = self._inflight.setdefault(save_path, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._inflight_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._inflight[save_path]
+
+    # ---------- HTTP ----------
+    def _fetch_http(self, url: str, save_path: str) -> int:
+        tmp = f"{save_path}.{threading.get_ident()}.part"
+        try:
+            with self.throttle.slot(url):
+                with self.session.get(url, stream=True, timeout=self.timeout, allow_redirects=True) as resp:
+                    if resp.status_code in (404, 410):
+                        raise PdfNotFoundError(f"GET {url} -> HTTP {resp.status_code}")
+                    if resp.status_code != 200:
+                        raise PdfFetchError(f"GET {url} -> HTTP {resp.status_code}")
+                    size = 0
+                    head = b""
+                    with open(tmp, "wb") as f:
+                        for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                            if not chunk:
+                                continue
+                            if len(head) < len(PDF_MAGIC):
+                                head += chunk[:len(PDF_MAGIC)]
+                            f.write(chunk)
+                            size += len(chunk)
+            if not head.startswith(PDF_MAGIC):
+                # 验证码页 / 错误页也会返回 200
+                raise PdfFetchError(f"GET {url} did not return a PDF")
+            os.replace(tmp, save_path)
+            return size
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # ---------- 浏览器兜底 ----------
+    def _fetch_browser(self, pid: str, save_path: str) -> int:
+        if self.browser_pool is None:
+            raise PdfFetchError("browser fallback disabled")
+        pdf_url = ARXIV_PDF_URL.format(pid=pid)
+        # 每次尝试独立的临时文件；超时后任务仍可能在浏览器线程上跑完，不能写到下一次尝试的文件里
+        tmp = f"{save_path}.{uuid.uuid4().hex[:8]}.browser.part"
+        cancelled = threading.Event()
+
+        def write(data: bytes) -> None:
+            if cancelled.is_set():
+                return
+            with open(tmp, "wb") as f:
+                f.write(data)
+
+        def job(context) -> None:
+            try:
+                # 方式1：用浏览器上下文的 request 客户端直接 GET（走浏览器栈）
+                resp = context.request.get(pdf_url, timeout=60_000)
+                if resp.ok and resp.body()[:len(PDF_MAGIC)] == PDF_MAGIC:
+                    write(resp.body())
+                    return
+                if cancelled.is_set():
+                    return
+                # 方式2（回退）：进入摘要页点击“PDF”按钮并捕获下载事件
+                page = context.new_page()
+                try:
+                    page.goto(ARXIV_ABS_URL.format(pid=pid), wait_until="domcontentloaded")
+                    with page.expect_download() as dl_info:
+                        page.locator('a[href*="/pdf/"]').first.click()
+                    if not cancelled.is_set():
+                        dl_info.value.save_as(tmp)
+                finally:
+                    page.close()
+            finally:
+                # 调用方已超时放弃：写出的文件没人接收，自己清掉
+                if cancelled.is_set() and os.path.exists(tmp):
+                    os.remove(tmp)
+
+        try:
+            with self.throttle.slot(pdf_url):
+                future = self.browser_pool.submit(job)
+                try:
+                    future.result(timeout=self.browser_timeout_s)
+                except BaseException:
+                    cancelled.set()
+                    future.cancel()
+                    raise
+            os.replace(tmp, save_path)
+            return os.path.getsize(save_path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # ---------- 对外接口 ----------
+    def fetch(self, paper_id: str, pdf_file_root: str) -> FetchResult:
+        start = time.perf_counter()
+        pid, pid_dir, save_path = self.paths(paper_id, pdf_file_root)
+        result = FetchResult(paper_id=paper_id, path=save_path, pid_dir=pid_dir)
+        os.makedirs(pid_dir, exist_ok=True)
+        with self._paper_lock(save_path):
+            if os.path.exists(save_path):
+                result.source, result.size = "cache", os.path.getsize(save_path)
+            else:
+                try:
+                    result.size = self._fetch_http(ARXIV_PDF_URL.format(pid=pid), save_path)
+                    result.source = "http"
+                except PdfNotFoundError as e:
+                    result.error = f"http: {e}"
+                except Exception as http_error:
+                    logger.warning("pdf http fetch failed for {}: {}; falling back to browser", paper_id, http_error)
+                    try:
+                        result.size = self._fetch_browser(pid, save_path)
+                        result.source = "browser"
+                    except Exception as e:
+                        result.error = f"http: {http_error}; browser: {type(e).__name__}: {e}"
+        result.elapsed_s = time.perf_counter() - start
+        return result
+
+    def download(self, paper_id: str, pdf_file_root: str) -> Tuple[str, str]:
+        """单篇下载，返回 (save_path, pid_dir)；失败抛 RuntimeError。"""
+        result = self.fetch(paper_id, pdf_file_root)
+        if not result.ok:
+            raise RuntimeError(f"PDF 下载失败 {paper_id}: {result.error}")
+        return result.path, result.pid_dir
+
+    def download_many(self, paper_ids: Iterable[str], pdf_file_root: str,
+                      max_workers: int = 8) -> List[FetchResult]:
+        """批量下载；并发受 per-host 限制约束，结果顺序与输入一致。"""
+        paper_ids = list(dict.fromkeys(paper_ids))
+        if not paper_ids:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paper_ids)), thread_name_prefix="pdf-fetch") as pool:
+            results = list(pool.map(lambda pid: self.fetch(pid, pdf_file_root), paper_ids))
+        ok = sum(r.ok for r in results)
+        logger.info("download_many: {}/{} ok ({} from cache)", ok, len(results),
+                    sum(r.source == "cache" for r in results))
+        return results
+
+
+_default_fetcher: Optional[PdfFetcher] = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher() -> PdfFetcher:
+    """进程内共享的下载器（连接池、限速状态、浏览器池都只建一份）。"""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            rpm = os.getenv("PDF_FETCH_REQUESTS_PER_MINUTE", "30")
+            _default_fetcher = PdfFetcher(
+                max_per_host=int(os.getenv("PDF_FETCH_MAX_PER_HOST", "2")),
+                requests_per_minute=float(rpm) if rpm else None,
+                browser_fallback=os.getenv("PDF_FETCH_BROWSER_FALLBACK", "1") not in ("0", "false", "False"),
+                browser_pool_size=int(os.getenv("PDF_FETCH_BROWSER_POOL_SIZE", "1")),
+            )
+        return _default_fetcher
@@ -0,0 +1,148 @@
+"""
+图片预签名 URL：本地签名 + 缓存 + Markdown 改写。
+
+- presign 只在本地计算签名，不发网络请求；也不再逐张先 is_object_exist；
+- 同一个 key 的 URL 缓存到过期前 refresh_margin_s，期间直接复用；
+- sign_markdown 一次性签名文档里的全部图片引用再替换；
+- StreamingImageRewriter 用于流式输出：引用被切在两个块之间时先暂存不完整的尾巴，凑齐后再替换。
+"""
+from __future__ import annotations
+
+import datetime
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Optional
+
+import alibabacloud_oss_v2 as oss
+from loguru import logger
+
+# ![alt](url "title") 与 <img ... src="url">
+MD_IMAGE_RE = re.compile(r'(!\[[^\]\n]*\]\(\s*)([^)\s]+)')
+HTML_IMAGE_RE = re.compile(r'(<img\b[^>]*?\bsrc=["\'])([^"\']+)', re.I)
+# 位于缓冲末尾、可能还没收完整的引用开头
+_MD_PARTIAL_RE = re.compile(r'!(?:\[[^\]\n]*(?:\](?:\([^)\n]*)?)?)?$')
+_HTML_PARTIAL_RE = re.compile(r'<(?:i(?:m(?:g(?:\b[^>]*)?)?)?)?$', re.I)
+
+
+def resolve_image_key(ref: str, folder: str) -> Optional[str]:
+    """Markdown 中的图片地址 -> 对象键；外链 / data URI 返回 None（不改写）。"""
+    if not ref or re.match(r"^(?:[a-z][a-z0-9+.\-]*:|//)", ref, re.I):
+        return None
+    ref = ref.lstrip("/")
+    if ref.startswith("./"):
+        ref = ref[2:]
+    # 内容寻址存储的对象键本身就是全局的
+    if ref.startswith("cas/") or ref.startswith(folder + "/"):
+        return ref
+    return f"{folder}/{ref}"
+
+
+class PresignedUrlCache:
+    def __init__(self, client, bucket: Optional[str], expires_s: int = 3600,
+                 refresh_margin_s: int = 300, max_entries: int = 20000):
+        self.client = client
+        self.bucket = bucket
+        self.expires_s = expires_s
+        self.refresh_margin_s = min(refresh_margin_s, expires_s // 2)
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "signed": 0, "errors": 0}
+
+    def url(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[1] - self.refresh_margin_s > now:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached[0]
+        try:
+            result = self.client.presign(
+                oss.GetObjectRequest(bucket=self.bucket, key=key),
+                expires=datetime.timedelta(seconds=self.expires_s),
+            )
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            logger.warning("presign {} failed: {}", key, e)
+            return None
+        expiration = getattr(result, "expiration", None)
+        expires_at = expiration.timestamp() if expiration is not None else now + self.expires_s
+        with self._lock:
+            self._cache[key] = (result.url, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self.stats["signed"] += 1
+        return result.url
+
+    def sign_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        signed = {}
+        for key in dict.fromkeys(keys):
+            url = self.url(key)
+            if url is not None:
+                signed[key] = url
+        return signed
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._cache)}
+
+
+def sign_markdown(text: str, folder: str, signer: PresignedUrlCache) -> str:
+    """先收集全部图片引用一次签好，再统一替换。"""
+    refs = [m.group(2) for m in MD_IMAGE_RE.finditer(text)] + [m.group(2) for m in HTML_IMAGE_RE.finditer(text)]
+    keys = {ref: resolve_image_key(ref, folder) for ref in dict.fromkeys(refs)}
+    signed = signer.sign_many(k for k in keys.values() if k)
+
+    def replace(match: re.Match) -> str:
+        url = signed.get(keys.get(match.group(2)) or "")
+        return match.group(1) + url if url else match.group(0)
+
+    return HTML_IMAGE_RE.sub(replace, MD_IMAGE_RE.sub(replace, text))
+
+
+class StreamingImageRewriter:
+    """
+    rewriter = StreamingImageRewriter(folder, signer)
+    for chunk in chunks: yield rewriter.feed(chunk)
+    yield rewriter.flush()
+    """
+
+    def __init__(self, folder: str, signer: PresignedUrlCache, max_pending: int = 4096):
+        self.folder = folder
+        self.signer = signer
+        self.max_pending = max_pending
+        self._pending = ""
+
+    def _split_point(self, buf: str) -> int:
+        starts = [m.start() for m in (_MD_PARTIAL_RE.search(buf), _HTML_PARTIAL_RE.search(buf)) if m]
+        if not starts:
+            return len(buf)
+        cut = min(starts)
+        # 不是真正的图片引用（比如正文里孤立的 "!["）时不要无限暂存
+        return cut if len(buf) - cut <= self.max_pending else len(buf)
+
+    def feed(self, chunk: str) -> str:
+        buf = self._pending + chunk
+        cut = self._split_point(buf)
+        self._pending = buf[cut:]
+        return sign_markdown(buf[:cut], self.folder, self.signer) if cut else ""
+
+    def flush(self) -> str:
+        buf, self._pending = self._pending, ""
+        return sign_markdown(buf, self.folder, self.signer) if buf else ""
+
+
+def sign_markdown_stream(chunks: Iterable[str], folder: str, signer: PresignedUrlCache) -> Iterator[str]:
+    rewriter = StreamingImageRewriter(folder, signer)
+    for chunk in chunks:
+        out = rewriter.feed(chunk)
+        if out:
+            yield out
+    rest = rewriter.flush()
+    if rest:
+        yield rest
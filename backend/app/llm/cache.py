@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# coding=utf-8
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Generator
+from typing import Any
+
+from .models import (
+    ChatMessage,
+    ChatMessageStreamDelta,
+    ChatMessageToolCallStreamDelta,
+    Model,
+    agglomerate_stream_deltas,
+)
+from .monitoring import TokenUsage
+from .tools import Tool
+
+
+__all__ = ["ResponseCacheStore", "CachedModel", "make_cache_key"]
+
+
+def make_cache_key(model: Model, completion_kwargs: dict[str, Any]) -> str:
+    """Hash the canonical JSON form of a request (model class, model id and completion kwargs)."""
+    payload = {
+        "model_class": type(model).__name__,
+        "model_id": model.model_id,
+        "completion_kwargs": completion_kwargs,
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCacheStore:
+    """SQLite-backed key/value store for model responses with LRU eviction.
+
+    Entries are evicted least-recently-used first whenever the store holds more than `max_entries`
+    entries or more than `max_bytes` bytes of payload. A single connection is shared by all threads
+    and guarded by a lock.
+
+    Args:
+        path (`str`): Path of the SQLite database file.
+        max_entries (`int`, default `50000`): Maximum number of cached responses.
+        max_bytes (`int`, default `512 MiB`): Maximum total size of the cached payloads.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50_000, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict):
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed_count, removed_bytes = 0, 0
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if count - removed_count <= self.max_entries and total - removed_bytes <= self.max_bytes:
+                break
+            doomed.append((key,))
+            removed_count += 1
+            removed_bytes += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedModel(Model):
+    """Exact-match response cache around any [`Model`].
+
+    The request is turned into completion kwargs by the wrapped model, canonicalized and hashed; a
+    byte-identical request returns the stored `ChatMessage` without calling the server. The stored
+    `TokenUsage` is replayed on the cached message so that cost accounting downstream is unchanged.
+
+    Only deterministic requests are cached, i.e. those sent with `temperature=0`, unless
+    `cache_nondeterministic=True`. Streams are recorded only when they are consumed to the end.
+
+    Parameters:
+        model (`Model`): The model to wrap.
+        store (`ResponseCacheStore`): Where responses are kept.
+        cache_nondeterministic (`bool`, default `False`): Also cache requests without `temperature=0`.
+
+    Example:
+        ```python
+        model = CachedModel(OpenAIServerModel(...), ResponseCacheStore("cache/llm.sqlite"))
+        model.generate(messages, temperature=0)  # server call
+        model.generate(messages, temperature=0)  # served from cache
+        ```
+    """
+
+    def __init__(self, model: Model, store: ResponseCacheStore, cache_nondeterministic: bool = False):
+        super().__init__(
+            flatten_messages_as_text=model.flatten_messages_as_text,
+            tool_name_key=model.tool_name_key,
+            tool_arguments_key=model.tool_arguments_key,
+            model_id=model.model_id,
+        )
+        self.model = model
+        self.store = store
+        self.cache_nondeterministic = cache_nondeterministic
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+    def __getattr__(self, name):
+        # Only called for attributes missing on the wrapper: expose the wrapped model's ones (client, rate_limiter...).
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _cache_key(
+        self,
+        messages: list[ChatMessage | dict],
+        stop_sequences: list[str] | None,
+        response_format: dict[str, str] | None,
+        tools_to_call_from: list[Tool] | None,
+        **kwargs,
+    ) -> str | None:
+        completion_kwargs = self.model._prepare_completion_kwargs(
+            messages=messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools_to_call_from=tools_to_call_from,
+            custom_role_conversions=getattr(self.model, "custom_role_conversions", None),
+            convert_images_to_image_urls=True,
+            **kwargs,
+        )
+        if not self.cache_nondeterministic and completion_kwargs.get("temperature") != 0:
+            return None
+        return make_cache_key(self.model, completion_kwargs)
+
+    def _lookup(self, key: str | None) -> ChatMessage | None:
+        if key is None:
+            return None
+        cached = self.store.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        token_usage = TokenUsage(**cached["token_usage"]) if cached.get("token_usage") else None
+        if token_usage is not None:
+            self.saved_tokens += token_usage.total_tokens
+        return ChatMessage.from_dict(cached["message"], token_usage=token_usage)
+
+    def _record(self, key: str | None, message: ChatMessage):
+        if key is None:
+            return
+        self.store.put(
+            key,
+            {
+                "message": message.dict() | {"raw": None, "token_usage": None},
+                "token_usage": {
+                    "input_tokens": message.token_usage.input_tokens,
+                    "output_tokens": message.token_usage.output_tokens,
+                }
+                if message.token_usage
+                else None,
+            },
+        )
+
+    def generate(
+        self,
+        messages: list[ChatMessage | dict],
+        stop_sequences: list[str] | None = None,
+        response_format: dict[str, str] | None = None,
+        tools_to_call_from: list[Tool] | None = None,
+        **kwargs,
+    ) -> ChatMessage:
+        key = self._cache_key(messages, stop_sequences, response_format, tools_to_call_from, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        message = self.model.generate(
+            messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools_to_call_from=tools_to_call_from,
+            **kwargs,
+        )
+        self._record(key, message)
+        return message
+
+    async def agenerate(
+        self,
+        messages: list[ChatMessage | dict],
+        stop_sequences: list[str] | None = None,
+        response_format: dict[str, str] | None = None,
+        tools_to_call_from: list[Tool] | None = None,
+        **kwargs,
+    ) -> ChatMessage:
+        key = self._cache_key(messages, stop_sequences, response_format, tools_to_call_from, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        message = await self.model.agenerate(
+            messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools_to_call_from=tools_to_call_from,
+            **kwargs,
+        )
+        self._record(key, message)
+        return message
+
+    def generate_stream(
+        self,
+        messages: list[ChatMessage | dict],
+        stop_sequences: list[str] | None = None,
+        response_format: dict[str, str] | None = None,
+        tools_to_call_from: list[Tool] | None = None,
+        **kwargs,
+    ) -> Generator[ChatMessageStreamDelta]:
+        key = self._cache_key(messages, stop_sequences, response_format, tools_to_call_from, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield ChatMessageStreamDelta(
+                content=cached.content,
+                tool_calls=[
+                    ChatMessageToolCallStreamDelta(index=i, id=tc.id, type=tc.type, function=tc.function)
+                    for i, tc in enumerate(cached.tool_calls)
+                ]
+                if cached.tool_calls
+                else None,
+            )
+            if cached.token_usage is not None:
+                yield ChatMessageStreamDelta(content="", token_usage=cached.token_usage)
+            return
+        deltas = []
+        for delta in self.model.generate_stream(
+            messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools_to_call_from=tools_to_call_from,
+            **kwargs,
+        ):
+            deltas.append(delta)
+            yield delta
+        self._record(key, agglomerate_stream_deltas(deltas))
+
+    def to_dict(self) -> dict:
+        return self.model.to_dict()
+
+    def cache_stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "saved_tokens": self.saved_tokens, **self.store.stats()}
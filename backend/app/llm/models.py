@@ -11,22 +11,31 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import json
 import logging
+import weakref
 import os
 import re
 import uuid
 import warnings
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from copy import deepcopy
 from dataclasses import asdict, dataclass
 from enum import Enum
 from threading import Thread
 from typing import TYPE_CHECKING, Any
 
-from .monitoring import TokenUsage
+from .monitoring import LLMCallTracker, TokenUsage
 from .tools import Tool
-from .utils import RateLimiter, _is_package_available, encode_image_base64, make_image_url, parse_json_blob
+from .utils import (
+    RateLimitReservation,
+    TokenBucketRateLimiter,
+    _is_package_available,
+    encode_image_base64,
+    make_image_url,
+    parse_json_blob,
+)
 
 
 if TYPE_CHECKING:
@@ -1069,30 +1078,74 @@ class ApiModel(Model):
             Pre-configured API client instance. If not provided, a default client will be created. Defaults to None.
         requests_per_minute (`float`, **optional**):
             Rate limit in requests per minute.
+        tokens_per_minute (`float`, **optional**):
+            Rate limit in tokens (prompt + completion) per minute.
+        rate_limit_burst (`float`, **optional**):
+            Number of requests that may start back to back. Defaults to 1 (evenly spaced requests).
+        rate_limit_state_file (`str`, **optional**):
+            Path of a file through which processes using the same model share the rate limits.
         **kwargs:
             Additional keyword arguments to forward to the underlying model completion call.
     """
 
+    # Completion budget assumed for a request that does not set `max_tokens`.
+    default_completion_tokens_estimate = 1024
+
     def __init__(
         self,
         model_id: str,
         custom_role_conversions: dict[str, str] | None = None,
         client: Any | None = None,
         requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        rate_limit_burst: float | None = None,
+        rate_limit_state_file: str | None = None,
         **kwargs,
     ):
         super().__init__(model_id=model_id, **kwargs)
         self.custom_role_conversions = custom_role_conversions or {}
         self.client = client or self.create_client()
-        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.rate_limiter = TokenBucketRateLimiter(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            request_burst=rate_limit_burst,
+            state_file=rate_limit_state_file,
+        )
 
     def create_client(self):
         """Create the API client for the specific service."""
         raise NotImplementedError("Subclasses must implement this method to create a client")
 
-    def _apply_rate_limit(self):
-        """Apply rate limiting before making API calls."""
-        self.rate_limiter.throttle()
+    def _estimate_request_tokens(self, completion_kwargs: dict | None) -> int:
+        """Rough upper estimate of the tokens a request will use: ~4 characters per prompt token plus the completion budget."""
+        if not completion_kwargs:
+            return 0
+        prompt = completion_kwargs.get("messages") or completion_kwargs.get("system", "")
+        prompt_chars = len(json.dumps(prompt, ensure_ascii=False, default=str))
+        completion = (
+            completion_kwargs.get("max_tokens")
+            or completion_kwargs.get("max_completion_tokens")
+            or (completion_kwargs.get("inferenceConfig") or {}).get("maxTokens")
+            or self.default_completion_tokens_estimate
+        )
+        return prompt_chars // 4 + int(completion)
+
+    def _apply_rate_limit(self, completion_kwargs: dict | None = None) -> RateLimitReservation:
+        """Apply rate limiting before making API calls, reserving the estimated tokens of the request."""
+        return self.rate_limiter.acquire(self._estimate_request_tokens(completion_kwargs))
+
+    async def _apply_rate_limit_async(self, completion_kwargs: dict | None = None) -> RateLimitReservation:
+        """Apply rate limiting before making API calls without blocking the event loop."""
+        return await self.rate_limiter.aacquire(self._estimate_request_tokens(completion_kwargs))
+
+    def _track_call(self) -> LLMCallTracker:
+        """Time one API call (queue wait, time to first token, latency, tokens/s) into `monitoring.llm_metrics`."""
+        return LLMCallTracker(self.model_id)
+
+    def _reconcile_rate_limit(self, reservation: RateLimitReservation, token_usage: TokenUsage | None):
+        """Replace the estimate held by `reservation` with the tokens actually used."""
+        if token_usage is not None:
+            self.rate_limiter.reconcile(reservation, token_usage.total_tokens)
 
 
 class LiteLLMModel(ApiModel):
@@ -1176,22 +1229,27 @@ class LiteLLMModel(ApiModel):
             custom_role_conversions=self.custom_role_conversions,
             **kwargs,
         )
-        self._apply_rate_limit()
-        response = self.client.completion(**completion_kwargs)
-        if not response.choices:
-            raise RuntimeError(
-                f"Unexpected API response: model '{self.model_id}' returned no choices. "
-                " This may indicate a possible API or upstream issue. "
-                f"Response details: {response.model_dump()}"
+        with self._track_call() as call:
+            reservation = self._apply_rate_limit(completion_kwargs)
+            call.sent()
+            response = self.client.completion(**completion_kwargs)
+            if not response.choices:
+                raise RuntimeError(
+                    f"Unexpected API response: model '{self.model_id}' returned no choices. "
+                    " This may indicate a possible API or upstream issue. "
+                    f"Response details: {response.model_dump()}"
+                )
+            message = ChatMessage.from_dict(
+                response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
+                raw=response,
+                token_usage=TokenUsage(
+                    input_tokens=response.usage.prompt_tokens,
+                    output_tokens=response.usage.completion_tokens,
+                ),
             )
-        return ChatMessage.from_dict(
-            response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
-            raw=response,
-            token_usage=TokenUsage(
-                input_tokens=response.usage.prompt_tokens,
-                output_tokens=response.usage.completion_tokens,
-            ),
-        )
+            self._reconcile_rate_limit(reservation, message.token_usage)
+            call.usage(message.token_usage)
+            return message
 
     def generate_stream(
         self,
@@ -1213,36 +1271,40 @@ class LiteLLMModel(ApiModel):
             convert_images_to_image_urls=True,
             **kwargs,
         )
-        self._apply_rate_limit()
-        for event in self.client.completion(**completion_kwargs, stream=True, stream_options={"include_usage": True}):
-            if getattr(event, "usage", None):
-                yield ChatMessageStreamDelta(
-                    content="",
-                    token_usage=TokenUsage(
+        with self._track_call() as call:
+            reservation = self._apply_rate_limit(completion_kwargs)
+            call.sent()
+            for event in self.client.completion(**completion_kwargs, stream=True, stream_options={"include_usage": True}):
+                if getattr(event, "usage", None):
+                    token_usage = TokenUsage(
                         input_tokens=event.usage.prompt_tokens,
                         output_tokens=event.usage.completion_tokens,
-                    ),
-                )
-            if event.choices:
-                choice = event.choices[0]
-                if choice.delta:
-                    yield ChatMessageStreamDelta(
-                        content=choice.delta.content,
-                        tool_calls=[
-                            ChatMessageToolCallStreamDelta(
-                                index=delta.index,
-                                id=delta.id,
-                                type=delta.type,
-                                function=delta.function,
-                            )
-                            for delta in choice.delta.tool_calls
-                        ]
-                        if choice.delta.tool_calls
-                        else None,
                     )
-                else:
-                    if not getattr(choice, "finish_reason", None):
-                        raise ValueError(f"No content or tool calls in event: {event}")
+                    self._reconcile_rate_limit(reservation, token_usage)
+                    call.usage(token_usage)
+                    yield ChatMessageStreamDelta(content="", token_usage=token_usage)
+                if event.choices:
+                    choice = event.choices[0]
+                    if choice.delta:
+                        if choice.delta.content:
+                            call.first_token()
+                        yield ChatMessageStreamDelta(
+                            content=choice.delta.content,
+                            tool_calls=[
+                                ChatMessageToolCallStreamDelta(
+                                    index=delta.index,
+                                    id=delta.id,
+                                    type=delta.type,
+                                    function=delta.function,
+                                )
+                                for delta in choice.delta.tool_calls
+                            ]
+                            if choice.delta.tool_calls
+                            else None,
+                        )
+                    else:
+                        if not getattr(choice, "finish_reason", None):
+                            raise ValueError(f"No content or tool calls in event: {event}")
 
 
 class LiteLLMRouterModel(LiteLLMModel):
@@ -1457,16 +1519,21 @@ class InferenceClientModel(ApiModel):
             custom_role_conversions=self.custom_role_conversions,
             **kwargs,
         )
-        self._apply_rate_limit()
-        response = self.client.chat_completion(**completion_kwargs)
-        return ChatMessage.from_dict(
-            asdict(response.choices[0].message),
-            raw=response,
-            token_usage=TokenUsage(
-                input_tokens=response.usage.prompt_tokens,
-                output_tokens=response.usage.completion_tokens,
-            ),
-        )
+        with self._track_call() as call:
+            reservation = self._apply_rate_limit(completion_kwargs)
+            call.sent()
+            response = self.client.chat_completion(**completion_kwargs)
+            message = ChatMessage.from_dict(
+                asdict(response.choices[0].message),
+                raw=response,
+                token_usage=TokenUsage(
+                    input_tokens=response.usage.prompt_tokens,
+                    output_tokens=response.usage.completion_tokens,
+                ),
+            )
+            self._reconcile_rate_limit(reservation, message.token_usage)
+            call.usage(message.token_usage)
+            return message
 
     def generate_stream(
         self,
@@ -1486,38 +1553,42 @@ class InferenceClientModel(ApiModel):
             convert_images_to_image_urls=True,
             **kwargs,
         )
-        self._apply_rate_limit()
-        for event in self.client.chat.completions.create(
-            **completion_kwargs, stream=True, stream_options={"include_usage": True}
-        ):
-            if getattr(event, "usage", None):
-                yield ChatMessageStreamDelta(
-                    content="",
-                    token_usage=TokenUsage(
+        with self._track_call() as call:
+            reservation = self._apply_rate_limit(completion_kwargs)
+            call.sent()
+            for event in self.client.chat.completions.create(
+                **completion_kwargs, stream=True, stream_options={"include_usage": True}
+            ):
+                if getattr(event, "usage", None):
+                    token_usage = TokenUsage(
                         input_tokens=event.usage.prompt_tokens,
                         output_tokens=event.usage.completion_tokens,
-                    ),
-                )
-            if event.choices:
-                choice = event.choices[0]
-                if choice.delta:
-                    yield ChatMessageStreamDelta(
-                        content=choice.delta.content,
-                        tool_calls=[
-                            ChatMessageToolCallStreamDelta(
-                                index=delta.index,
-                                id=delta.id,
-                                type=delta.type,
-                                function=delta.function,
-                            )
-                            for delta in choice.delta.tool_calls
-                        ]
-                        if choice.delta.tool_calls
-                        else None,
                     )
-                else:
-                    if not getattr(choice, "finish_reason", None):
-                        raise ValueError(f"No content or tool calls in event: {event}")
+                    self._reconcile_rate_limit(reservation, token_usage)
+                    call.usage(token_usage)
+                    yield ChatMessageStreamDelta(content="", token_usage=token_usage)
+                if event.choices:
+                    choice = event.choices[0]
+                    if choice.delta:
+                        if choice.delta.content:
+                            call.first_token()
+                        yield ChatMessageStreamDelta(
+                            content=choice.delta.content,
+                            tool_calls=[
+                                ChatMessageToolCallStreamDelta(
+                                    index=delta.index,
+                                    id=delta.id,
+                                    type=delta.type,
+                                    function=delta.function,
+                                )
+                                for delta in choice.delta.tool_calls
+                            ]
+                            if choice.delta.tool_calls
+                            else None,
+                        )
+                    else:
+                        if not getattr(choice, "finish_reason", None):
+                            raise ValueError(f"No content or tool calls in event: {event}")
 
 
 class OpenAIServerModel(ApiModel):
@@ -1599,38 +1670,42 @@ class OpenAIServerModel(ApiModel):
             convert_images_to_image_urls=True,
             **kwargs,
         )
-        self._apply_rate_limit()
-        for event in self.client.chat.completions.create(
-            **completion_kwargs, stream=True, stream_options={"include_usage": True}
-        ):
-            if event.usage:
-                yield ChatMessageStreamDelta(
-                    content="",
-                    token_usage=TokenUsage(
+        with self._track_call() as call:
+            reservation = self._apply_rate_limit(completion_kwargs)
+            call.sent()
+            for event in self.client.chat.completions.create(
+                **completion_kwargs, stream=True, stream_options={"include_usage": True}
+            ):
+                if event.usage:
+                    token_usage = TokenUsage(
                         input_tokens=event.usage.prompt_tokens,
                         output_tokens=event.usage.completion_tokens,
-                    ),
-                )
-            if event.choices:
-                choice = event.choices[0]
-                if choice.delta:
-                    yield ChatMessageStreamDelta(
-                        content=choice.delta.content,
-                        tool_calls=[
-                            ChatMessageToolCallStreamDelta(
-                                index=delta.index,
-                                id=delta.id,
-                                type=delta.type,
-                                function=delta.function,
-                            )
-                            for delta in choice.delta.tool_calls
-                        ]
-                        if choice.delta.tool_calls
-                        else None,
                     )
-                else:
-                    if not getattr(choice, "finish_reason", None):
-                        raise ValueError(f"No content or tool calls in event: {event}")
+                    self._reconcile_rate_limit(reservation, token_usage)
+                    call.usage(token_usage)
+                    yield ChatMessageStreamDelta(content="", token_usage=token_usage)
+                if event.choices:
+                    choice = event.choices[0]
+                    if choice.delta:
+                        if choice.delta.content:
+                            call.first_token()
+                        yield ChatMessageStreamDelta(
+                            content=choice.delta.content,
+                            tool_calls=[
+                                ChatMessageToolCallStreamDelta(
+                                    index=delta.index,
+                                    id=delta.id,
+                                    type=delta.type,
+                                    function=delta.function,
+                                )
+                                for delta in choice.delta.tool_calls
+                            ]
+                            if choice.delta.tool_calls
+                            else None,
+                        )
+                    else:
+                        if not getattr(choice, "finish_reason", None):
+                            raise ValueError(f"No content or tool calls in event: {event}")
 
     def generate(
         self,
@@ -1650,21 +1725,276 @@ class OpenAIServerModel(ApiModel):
             convert_images_to_image_urls=True,
             **kwargs,
         )
-        self._apply_rate_limit()
-        response = self.client.chat.completions.create(**completion_kwargs)
-        return ChatMessage.from_dict(
-            response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
-            raw=response,
-            token_usage=TokenUsage(
-                input_tokens=response.usage.prompt_tokens,
-                output_tokens=response.usage.completion_tokens,
-            ),
-        )
+        with self._track_call() as call:
+            reservation = self._apply_rate_limit(completion_kwargs)
+            call.sent()
+            response = self.client.chat.completions.create(**completion_kwargs)
+            message = ChatMessage.from_dict(
+                response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
+                raw=response,
+                token_usage=TokenUsage(
+                    input_tokens=response.usage.prompt_tokens,
+                    output_tokens=response.usage.completion_tokens,
+                ),
+            )
+            self._reconcile_rate_limit(reservation, message.token_usage)
+            call.usage(message.token_usage)
+            return message
 
 
 OpenAIModel = OpenAIServerModel
 
 
+
+class AsyncOpenAIServerModel(ApiModel):
+    """Asyncio-native model for OpenAI-compatible API servers, built on `openai.AsyncOpenAI`.
+
+    It exposes `agenerate` and `agenerate_stream`, the awaitable counterparts of
+    [`OpenAIServerModel.generate`] and [`OpenAIServerModel.generate_stream`], returning the same
+    `ChatMessage` / `ChatMessageStreamDelta` objects. In-flight requests are capped by a semaphore
+    and request starts go through the shared [`TokenBucketRateLimiter`], so a single process can drive many
+    concurrent generations without one thread per request.
+
+    Parameters:
+        model_id (`str`):
+            The model identifier to use on the server (e.g. "gpt-3.5-turbo").
+        api_base (`str`, *optional*):
+            The base URL of the OpenAI-compatible API server.
+        api_key (`str`, *optional*):
+            The API key to use for authentication.
+        organization (`str`, *optional*):
+            The organization to use for the API request.
+        project (`str`, *optional*):
+            The project to use for the API request.
+        client_kwargs (`dict[str, Any]`, *optional*):
+            Additional keyword arguments to pass to the AsyncOpenAI client (like max_retries, timeout etc.).
+        custom_role_conversions (`dict[str, str]`, *optional*):
+            Custom role conversion mapping to convert message roles in others.
+        flatten_messages_as_text (`bool`, default `False`):
+            Whether to flatten messages as text.
+        max_concurrent_requests (`int`, default `64`):
+            Maximum number of requests in flight at once, per event loop.
+        requests_per_minute (`float`, *optional*):
+            Rate limit in requests per minute.
+        **kwargs:
+            Additional keyword arguments to forward to the underlying OpenAI API completion call, for instance `temperature`.
+
+    Example:
+        ```python
+        model = AsyncOpenAIServerModel(model_id="Qwen3-30B-A3B-Instruct-2507", api_base=..., api_key="empty")
+        messages = [[{"role": "user", "content": text}] for text in texts]
+        results = await asyncio.gather(*(model.agenerate(m) for m in messages))
+        ```
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        api_base: str | None = None,
+        api_key: str | None = None,
+        organization: str | None = None,
+        project: str | None = None,
+        client_kwargs: dict[str, Any] | None = None,
+        custom_role_conversions: dict[str, str] | None = None,
+        flatten_messages_as_text: bool = False,
+        max_concurrent_requests: int = 64,
+        requests_per_minute: float | None = None,
+        client: Any | None = None,
+        **kwargs,
+    ):
+        self.client_kwargs = {
+            **(client_kwargs or {}),
+            "api_key": api_key,
+            "base_url": api_base,
+            "organization": organization,
+            "project": project,
+        }
+        self.max_concurrent_requests = max_concurrent_requests
+        # The httpx pool behind AsyncOpenAI and asyncio.Semaphore are bound to the loop that first
+        # uses them, so each running loop gets its own client and semaphore.
+        self._shared_client = client is not None
+        self._loop_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._loop_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        super().__init__(
+            model_id=model_id,
+            custom_role_conversions=custom_role_conversions,
+            client=client,
+            requests_per_minute=requests_per_minute,
+            flatten_messages_as_text=flatten_messages_as_text,
+            **kwargs,
+        )
+
+    def create_client(self):
+        try:
+            import openai
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError(
+                "Please install 'openai' extra to use AsyncOpenAIServerModel: `pip install 'smolagents[openai]'`"
+            ) from e
+
+        return openai.AsyncOpenAI(**self.client_kwargs)
+
+    def _get_loop_client(self):
+        if self._shared_client:
+            return self.client
+        loop = asyncio.get_running_loop()
+        client = self._loop_clients.get(loop)
+        if client is None:
+            client = self._loop_clients[loop] = self.create_client()
+        return client
+
+    def _get_loop_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._loop_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._loop_semaphores[loop] = asyncio.Semaphore(self.max_concurrent_requests)
+        return semaphore
+
+    async def _agenerate_on_private_loop(self, *args, **kwargs) -> ChatMessage:
+        try:
+            return await self.agenerate(*args, **kwargs)
+        finally:
+            # The loop is closed right after this call: release its client and connection pool now.
+            client = None if self._shared_client else self._loop_clients.pop(asyncio.get_running_loop(), None)
+            if client is not None:
+                await client.close()
+
+    def generate(
+        self,
+        messages: list[ChatMessage | dict],
+        stop_sequences: list[str] | None = None,
+        response_format: dict[str, str] | None = None,
+        tools_to_call_from: list[Tool] | None = None,
+        **kwargs,
+    ) -> ChatMessage:
+        """Blocking counterpart of `agenerate` for callers of the synchronous `Model` interface.
+
+        Runs `agenerate` on a private event loop; when called from a thread that is already running a loop,
+        the private loop runs on a helper thread so the caller's loop is not re-entered.
+        """
+        coroutine = self._agenerate_on_private_loop(
+            messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools_to_call_from=tools_to_call_from,
+            **kwargs,
+        )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        outcome: dict[str, Any] = {}
+
+        def run() -> None:
+            try:
+                outcome["result"] = asyncio.run(coroutine)
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = Thread(target=run, name="async-openai-generate", daemon=True)
+        thread.start()
+        thread.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    async def agenerate(
+        self,
+        messages: list[ChatMessage | dict],
+        stop_sequences: list[str] | None = None,
+        response_format: dict[str, str] | None = None,
+        tools_to_call_from: list[Tool] | None = None,
+        **kwargs,
+    ) -> ChatMessage:
+        completion_kwargs = self._prepare_completion_kwargs(
+            messages=messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools_to_call_from=tools_to_call_from,
+            model=self.model_id,
+            custom_role_conversions=self.custom_role_conversions,
+            convert_images_to_image_urls=True,
+            **kwargs,
+        )
+        with self._track_call() as call:
+            async with self._get_loop_semaphore():
+                reservation = await self._apply_rate_limit_async(completion_kwargs)
+                call.sent()
+                response = await self._get_loop_client().chat.completions.create(**completion_kwargs)
+            message = ChatMessage.from_dict(
+                response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
+                raw=response,
+                token_usage=TokenUsage(
+                    input_tokens=response.usage.prompt_tokens,
+                    output_tokens=response.usage.completion_tokens,
+                ),
+            )
+            self._reconcile_rate_limit(reservation, message.token_usage)
+            call.usage(message.token_usage)
+            return message
+
+    async def agenerate_stream(
+        self,
+        messages: list[ChatMessage | dict],
+        stop_sequences: list[str] | None = None,
+        response_format: dict[str, str] | None = None,
+        tools_to_call_from: list[Tool] | None = None,
+        **kwargs,
+    ) -> AsyncGenerator[ChatMessageStreamDelta, None]:
+        completion_kwargs = self._prepare_completion_kwargs(
+            messages=messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools_to_call_from=tools_to_call_from,
+            model=self.model_id,
+            custom_role_conversions=self.custom_role_conversions,
+            convert_images_to_image_urls=True,
+            **kwargs,
+        )
+        # The slot is held until the stream is fully consumed (or the generator is closed).
+        with self._track_call() as call:
+            async with self._get_loop_semaphore():
+                reservation = await self._apply_rate_limit_async(completion_kwargs)
+                call.sent()
+                stream = await self._get_loop_client().chat.completions.create(
+                    **completion_kwargs, stream=True, stream_options={"include_usage": True}
+                )
+                async for event in stream:
+                    if event.usage:
+                        token_usage = TokenUsage(
+                            input_tokens=event.usage.prompt_tokens,
+                            output_tokens=event.usage.completion_tokens,
+                        )
+                        self._reconcile_rate_limit(reservation, token_usage)
+                        call.usage(token_usage)
+                        yield ChatMessageStreamDelta(content="", token_usage=token_usage)
+                    if event.choices:
+                        choice = event.choices[0]
+                        if choice.delta:
+                            if choice.delta.content:
+                                call.first_token()
+                            yield ChatMessageStreamDelta(
+                                content=choice.delta.content,
+                                tool_calls=[
+                                    ChatMessageToolCallStreamDelta(
+                                        index=delta.index,
+                                        id=delta.id,
+                                        type=delta.type,
+                                        function=delta.function,
+                                    )
+                                    for delta in choice.delta.tool_calls
+                                ]
+                                if choice.delta.tool_calls
+                                else None,
+                            )
+                        else:
+                            if not getattr(choice, "finish_reason", None):
+                                raise ValueError(f"No content or tool calls in event: {event}")
+
+
+AsyncOpenAIModel = AsyncOpenAIServerModel
+
+
 class AzureOpenAIServerModel(OpenAIServerModel):
     """This model connects to an Azure OpenAI deployment.
 
@@ -1903,26 +2233,31 @@ class AmazonBedrockServerModel(ApiModel):
             convert_images_to_image_urls=True,
             **kwargs,
         )
-        self._apply_rate_limit()
-        # self.client is created in ApiModel class
-        response = self.client.converse(**completion_kwargs)
-
-        # Get content blocks with "text" key: in case thinking blocks are present, discard them
-        message_content_blocks_with_text = [
-            block for block in response["output"]["message"]["content"] if "text" in block
-        ]
-        if not message_content_blocks_with_text:
-            raise KeyError("No message content blocks with 'text' key found in response")
-        # Keep the last one
-        response["output"]["message"]["content"] = message_content_blocks_with_text[-1]["text"]
-        return ChatMessage.from_dict(
-            response["output"]["message"],
-            raw=response,
-            token_usage=TokenUsage(
-                input_tokens=response["usage"]["inputTokens"],
-                output_tokens=response["usage"]["outputTokens"],
-            ),
-        )
+        with self._track_call() as call:
+            reservation = self._apply_rate_limit(completion_kwargs)
+            call.sent()
+            # self.client is created in ApiModel class
+            response = self.client.converse(**completion_kwargs)
+
+            # Get content blocks with "text" key: in case thinking blocks are present, discard them
+            message_content_blocks_with_text = [
+                block for block in response["output"]["message"]["content"] if "text" in block
+            ]
+            if not message_content_blocks_with_text:
+                raise KeyError("No message content blocks with 'text' key found in response")
+            # Keep the last one
+            response["output"]["message"]["content"] = message_content_blocks_with_text[-1]["text"]
+            message = ChatMessage.from_dict(
+                response["output"]["message"],
+                raw=response,
+                token_usage=TokenUsage(
+                    input_tokens=response["usage"]["inputTokens"],
+                    output_tokens=response["usage"]["outputTokens"],
+                ),
+            )
+            self._reconcile_rate_limit(reservation, message.token_usage)
+            call.usage(message.token_usage)
+            return message
 
 
 AmazonBedrockModel = AmazonBedrockServerModel
@@ -1941,6 +2276,8 @@ __all__ = [
     "LiteLLMRouterModel",
     "OpenAIServerModel",
     "OpenAIModel",
+    "AsyncOpenAIServerModel",
+    "AsyncOpenAIModel",
     "VLLMModel",
     "AzureOpenAIServerModel",
     "AzureOpenAIModel",
@@ -14,7 +14,12 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import bisect
 import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from enum import IntEnum
 
@@ -30,7 +35,19 @@ from rich.tree import Tree
 from .utils import escape_code_brackets
 
 
-__all__ = ["AgentLogger", "LogLevel", "Monitor", "TokenUsage", "Timing"]
+__all__ = [
+    "AgentLogger",
+    "LogLevel",
+    "Monitor",
+    "TokenUsage",
+    "Timing",
+    "Histogram",
+    "LLMCallMetrics",
+    "LLMCallTracker",
+    "llm_metrics",
+    "llm_call_site",
+    "current_call_site",
+]
 
 
 @dataclass
@@ -117,6 +134,211 @@ class Monitor:
         self.logger.log(Text(console_outputs, style="dim"), level=1)
 
 
+_call_site: ContextVar[str] = ContextVar("llm_call_site", default="default")
+
+
+@contextmanager
+def llm_call_site(name: str):
+    """Label every model call made inside the block (and in tasks spawned from it) with `name`.
+
+    Example:
+        ```python
+        with llm_call_site("translate"):
+            model.generate(messages)
+        ```
+    """
+    token = _call_site.set(name)
+    try:
+        yield
+    finally:
+        _call_site.reset(token)
+
+
+def current_call_site() -> str:
+    return _call_site.get()
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+THROUGHPUT_BUCKETS = (1, 5, 10, 20, 40, 60, 80, 100, 150, 200, 400)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, with approximate quantiles.
+
+    Not thread-safe on its own: [`LLMCallMetrics`] serializes access.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the `q` quantile (the largest bound for the +Inf bucket)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return self.buckets[min(i, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+    def dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+        }
+
+
+class LLMCallMetrics:
+    """Process-wide registry of per-call model metrics, labelled by model id and call site.
+
+    Histograms: `queue_wait_seconds` (rate limiter / concurrency cap), `time_to_first_token_seconds`
+    (streams only), `latency_seconds`, `output_tokens_per_second`, `input_tokens`, `output_tokens`.
+    Counters: `requests_total` and `errors_total` (additionally labelled by exception class).
+    """
+
+    HISTOGRAMS = {
+        "queue_wait_seconds": LATENCY_BUCKETS,
+        "time_to_first_token_seconds": LATENCY_BUCKETS,
+        "latency_seconds": LATENCY_BUCKETS,
+        "output_tokens_per_second": THROUGHPUT_BUCKETS,
+        "input_tokens": TOKEN_BUCKETS,
+        "output_tokens": TOKEN_BUCKETS,
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str, str], Histogram] = {}
+        self._counters: dict[tuple[str, str, str, str], int] = {}
+
+    def observe(self, name: str, value: float, model: str, call_site: str):
+        with self._lock:
+            key = (name, model, call_site)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.HISTOGRAMS[name])
+            histogram.observe(value)
+
+    def inc(self, name: str, model: str, call_site: str, error: str = "", value: int = 1):
+        with self._lock:
+            key = (name, model, call_site, error)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        """Nested `{model: {call_site: {...}}}` view, for the JSON metrics endpoint."""
+        out: dict = {}
+        with self._lock:
+            for (name, model, site), histogram in self._histograms.items():
+                out.setdefault(model, {}).setdefault(site, {})[name] = histogram.dict()
+            for (name, model, site, error), value in self._counters.items():
+                entry = out.setdefault(model, {}).setdefault(site, {})
+                if error:
+                    entry.setdefault(name, {})[error] = value
+                else:
+                    entry[name] = value
+        return out
+
+    def to_prometheus(self, prefix: str = "llm_") -> str:
+        """Render the registry in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted({key[0] for key in self._counters}):
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for (n, model, site, error), value in sorted(self._counters.items()):
+                    if n != name:
+                        continue
+                    labels = f'model="{model}",call_site="{site}"' + (f',error="{error}"' if error else "")
+                    lines.append(f"{prefix}{name}{{{labels}}} {value}")
+            for name in sorted({key[0] for key in self._histograms}):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for (n, model, site), histogram in sorted(self._histograms.items()):
+                    if n != name:
+                        continue
+                    labels = f'model="{model}",call_site="{site}"'
+                    cumulative = 0
+                    for bound, count in zip([*map(str, histogram.buckets), "+Inf"], histogram.counts):
+                        cumulative += count
+                        lines.append(f'{prefix}{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f"{prefix}{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{prefix}{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+llm_metrics = LLMCallMetrics()
+
+
+class LLMCallTracker:
+    """Times one model call and reports it to an [`LLMCallMetrics`] registry when used as a context manager.
+
+    Call `sent()` once the request leaves the rate limiter, `first_token()` on each streamed content
+    chunk (only the first one counts) and `usage()` with the final `TokenUsage`. An exception leaving
+    the block is counted in `errors_total` under its class name.
+    """
+
+    def __init__(self, model_id: str | None, call_site: str | None = None, metrics: LLMCallMetrics | None = None):
+        self.model_id = model_id or "unknown"
+        self.call_site = call_site or current_call_site()
+        self.metrics = metrics or llm_metrics
+        self.start_time = time.perf_counter()
+        self.sent_time: float | None = None
+        self.first_token_time: float | None = None
+        self.token_usage: TokenUsage | None = None
+
+    def sent(self):
+        self.sent_time = time.perf_counter()
+
+    def first_token(self):
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+
+    def usage(self, token_usage: TokenUsage | None):
+        if token_usage is not None:
+            self.token_usage = token_usage
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        model, site, metrics = self.model_id, self.call_site, self.metrics
+        sent = self.sent_time or self.start_time
+        metrics.inc("requests_total", model, site)
+        metrics.observe("queue_wait_seconds", sent - self.start_time, model, site)
+        if exc_type is not None:
+            error = "Cancelled" if exc_type is GeneratorExit else exc_type.__name__
+            metrics.inc("errors_total", model, site, error=error)
+            return False
+        metrics.observe("latency_seconds", end - sent, model, site)
+        if self.first_token_time is not None:
+            metrics.observe("time_to_first_token_seconds", self.first_token_time - sent, model, site)
+        if self.token_usage is not None:
+            metrics.observe("input_tokens", self.token_usage.input_tokens, model, site)
+            metrics.observe("output_tokens", self.token_usage.output_tokens, model, site)
+            generation_time = end - (self.first_token_time or sent)
+            if generation_time > 0 and self.token_usage.output_tokens:
+                metrics.observe("output_tokens_per_second", self.token_usage.output_tokens / generation_time, model, site)
+        return False
+
+
 class LogLevel(IntEnum):
     OFF = -1  # No output
     ERROR = 0  # Only errors
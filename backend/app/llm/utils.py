@@ -15,6 +15,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import ast
+import asyncio
 import base64
 import importlib.util
 import inspect
@@ -22,6 +23,7 @@ import json
 import keyword
 import os
 import re
+import threading
 import time
 from functools import lru_cache
 from io import BytesIO
@@ -482,7 +484,8 @@ class RateLimiter:
 
     This class is useful for limiting the rate of operations such as API requests,
     by ensuring that calls to `throttle()` are spaced out by at least a given interval
-    based on the desired requests per minute.
+    based on the desired requests per minute. Slots are reserved under a lock, so one
+    instance can be shared between threads.
 
     If no rate is specified (i.e., `requests_per_minute` is None), rate limiting
     is disabled and `throttle()` becomes a no-op.
@@ -495,14 +498,212 @@ class RateLimiter:
     def __init__(self, requests_per_minute: float | None = None):
         self._enabled = requests_per_minute is not None
         self._interval = 60.0 / requests_per_minute if self._enabled else 0.0
-        self._last_call = 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
 
     def throttle(self):
         """Pause execution to respect the rate limit, if enabled."""
         if not self._enabled:
             return
-        now = time.time()
-        elapsed = now - self._last_call
-        if elapsed < self._interval:
-            time.sleep(self._interval - elapsed)
-        self._last_call = time.time()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class RateLimitReservation:
+    """Capacity taken from a [`TokenBucketRateLimiter`] for one request.
+
+    Attributes:
+        tokens (`int`): Number of tokens reserved (estimated before the call, corrected by `reconcile`).
+        delay (`float`): Seconds the caller has to wait before sending the request.
+    """
+
+    __slots__ = ("tokens", "delay")
+
+    def __init__(self, tokens: int = 0, delay: float = 0.0):
+        self.tokens = tokens
+        self.delay = delay
+
+    def __repr__(self) -> str:
+        return f"RateLimitReservation(tokens={self.tokens}, delay={self.delay:.3f})"
+
+
+class _FileLock:
+    """Exclusive advisory lock on a file, used to share limiter state between processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        self._fh = open(self.path, "a+b")
+        if os.name == "nt":
+            import msvcrt
+
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            import fcntl
+
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+class TokenBucketRateLimiter:
+    """Token-bucket rate limiter enforcing a requests-per-minute and a tokens-per-minute budget together.
+
+    Each budget is a bucket that refills continuously at `rate / 60` per second up to its burst
+    capacity. A call takes one request and its estimated number of tokens; when a bucket does not
+    hold enough, the call is still granted but told how long to wait, and the bucket goes into debt
+    so that later callers queue up behind it in arrival order. Once the real usage is known,
+    `reconcile` gives back (or takes) the difference with the estimate.
+
+    Reservations are computed under a lock and never sleep while holding it, so one instance can be
+    shared by threads (`acquire`) and by coroutines on any event loop (`aacquire`). With `state_file`,
+    the bucket levels live in a small JSON file guarded by an OS file lock, and every process pointing
+    at the same file shares the same budgets.
+
+    Args:
+        requests_per_minute (`float | None`): Maximum number of requests per minute. `None` disables the request budget.
+        tokens_per_minute (`float | None`): Maximum number of tokens (prompt + completion) per minute.
+            `None` disables the token budget.
+        request_burst (`float | None`): Number of requests that may start back to back. Defaults to 1,
+            i.e. requests are evenly spaced like [`RateLimiter`].
+        token_burst (`float | None`): Number of tokens that may be spent at once. Defaults to `tokens_per_minute`.
+        state_file (`str | None`): Path of a file used to share the buckets between processes.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        request_burst: float | None = None,
+        token_burst: float | None = None,
+        state_file: str | None = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_burst = float(request_burst or 1) if requests_per_minute else 0.0
+        self.token_burst = float(token_burst or tokens_per_minute or 0) if tokens_per_minute else 0.0
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        # Levels are relative to `time.time()` so that they stay meaningful across processes.
+        self._state = {"requests": self.request_burst, "tokens": self.token_burst, "updated": time.time()}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.requests_per_minute or self.tokens_per_minute)
+
+    def _refill(self, state: dict, now: float) -> dict:
+        elapsed = max(0.0, now - state["updated"])
+        if self.requests_per_minute:
+            state["requests"] = min(
+                self.request_burst, state["requests"] + elapsed * self.requests_per_minute / 60.0
+            )
+        if self.tokens_per_minute:
+            state["tokens"] = min(self.token_burst, state["tokens"] + elapsed * self.tokens_per_minute / 60.0)
+        state["updated"] = now
+        return state
+
+    def _update(self, fn) -> Any:
+        """Run `fn(state, now)` on the current bucket levels under the thread (and file) lock."""
+        with self._lock:
+            if not self.state_file:
+                now = time.time()
+                return fn(self._refill(self._state, now), now)
+            with _FileLock(self.state_file + ".lock"):
+                state = dict(self._state)
+                try:
+                    with open(self.state_file, encoding="utf-8") as f:
+                        state.update(json.load(f))
+                except (OSError, ValueError):
+                    pass
+                now = time.time()
+                result = fn(self._refill(state, now), now)
+                tmp = f"{self.state_file}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.state_file)
+                self._state = state
+                return result
+
+    def reserve(self, tokens: int = 0) -> RateLimitReservation:
+        """Take one request and `tokens` tokens from the buckets without waiting.
+
+        Returns:
+            `RateLimitReservation`: the reservation, whose `delay` is how long to wait before sending the request.
+        """
+        tokens = max(0, int(tokens))
+        if not self.enabled:
+            return RateLimitReservation(tokens, 0.0)
+
+        def take(state, now):
+            delay = 0.0
+            if self.requests_per_minute:
+                if state["requests"] < 1:
+                    delay = max(delay, (1 - state["requests"]) * 60.0 / self.requests_per_minute)
+                state["requests"] -= 1
+            if self.tokens_per_minute:
+                # A single request larger than the burst only waits for a full bucket, it is not starved.
+                needed = min(tokens, self.token_burst)
+                if state["tokens"] < needed:
+                    delay = max(delay, (needed - state["tokens"]) * 60.0 / self.tokens_per_minute)
+                state["tokens"] -= tokens
+            return delay
+
+        return RateLimitReservation(tokens, self._update(take))
+
+    def acquire(self, tokens: int = 0) -> RateLimitReservation:
+        """Reserve capacity and sleep until the request may be sent."""
+        reservation = self.reserve(tokens)
+        if reservation.delay > 0:
+            time.sleep(reservation.delay)
+        return reservation
+
+    async def aacquire(self, tokens: int = 0) -> RateLimitReservation:
+        """Reserve capacity and wait with `asyncio.sleep` until the request may be sent."""
+        reservation = self.reserve(tokens)
+        if reservation.delay > 0:
+            await asyncio.sleep(reservation.delay)
+        return reservation
+
+    def reconcile(self, reservation: RateLimitReservation | None, actual_tokens: int | None):
+        """Correct the token bucket once the real usage of a reserved request is known."""
+        if reservation is None or actual_tokens is None or not self.tokens_per_minute:
+            return
+        diff = reservation.tokens - int(actual_tokens)
+        if diff == 0:
+            return
+
+        def adjust(state, now):
+            state["tokens"] = min(self.token_burst, state["tokens"] + diff)
+
+        self._update(adjust)
+        reservation.tokens = int(actual_tokens)
+
+    def throttle(self):
+        """Wait for one request slot, for drop-in use in place of [`RateLimiter`]."""
+        self.acquire(0)
@@ -0,0 +1,436 @@
+"""
+历史月份论文回填：huggingface.co/papers/month/YYYY-MM → Supabase daily_papers。
+
+由 example/hf_daily_papers_sync_supabase.crawl_and_sync 演化而来，原版逐月串行抓取、全部论文攒在内存里，
+最后一次性 upsert，且每次 upsert 都新建 Supabase 客户端。这里：
+
+- 多个月份并发抓取，请求节奏由共享的 TokenBucketRateLimiter 控制（rate 为每秒请求数，burst 为突发数）；
+- 页面解析（data-props 扫描 + JSON 遍历）放进进程池，不和抓取线程争 GIL；
+- 主线程在月份解析完成后就把行放入缓冲，攒满 chunk_size 即 upsert，全程复用同一个仓库/客户端；
+- 一个月的行全部写入后才记入检查点文件，重启时跳过已完成月份；当前月份仍在变化，不记检查点也不读页面缓存。
+
+用法:
+    python -m app.services.backfill_service --start 2023-05
+    python -m app.services.backfill_service --start 2023-05 --end 2024-12 --rate 0.8 --burst 2 --fetch-workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..llm.utils import TokenBucketRateLimiter
+
+BASE = "https://huggingface.co"
+MONTH_URL_TMPL = BASE + "/papers/month/{yyyy}-{mm:02d}"
+ROBOTS_URL = BASE + "/robots.txt"
+USER_AGENT = "HF-DailyPapers-Crawler/1.0 (+respectful; contact: you@example.com)"
+
+_PROPS_RE = re.compile(rb'data-props="([^"]*)"')
+_PAPER_LINK_RE = re.compile(rb'<a\b[^>]*\bhref="(/papers/[^"]+)"[^>]*>(.*?)</a>', re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_PAPER_LIST_KEYS = ("dailyPapers", "papers", "calendarPapers", "topPapers")
+
+Month = Tuple[int, int]
+
+
+def month_key(month: Month) -> str:
+    return f"{month[0]}-{month[1]:02d}"
+
+
+def parse_month_arg(value: str) -> Month:
+    year, month = map(int, value.split("-"))
+    return year, month
+
+
+def month_range(start: Month, end: Month) -> Iterator[Month]:
+    y, m = start
+    while (y, m) <= end:
+        yield y, m
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+
+# ---------- 解析（在子进程中执行，只用模块级函数与可 pickle 的数据） ----------
+def _paper_row(item: Dict[str, Any], ctx: Dict[str, Any], month_url: str) -> Optional[Dict[str, Any]]:
+    p = item.get("paper")
+    if not isinstance(p, dict):
+        return None
+    title = p.get("title") or p.get("name") or ""
+    if not title:
+        return None
+    paper_id = p.get("id") or p.get("_id")
+    votes = p.get("upvotes")
+    hf_url = p.get("slug")
+    if hf_url and hf_url.startswith("/"):
+        hf_url = urljoin(BASE, hf_url)
+    return {
+        "paper_id": str(paper_id) if paper_id is not None else None,
+        "title": title,
+        "source_url": p.get("url") or p.get("sourceUrl") or p.get("arxivUrl"),
+        "huggingface_url": hf_url,
+        "date": p.get("publishedAt") or ctx.get("publishedAt"),
+        "month_url": month_url,
+        "ai_keywords": p.get("ai_keywords") or [],
+        "ai_summary": p.get("ai_summary") or "",
+        "votes": int(votes) if isinstance(votes, int) else None,
+        "meta": p,
+    }
+
+
+def _collect_rows(obj: Any, month_url: str) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+
+    def walk(x: Any, ctx: Dict[str, Any]) -> None:
+        if isinstance(x, dict):
+            for k, v in x.items():
+                if k in _PAPER_LIST_KEYS and isinstance(v, list):
+                    for it in v:
+                        if isinstance(it, dict):
+                            row = _paper_row(it, ctx, month_url)
+                            if row is not None:
+                                rows.append(row)
+                            walk(it, ctx)
+                if k == "date" and isinstance(v, str) and _DATE_RE.match(v):
+                    ctx = {**ctx, "date": v}
+                walk(v, ctx)
+        elif isinstance(x, list):
+            for i in x:
+                walk(i, ctx)
+
+    walk(obj, {})
+    return rows
+
+
+def parse_month_page(html_bytes: bytes, month_url: str) -> List[Dict[str, Any]]:
+    """
+    月份页面 -> daily_papers 行（页面内按 paper_id / title+source_url 去重）。
+    只扫描 data-props 属性值做 JSON 解析，不构建整棵 DOM；找不到论文数据时退回 /papers/ 链接标题。
+    """
+    rows: List[Dict[str, Any]] = []
+    for match in _PROPS_RE.finditer(html_bytes):
+        raw = match.group(1)
+        if b"paper" not in raw.lower():
+            continue
+        try:
+            data = json.loads(html.unescape(raw.decode("utf-8")))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            continue
+        rows.extend(_collect_rows(data, month_url))
+
+    if not rows:
+        for href, inner in _PAPER_LINK_RE.findall(html_bytes):
+            title = html.unescape(_TAG_RE.sub("", inner.decode("utf-8", "replace"))).strip()
+            if title:
+                rows.append({
+                    "paper_id": None, "title": title, "source_url": None,
+                    "huggingface_url": urljoin(BASE, href.decode()), "date": None, "month_url": month_url,
+                    "ai_keywords": [], "ai_summary": "", "votes": None, "meta": {"fallback": True},
+                })
+
+    seen = set()
+    unique = []
+    for row in rows:
+        key = row_key(row)
+        if key not in seen:
+            seen.add(key)
+            unique.append(row)
+    return unique
+
+
+def row_key(row: Dict[str, Any]) -> str:
+    return row["paper_id"] or f"{row['title']}::{row['source_url'] or ''}"
+
+
+# ---------- 抓取 ----------
+def build_session(user_agent: str = USER_AGENT, pool_size: int = 20) -> requests.Session:
+    s = requests.Session()
+    retry = Retry(
+        total=5, read=5, connect=5, backoff_factor=1.2,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers.update({"User-Agent": user_agent})
+    return s
+
+
+class MonthFetcher:
+    """带页面缓存、robots 检查与全局令牌桶限速的月份页面抓取，线程安全。"""
+
+    def __init__(self, session: requests.Session, limiter: TokenBucketRateLimiter,
+                 cache_dir: Optional[str] = ".cache/month", jitter: float = 0.2,
+                 user_agent: str = USER_AGENT, timeout: float = 15):
+        self.session = session
+        self.limiter = limiter
+        self.cache_dir = cache_dir
+        self.jitter = jitter
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self._robots: Optional[RobotFileParser] = None
+        self._robots_lock = threading.Lock()
+
+    def _cache_path(self, month: Month) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{month_key(month)}.html") if self.cache_dir else None
+
+    def can_fetch(self, path: str) -> bool:
+        # robots.txt 整个回填只读一次
+        with self._robots_lock:
+            if self._robots is None:
+                rp = RobotFileParser()
+                rp.set_url(ROBOTS_URL)
+                try:
+                    rp.read()
+                except Exception:
+                    rp.allow_all = True
+                self._robots = rp
+        return self._robots.can_fetch(self.user_agent, path)
+
+    def fetch(self, month: Month, use_cache: bool = True) -> Optional[bytes]:
+        url = MONTH_URL_TMPL.format(yyyy=month[0], mm=month[1])
+        cache_path = self._cache_path(month)
+        if use_cache and cache_path and os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                return f.read()
+
+        path = f"/papers/month/{month_key(month)}"
+        if not self.can_fetch(path):
+            logger.warning(f"[robots] Disallowed: {path}")
+            return None
+
+        self.limiter.acquire()
+        if self.jitter > 0:
+            time.sleep(random.uniform(0, self.jitter))
+        r = self.session.get(url, timeout=self.timeout)
+        r.raise_for_status()
+        content = r.content
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_path + ".part", "wb") as f:
+                f.write(content)
+            os.replace(cache_path + ".part", cache_path)
+        return content
+
+
+# ---------- 检查点 ----------
+class BackfillCheckpoint:
+    """已完成月份记录在 JSON 文件中：{"months": {"2024-05": {"rows": 812, "at": 1700000000.0}}}。"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.months: Dict[str, dict] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.months = json.load(f).get("months", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable backfill checkpoint {path}: {e}")
+
+    def done(self, month: Month) -> bool:
+        return month_key(month) in self.months
+
+    def mark(self, month: Month, rows: int) -> None:
+        self.months[month_key(month)] = {"rows": rows, "at": time.time()}
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".part", "w", encoding="utf-8") as f:
+            json.dump({"months": self.months}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(self.path + ".part", self.path)
+
+
+@dataclass
+class BackfillReport:
+    months_total: int = 0
+    months_skipped: int = 0
+    months_done: int = 0
+    months_failed: List[str] = field(default_factory=list)
+    rows_parsed: int = 0
+    rows_upserted: int = 0
+    elapsed_s: float = 0.0
+
+
+class BackfillService:
+    """
+    并发回填一段月份。repo 需提供 upsert_many(rows, chunk_size)（PaperRepositorySupabase）；
+    repo=None 时只抓取解析、不写库（dry run）。
+    """
+
+    def __init__(self, repo, fetcher: MonthFetcher, checkpoint: BackfillCheckpoint,
+                 fetch_workers: int = 4, parse_workers: int = 2, chunk_size: int = 500):
+        self.repo = repo
+        self.fetcher = fetcher
+        self.checkpoint = checkpoint
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = parse_workers
+        self.chunk_size = max(1, chunk_size)
+
+    def run(self, start: Month, end: Month, today: Optional[dt.date] = None) -> BackfillReport:
+        today = today or dt.date.today()
+        current = (today.year, today.month)
+        report = BackfillReport()
+        t0 = time.monotonic()
+
+        months = []
+        for month in month_range(start, end):
+            report.months_total += 1
+            if month != current and self.checkpoint.done(month):
+                report.months_skipped += 1
+            else:
+                months.append(month)
+
+        buffer: List[Tuple[Month, Dict[str, Any]]] = []
+        remaining: Dict[Month, int] = {}  # 月份 -> 仍在缓冲区中的行数
+        parsed_rows: Dict[Month, int] = {}
+        seen: set = set()
+
+        def complete(month: Month, checkpoint: bool = True) -> None:
+            report.months_done += 1
+            if checkpoint and month != current:
+                self.checkpoint.mark(month, parsed_rows[month])
+            logger.info(f"[backfill] {month_key(month)}: {parsed_rows[month]} rows")
+
+        def flush(force: bool = False) -> None:
+            while buffer and (force or len(buffer) >= self.chunk_size):
+                batch, buffer[:] = buffer[:self.chunk_size], buffer[self.chunk_size:]
+                if self.repo is not None:
+                    self.repo.upsert_many([row for _, row in batch], chunk_size=self.chunk_size)
+                report.rows_upserted += len(batch)
+                for month in {m for m, _ in batch}:
+                    remaining[month] -= sum(1 for m, _ in batch if m == month)
+                    if remaining[month] == 0:
+                        del remaining[month]
+                        complete(month)
+
+        def accept(month: Month, rows: List[Dict[str, Any]]) -> None:
+            fresh = []
+            for row in rows:
+                key = row_key(row)
+                if key not in seen:
+                    seen.add(key)
+                    fresh.append(row)
+            parsed_rows[month] = len(rows)
+            report.rows_parsed += len(rows)
+            if not rows and month != current:
+                # 过去的月份不会是空的，多半是页面异常或解析失败；不写检查点，下次重试
+                logger.warning(f"[backfill] {month_key(month)}: no rows parsed")
+                report.months_failed.append(month_key(month))
+                return
+            if not fresh:
+                # 行都已随其它月份进入缓冲区、尚未确认写入，不写检查点（下次重跑代价很小）
+                complete(month, checkpoint=False)
+                return
+            remaining[month] = len(fresh)
+            buffer.extend((month, row) for row in fresh)
+            flush()
+
+        parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 0 else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="backfill-fetch") as fetch_pool:
+                pending: Dict[Future, Tuple[str, Month]] = {
+                    fetch_pool.submit(self.fetcher.fetch, month, month != current): ("fetch", month)
+                    for month in months
+                }
+                try:
+                    while pending:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            kind, month = pending.pop(future)
+                            url = MONTH_URL_TMPL.format(yyyy=month[0], mm=month[1])
+                            try:
+                                result = future.result()
+                            except Exception as e:
+                                logger.warning(f"[backfill] {kind} {month_key(month)} failed: {e}")
+                                report.months_failed.append(month_key(month))
+                                continue
+                            if kind == "fetch":
+                                if result is None:
+                                    report.months_failed.append(month_key(month))
+                                elif parse_pool is not None:
+                                    pending[parse_pool.submit(parse_month_page, result, url)] = ("parse", month)
+                                else:
+                                    accept(month, parse_month_page(result, url))
+                            else:
+                                accept(month, result)
+                except BaseException:
+                    # 例如 upsert_many 失败：取消尚未开始的抓取，不再等它们跑完
+                    fetch_pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+            flush(force=True)
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+        report.elapsed_s = round(time.monotonic() - t0, 2)
+        return report
+
+
+def supabase_repo():
+    """回填全程共用的一个 Supabase 客户端/仓库。"""
+    from supabase import create_client
+
+    from ..db.repositories.paper_repo_supabase import PaperRepositorySupabase
+
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get("SUPABASE_ANON_KEY")
+    if not url or not key:
+        raise RuntimeError("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY/ANON_KEY")
+    return PaperRepositorySupabase(create_client(url, key))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    today = dt.date.today()
+    parser = argparse.ArgumentParser(description="Backfill HF monthly papers into Supabase daily_papers.")
+    parser.add_argument("--start", default="2023-05", help="YYYY-MM")
+    parser.add_argument("--end", default=f"{today.year}-{today.month:02d}", help="YYYY-MM, default = current month")
+    parser.add_argument("--rate", type=float, default=0.5, help="requests per second (global)")
+    parser.add_argument("--burst", type=int, default=1, help="token bucket burst")
+    parser.add_argument("--jitter", type=float, default=0.2, help="random jitter seconds per request")
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--parse-workers", type=int, default=2, help="0 parses in the main process")
+    parser.add_argument("--chunk-size", type=int, default=500, help="rows per upsert")
+    parser.add_argument("--cache-dir", default=os.getenv("BACKFILL_CACHE_DIR", ".cache/month"))
+    parser.add_argument("--checkpoint", default=os.getenv("BACKFILL_CHECKPOINT_PATH", ".cache/backfill_checkpoint.json"))
+    parser.add_argument("--reset-checkpoint", action="store_true", help="ignore and overwrite completed months")
+    parser.add_argument("--dry-run", action="store_true", help="fetch and parse only, do not write to Supabase")
+    parser.add_argument("--user-agent", default=USER_AGENT)
+    args = parser.parse_args(argv)
+
+    checkpoint = BackfillCheckpoint(args.checkpoint)
+    if args.reset_checkpoint:
+        checkpoint.months = {}
+    limiter = TokenBucketRateLimiter(requests_per_minute=args.rate * 60, request_burst=args.burst)
+    fetcher = MonthFetcher(build_session(args.user_agent, pool_size=max(4, args.fetch_workers)), limiter,
+                           cache_dir=args.cache_dir or None, jitter=args.jitter, user_agent=args.user_agent)
+    service = BackfillService(
+        None if args.dry_run else supabase_repo(), fetcher, checkpoint,
+        fetch_workers=args.fetch_workers, parse_workers=args.parse_workers, chunk_size=args.chunk_size,
+    )
+    report = service.run(parse_month_arg(args.start), parse_month_arg(args.end), today=today)
+    print(json.dumps(report.__dict__, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,8 @@ import uuid
 from collections.abc import Generator
 from typing import Dict, Iterable, Optional, Union
 
-from ..file.file_download import FileDonwloader
+from ..file.file_download import FileDonwloader, presigned_urls
+from ..file.presign import sign_markdown_stream
 
 from ..file.file_to_mardown import FileToMarkdown
 from werkzeug.datastructures import FileStorage
@@ -21,6 +22,7 @@ from ..db.ext_storage import storage
 # from models.account import Account
 # from models.model import EndUser, UploadFile
 from ..file.errors.file import FileTooLargeError, UnsupportedFileTypeError
+from .single_flight import SingleFlight
 
 IMAGE_EXTENSIONS = ["jpg", "jpeg", "png", "webp", "gif", "svg"]
 IMAGE_EXTENSIONS.extend([ext.upper() for ext in IMAGE_EXTENSIONS])
@@ -47,6 +49,13 @@ UNSTRUCTURED_ALLOWED_EXTENSIONS = [
 
 PREVIEW_WORDS_LIMIT = 3000
 
+# 同一篇论文的翻译 / 深度解读只跑一次，重复请求挂到同一条输出流上；
+# 多 worker 部署时设置 SINGLE_FLIGHT_LOCK_DIR（所有 worker 可见的本地目录）做跨进程合并
+paper_flights = SingleFlight(
+    max_waiters=int(os.getenv("SINGLE_FLIGHT_MAX_WAITERS", "32")),
+    lock_dir=os.getenv("SINGLE_FLIGHT_LOCK_DIR") or None,
+)
+
 class FileService:
     
     @staticmethod
@@ -166,6 +175,17 @@ class FileService:
             
     @staticmethod
     def _iter_real_deep_analysis(paper: Dict) -> Iterable[str]:
+        """
+        同一 paper 的深度解读经 single-flight 合并：并发的重复请求回放 + 跟随同一条输出流。
+        超过等待上限时立即抛出 TooManyWaitersError。
+        """
+        return paper_flights.attach(
+            (paper["id"], "deep_analysis"),
+            lambda: FileService._produce_deep_analysis(paper),
+        )
+
+    @staticmethod
+    def _produce_deep_analysis(paper: Dict) -> Iterable[str]:
         """
         读取本地已翻译好的 xx.md 文件，并流式输出给前端。
         - 默认从 ./data/translations/ 查找（可通过 current_app.config['TRANSLATIONS_DIR'] 改）
@@ -180,10 +200,21 @@ class FileService:
             return
 
         # 直接用统一的流式输出
-        yield from FileService._iter_stream_markdown(md_source)
+        yield from FileService._iter_signed_markdown(paper["id"], FileService._iter_stream_markdown(md_source))
         
     @staticmethod
     def _iter_real_translation(paper: Dict, target_lang: str, chunk_bytes: int = 4096) -> Iterable[str]:
+        """
+        同一 paper 的翻译经 single-flight 合并：并发的重复请求回放 + 跟随同一条输出流。
+        超过等待上限时立即抛出 TooManyWaitersError。
+        """
+        return paper_flights.attach(
+            (paper["id"], "translation"),
+            lambda: FileService._produce_translation(paper, target_lang, chunk_bytes=chunk_bytes),
+        )
+
+    @staticmethod
+    def _produce_translation(paper: Dict, target_lang: str, chunk_bytes: int = 4096) -> Iterable[str]:
         """
         读取本地已翻译好的 xx.md 文件，并流式输出给前端。
         - 默认从 ./data/translations/ 查找（可通过 current_app.config['TRANSLATIONS_DIR'] 改）
@@ -199,7 +230,16 @@ class FileService:
             return
 
         # 直接用统一的流式输出
-        yield from FileService._iter_stream_markdown(md_source, chunk_bytes=chunk_bytes)
+        yield from FileService._iter_signed_markdown(
+            paper["id"], FileService._iter_stream_markdown(md_source, chunk_bytes=chunk_bytes)
+        )
+
+    @staticmethod
+    def _iter_signed_markdown(paper_id: str, chunks: Iterable[str]) -> Iterable[str]:
+        """图片引用边流式输出边替换为预签名 URL（本地签名、带缓存）；MARKDOWN_SIGN_IMAGES=0 关闭。"""
+        if os.getenv("MARKDOWN_SIGN_IMAGES", "1") in ("0", "false", "False"):
+            return chunks
+        return sign_markdown_stream(chunks, f"hf_papers/{paper_id}", presigned_urls)
     @staticmethod
     def _as_plain_text_stream(gen: Iterable[str], heartbeat_interval_s: Optional[float] = None) -> Iterable[bytes]:
         """
@@ -1,4 +1,8 @@
-from ..llm.models import OpenAIServerModel
+import asyncio
+
+from ..llm.cache import CachedModel, ResponseCacheStore
+from ..llm.models import AsyncOpenAIServerModel, OpenAIServerModel
+from ..llm.monitoring import llm_call_site
 import yaml
 from ..llm.prompts.translate import translate_system_prompt
 import os
@@ -10,17 +14,56 @@ def llm_result_postprocess(llm_response_content):
     from json_repair import repair_json
     json_string = repair_json(llm_response_content, return_objects=True)
     return json_string
+def _env_float(name: str):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def llm_rate_limit_kwargs() -> dict:
+    ##RPM/TPM 限流配置；设置 LLM_RATE_LIMIT_STATE_FILE 后多个进程（gunicorn worker）共享同一份额度
+    return dict(
+        requests_per_minute=_env_float("LLM_REQUESTS_PER_MINUTE"),
+        tokens_per_minute=_env_float("LLM_TOKENS_PER_MINUTE"),
+        rate_limit_burst=_env_float("LLM_RATE_LIMIT_BURST"),
+        rate_limit_state_file=os.getenv("LLM_RATE_LIMIT_STATE_FILE") or None,
+    )
+
+
 class LLMService:
     def __init__(self):
         self.model = OpenAIServerModel(
             api_base=os.getenv('LOCAL_QWEN3_INSTRUCT_BASE'),
             api_key="empty",
             model_id="Qwen3-30B-A3B-Instruct-2507",
+            **llm_rate_limit_kwargs(),
         )
+        # 异步 worker 使用：单进程内通过协程并发驱动大量请求，而不是每个请求占一个线程
+        self.async_model = AsyncOpenAIServerModel(
+            api_base=os.getenv('LOCAL_QWEN3_INSTRUCT_BASE'),
+            api_key="empty",
+            model_id="Qwen3-30B-A3B-Instruct-2507",
+            max_concurrent_requests=int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "64")),
+        )
+        # 同步与异步调用打到同一个服务端，共用一个令牌桶
+        self.async_model.rate_limiter = self.model.rate_limiter
+        # 可选的精确匹配响应缓存：设置 LLM_RESPONSE_CACHE_PATH 后开启，默认只缓存 temperature=0 的请求
+        cache_path = os.getenv("LLM_RESPONSE_CACHE_PATH")
+        if cache_path:
+            store = ResponseCacheStore(
+                cache_path,
+                max_entries=int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", "50000")),
+                max_bytes=int(os.getenv("LLM_RESPONSE_CACHE_MAX_MB", "512")) * 1024 * 1024,
+            )
+            cache_any = os.getenv("LLM_RESPONSE_CACHE_NONDETERMINISTIC", "0") == "1"
+            self.model = CachedModel(self.model, store, cache_nondeterministic=cache_any)
+            self.async_model = CachedModel(self.async_model, store, cache_nondeterministic=cache_any)
 
     def get_model(self):
         return self.model
 
+    def get_async_model(self):
+        return self.async_model
+
     def generate_stream(self, messages: list[dict]):
         return self.model.generate_stream(messages)
 
@@ -33,11 +76,32 @@ class LLMService:
     def get_paper_translate(self, translate_content: str):
         system_prompt = translate_system_prompt
         messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": translate_content}]
-        translate = self.model.generate(messages)
+        with llm_call_site("summary"):
+            translate = self.model.generate(messages)
         translate = llm_result_postprocess(translate.content)
         translate = translate.get("zh") if isinstance(translate, dict) else ""
         return translate
     
+    async def agenerate(self, messages: list[dict]):
+        return await self.async_model.agenerate(messages)
+
+    async def agenerate_stream(self, messages: list[dict]):
+        async for delta in self.async_model.agenerate_stream(messages):
+            yield delta
+
+    async def aget_paper_translate(self, translate_content: str):
+        system_prompt = translate_system_prompt
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": translate_content}]
+        with llm_call_site("summary"):
+            translate = await self.async_model.agenerate(messages)
+        translate = llm_result_postprocess(translate.content)
+        translate = translate.get("zh") if isinstance(translate, dict) else ""
+        return translate
+
+    async def aget_paper_translate_many(self, translate_contents: list[str]) -> list[str]:
+        ##并发翻译，并发上限由 async_model 的 max_concurrent_requests 控制
+        return await asyncio.gather(*(self.aget_paper_translate(c) for c in translate_contents))
+
     def get_paper_translate_stream(self, paper_id: str):
         prompt_templates = prompt_templates or yaml.safe_load(
                 importlib.resources.files("llm.prompts").joinpath("translate.yaml").read_text()
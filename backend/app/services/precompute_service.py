@@ -0,0 +1,312 @@
+"""
+新论文产物的预计算调度。
+
+翻译和深度解读原本在第一次 /translate-stream、/interpret-stream 请求时才生成，第一个用户要等好几分钟。
+这里在 get_daily_paper 入库之后（以及定时扫描最近的论文时）提前把产物算好：
+
+- 每篇论文依次经过 download → parse → translate → upload → report 五个作业，前一个完成才入队下一个；
+- 作业按资源归类：download / upload 走网络（net），parse 占 GPU（MinerU），translate / report 占 LLM，
+  每类资源有独立的并发预算（PRECOMPUTE_{NET,GPU,LLM}_CONCURRENCY）；
+- 同一资源内按 votes 从高到低调度，热门论文先算好；
+- 各阶段通过入库清单（ingest_manifest）判断是否已完成，已完成的作业直接跳过；
+- report 经 paper_flights 执行，用户恰好同时请求同一篇论文的解读时两边共用一次生成；
+- 每个 gunicorn worker 都有自己的调度器，提交时先在清单里抢占 (paper_id, "precompute")，
+  同一篇论文只有抢到的进程处理，GPU / LLM 作业不会在多个 worker 间重复。
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+STAGE_ORDER = ("download", "parse", "translate", "upload", "report")
+STAGE_RESOURCE = {"download": "net", "parse": "gpu", "translate": "llm", "upload": "net", "report": "llm"}
+# 清单里表示“某个进程正在预计算这篇论文”的行
+CLAIM_STAGE = "precompute"
+CLAIM_LEASE_S = 6 * 3600
+
+
+@dataclass(order=True)
+class _Job:
+    sort_key: Tuple[int, int]
+    paper_id: str = field(compare=False)
+    stage: str = field(compare=False)
+    votes: int = field(compare=False, default=0)
+    payload: Any = field(compare=False, default=None)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+def _report_stage(job: Dict[str, Any]) -> Dict[str, Any]:
+    from ..file.ingest_manifest import default_manifest
+    from .file_service import FileService
+
+    from ..file.hf_papers_download_or_parser_to_oss import oss_reader
+
+    manifest = default_manifest()
+    paper_id = job["paper_id"]
+    if manifest.is_current(paper_id, "report"):
+        return job
+    report_key = f"hf_papers/{paper_id}/{paper_id}_report.md"
+    with manifest.track(paper_id, "report") as record:
+        # 与在线请求共用同一个 single-flight：生成过程中有用户请求会直接跟随这条输出
+        for _ in FileService._iter_real_deep_analysis({"id": paper_id}):
+            pass
+        # 没有 Markdown 时输出的是 mock、解读失败时输出的是原文 md，都不能算作完成；以报告对象已写入为准
+        oss_reader.forget(report_key)
+        if oss_reader.head(report_key) is None:
+            raise RuntimeError(f"deep analysis report was not produced for {paper_id}")
+        record.value("key", report_key)
+    return job
+
+
+def _claim_paper(paper_id: str) -> bool:
+    from ..file.ingest_manifest import default_manifest
+
+    return default_manifest().claim(paper_id, CLAIM_STAGE, CLAIM_LEASE_S)
+
+
+def _release_paper(paper_id: str, ok: bool) -> None:
+    from ..file.ingest_manifest import default_manifest
+
+    manifest = default_manifest()
+    if ok:
+        manifest.finish(paper_id, CLAIM_STAGE)
+    else:
+        manifest.fail(paper_id, CLAIM_STAGE, "precompute failed, see stage rows")
+
+
+def _default_stage_fns() -> Dict[str, Callable[[Any], Any]]:
+    from ..file.hf_papers_download_or_parser_to_oss import PaperFileDownloadAndParser as P
+
+    return {
+        "download": P._download_stage,
+        "parse": P._parse_stage,
+        "translate": P._translate_stage,
+        "upload": P._upload_stage,
+        "report": _report_stage,
+    }
+
+
+class PrecomputeScheduler:
+    def __init__(self, budgets: Optional[Dict[str, int]] = None,
+                 stage_fns: Optional[Dict[str, Callable[[Any], Any]]] = None,
+                 stages: Iterable[str] = STAGE_ORDER,
+                 claim: Callable[[str], bool] = _claim_paper,
+                 release: Callable[[str, bool], None] = _release_paper):
+        self.budgets = {"net": 4, "gpu": 1, "llm": 2, **(budgets or {})}
+        self.stages = tuple(stages)
+        self._stage_fns = stage_fns
+        self._claim = claim
+        self._release = release
+        self._queues: Dict[str, List[_Job]] = {r: [] for r in self.budgets}
+        self._running: Dict[str, int] = {r: 0 for r in self.budgets}
+        self._active: Dict[str, str] = {}  # paper_id -> 当前阶段（排队或执行中）
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._timer: Optional[threading.Thread] = None
+        self.stats_counters = {"submitted": 0, "completed": 0, "failed": 0, "skipped_active": 0, "skipped_claimed": 0}
+        self._stage_seconds: Dict[str, float] = {s: 0.0 for s in self.stages}
+
+    # ---------- 提交 ----------
+    def _push(self, paper_id: str, stage: str, votes: int, payload: Any) -> None:
+        job = _Job((-votes, next(self._seq)), paper_id, stage, votes, payload)
+        heapq.heappush(self._queues[STAGE_RESOURCE[stage]], job)
+        self._active[paper_id] = stage
+        self._cond.notify_all()
+
+    def submit(self, paper_id: str, votes: Optional[int] = 0) -> bool:
+        """提交一篇论文；已在排队或执行中的返回 False。"""
+        with self._cond:
+            if paper_id in self._active:
+                self.stats_counters["skipped_active"] += 1
+                return False
+            # 先占位，避免抢占清单期间同一进程内重复提交
+            self._active[paper_id] = ""
+        try:
+            claimed = self._claim(paper_id)
+        except Exception:
+            with self._cond:
+                self._active.pop(paper_id, None)
+            raise
+        with self._cond:
+            if not claimed:
+                # 其它 worker 进程正在处理这篇论文
+                self._active.pop(paper_id, None)
+                self.stats_counters["skipped_claimed"] += 1
+                self._cond.notify_all()
+                return False
+            self.stats_counters["submitted"] += 1
+            first = self.stages[0]
+            self._push(paper_id, first, int(votes or 0), paper_id if first == "download" else {"paper_id": paper_id})
+        self.start()
+        return True
+
+    def submit_many(self, papers: Iterable[Tuple[str, Optional[int]]]) -> int:
+        return sum(self.submit(paper_id, votes) for paper_id, votes in papers)
+
+    # ---------- 执行 ----------
+    def _next_job(self) -> Optional[_Job]:
+        """所有有空余预算的资源里，取 votes 最高的队首作业；都没有时等待。"""
+        with self._cond:
+            while not self._stopping:
+                heads = [(q[0], r) for r, q in self._queues.items() if q and self._running[r] < self.budgets[r]]
+                if heads:
+                    _, resource = min(heads)
+                    job = heapq.heappop(self._queues[resource])
+                    self._running[resource] += 1
+                    return job
+                self._cond.wait()
+            return None
+
+    def _finish(self, job: _Job, next_payload: Any, ok: bool) -> None:
+        with self._cond:
+            self._running[STAGE_RESOURCE[job.stage]] -= 1
+            index = self.stages.index(job.stage)
+            done = not ok or index + 1 >= len(self.stages)
+            if not done:
+                self._push(job.paper_id, self.stages[index + 1], job.votes, next_payload)
+            self._cond.notify_all()
+        if not done:
+            return
+        try:
+            self._release(job.paper_id, ok)
+        except Exception as e:
+            logger.warning("precompute release failed for {}: {}", job.paper_id, e)
+        with self._cond:
+            self._active.pop(job.paper_id, None)
+            self.stats_counters["completed" if ok else "failed"] += 1
+            self._cond.notify_all()
+
+    def _worker(self) -> None:
+        stage_fns = self._stage_fns or _default_stage_fns()
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            start = time.monotonic()
+            try:
+                result, ok = stage_fns[job.stage](job.payload), True
+            except Exception as e:
+                result, ok = None, False
+                logger.warning("precompute {} failed for {}: {}", job.stage, job.paper_id, e)
+            with self._cond:
+                self._stage_seconds[job.stage] += time.monotonic() - start
+            self._finish(job, result, ok)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads or self._stopping:
+                return
+            for n in range(sum(self.budgets.values())):
+                t = threading.Thread(target=self._worker, name=f"precompute-{n}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    # ---------- 定时扫描 ----------
+    def start_timer(self, interval_s: float, source: Callable[[], Iterable[Tuple[str, Optional[int]]]]) -> None:
+        """每 interval_s 秒调用 source() 取论文 (paper_id, votes) 并提交。"""
+
+        def loop() -> None:
+            while not self._stopping:
+                try:
+                    submitted = self.submit_many(source())
+                    if submitted:
+                        logger.info("precompute timer: submitted {} papers", submitted)
+                except Exception as e:
+                    logger.warning("precompute timer source failed: {}", e)
+                with self._cond:
+                    self._cond.wait_for(lambda: self._stopping, timeout=interval_s)
+
+        with self._cond:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(target=loop, name="precompute-timer", daemon=True)
+            self._timer.start()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                **self.stats_counters,
+                "active_papers": len(self._active),
+                "budgets": dict(self.budgets),
+                "running": dict(self._running),
+                "queued": {r: len(q) for r, q in self._queues.items()},
+                "stage_seconds": {s: round(v, 2) for s, v in self._stage_seconds.items()},
+            }
+
+
+def recent_papers(limit: int = 100, max_attempts: int = 3,
+                  backoff_s: float = 600) -> List[Tuple[str, Optional[int]]]:
+    """
+    最近入库、清单里仍有未完成阶段的论文 (paper_id, votes)。
+    预计算失败过的论文按清单里 precompute 行的 attempts / updated 退避，失败 max_attempts 次后不再自动重试
+    （ingest_manifest reset 后恢复），避免每次定时扫描都为同一篇坏论文重跑 GPU / LLM 阶段。
+    """
+    from ..file.hf_papers_download_or_parser_to_oss import paper_db
+    from ..file.ingest_manifest import default_manifest
+
+    manifest = default_manifest()
+    papers = [(p.paper_id, p.votes) for p in paper_db.list(limit=limit) if p.paper_id]
+    ids = [pid for pid, _ in papers]
+    outstanding = set(manifest.outstanding(ids, STAGE_ORDER))
+    outstanding.difference_update(manifest.backing_off(ids, CLAIM_STAGE, max_attempts, backoff_s))
+    return [(pid, votes) for pid, votes in papers if pid in outstanding]
+
+
+_scheduler: Optional[PrecomputeScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def precompute_scheduler(budgets: Optional[Dict[str, int]] = None) -> PrecomputeScheduler:
+    """进程内共享的调度器；首次创建时可传入预算（init_precompute 用 app.config 里的值）。"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PrecomputeScheduler(budgets=budgets or {
+                "net": int(os.getenv("PRECOMPUTE_NET_CONCURRENCY", "4")),
+                "gpu": int(os.getenv("PRECOMPUTE_GPU_CONCURRENCY", "1")),
+                "llm": int(os.getenv("PRECOMPUTE_LLM_CONCURRENCY", "2")),
+            })
+        return _scheduler
+
+
+def init_precompute(app) -> None:
+    """create_app 中调用：PRECOMPUTE_ENABLED 时按配置创建调度器，PRECOMPUTE_INTERVAL_S > 0 时再启动定时扫描。"""
+    if not app.config.get("PRECOMPUTE_ENABLED"):
+        return
+    scheduler = precompute_scheduler(budgets={
+        "net": int(app.config.get("PRECOMPUTE_NET_CONCURRENCY", 4)),
+        "gpu": int(app.config.get("PRECOMPUTE_GPU_CONCURRENCY", 1)),
+        "llm": int(app.config.get("PRECOMPUTE_LLM_CONCURRENCY", 2)),
+    })
+    interval_s = float(app.config.get("PRECOMPUTE_INTERVAL_S", 0))
+    if interval_s > 0:
+        limit = int(app.config.get("PRECOMPUTE_RECENT_LIMIT", 100))
+        max_attempts = int(app.config.get("PRECOMPUTE_MAX_ATTEMPTS", 3))
+        backoff_s = float(app.config.get("PRECOMPUTE_RETRY_BACKOFF_S", 600))
+        scheduler.start_timer(interval_s, lambda: recent_papers(limit, max_attempts, backoff_s))
@@ -0,0 +1,292 @@
+"""
+Single-flight 合并重复的翻译 / 深度解读任务。
+
+同一个 (paper_id, artifact) 同时只跑一条流水线（下载 → MinerU → 翻译 / 报告）：
+- 第一个请求成为 leader，流水线在后台线程里跑，输出块追加到共享缓冲；
+- 后续请求 attach 上来：先回放已产出的块，再实时跟随，直到结束；
+- 超过 max_waiters 个重复等待者时抛 TooManyWaitersError（路由层返回 429）。
+
+多 worker 部署（gunicorn 多进程）时可设置 lock_dir 开启文件锁模式：
+抢到 <key>.lock 的进程是 leader，每次运行写到独立的 <key>.<run>.spool，并把 run id 发布到 <key>.run；
+其它进程抢锁失败，就按 <key>.run 找到当前这次运行去 tail，以 <key>.<run>.done / .error 判断结束，
+而不是重跑一遍流水线。spool 不复用、不截断，跟随者的读取偏移始终有效，也不会读到上一次运行的结果。
+"""
+from __future__ import annotations
+
+import codecs
+import hashlib
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional
+
+from loguru import logger
+
+
+class TooManyWaitersError(RuntimeError):
+    """同一个 key 上等待的重复请求已达上限。"""
+
+
+class _NonBlockingFileLock:
+    """非阻塞的进程间排他锁（fcntl / msvcrt）。"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fh = None
+
+    def try_acquire(self) -> bool:
+        fh = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        self._fh = fh
+        return True
+
+    def release(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+class _Flight:
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+        self.cond = threading.Condition()
+
+    def append(self, chunk: str) -> None:
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+
+class SingleFlight:
+    """
+    进程内的 single-flight 注册表，可选文件锁模式做跨进程合并。
+
+    用法：
+        flights = SingleFlight(max_waiters=32)
+        gen = flights.attach((paper_id, "translation"), lambda: produce(paper_id))
+        for chunk in gen: ...
+
+    attach() 是普通函数：注册/挂载在调用时立即完成（超限会立刻抛出），返回的迭代器负责回放 + 跟随。
+    """
+
+    def __init__(self, max_waiters: int = 32, lock_dir: Optional[str] = None,
+                 poll_interval_s: float = 0.2, wait_timeout_s: float = 30.0):
+        self.max_waiters = max_waiters
+        self.lock_dir = Path(lock_dir) if lock_dir else None
+        self.poll_interval_s = poll_interval_s
+        self.wait_timeout_s = wait_timeout_s
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+        if self.lock_dir:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---------- 对外接口 ----------
+    def attach(self, key: Hashable, producer: Callable[[], Iterable[str]]) -> Iterator[str]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(key)
+                leader = True
+            else:
+                if flight.waiters >= self.max_waiters:
+                    raise TooManyWaitersError(f"too many duplicate requests waiting on {key!r}")
+                flight.waiters += 1
+                leader = False
+        if leader:
+            threading.Thread(target=self._run, args=(flight, producer),
+                             name=f"single-flight-{key}", daemon=True).start()
+        else:
+            logger.info("single-flight: attach to in-flight {} ({} waiting)", key, flight.waiters)
+        return self._follow(flight, counted=not leader)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {str(k): {"chunks": len(f.chunks), "waiters": f.waiters} for k, f in self._flights.items()}
+
+    # ---------- leader ----------
+    def _run(self, flight: _Flight, producer: Callable[[], Iterable[str]]) -> None:
+        error: Optional[BaseException] = None
+        try:
+            if self.lock_dir:
+                self._run_with_file_lock(flight, producer)
+            else:
+                for chunk in producer():
+                    flight.append(chunk)
+        except BaseException as e:  # noqa: BLE001 —— 交给跟随者重新抛出
+            logger.error("single-flight {} failed: {}", flight.key, e)
+            error = e
+        finally:
+            # 先从注册表摘掉，之后的新请求会重新跑（此时产物多半已在 OSS 上，很快）
+            with self._lock:
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+            flight.finish(error)
+
+    # 上一次运行的文件在这之后清理；跟随者最多慢这么久读完最后一块
+    STALE_RUN_S = 300.0
+
+    def _paths(self, key: Hashable):
+        """(<key>.lock, <key>.run, run 文件名前缀)。"""
+        name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return self.lock_dir / f"{name}.lock", self.lock_dir / f"{name}.run", name
+
+    def _run_files(self, name: str, run_id: str):
+        base = self.lock_dir / f"{name}.{run_id}"
+        return (base.with_name(base.name + ".spool"), base.with_name(base.name + ".done"),
+                base.with_name(base.name + ".error"))
+
+    @staticmethod
+    def _current_run(run_path: Path) -> Optional[str]:
+        try:
+            return run_path.read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _remove_stale_runs(self, name: str, keep: str) -> None:
+        cutoff = time.time() - self.STALE_RUN_S
+        for path in self.lock_dir.glob(f"{name}.*.*"):
+            if path.name.startswith(f"{name}.{keep}."):
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _run_with_file_lock(self, flight: _Flight, producer: Callable[[], Iterable[str]]) -> None:
+        lock_path, run_path, name = self._paths(flight.key)
+        file_lock = _NonBlockingFileLock(lock_path)
+        while True:
+            if file_lock.try_acquire():
+                break
+            # 其它进程在跑：跟随它的 spool；它中途挂掉（锁释放但没有 done 标记）就自己接手
+            if self._tail_spool(flight, run_path, name, file_lock):
+                return
+        try:
+            run_id = f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+            spool_path, done_path, error_path = self._run_files(name, run_id)
+            with open(spool_path, "w", encoding="utf-8") as spool:
+                # spool 建好后再发布 run id，跟随者看到的 run 一定有文件可读
+                tmp = run_path.with_name(f"{run_path.name}.{run_id}.tmp")
+                tmp.write_text(run_id, encoding="utf-8")
+                os.replace(tmp, run_path)
+                self._remove_stale_runs(name, run_id)
+                try:
+                    for chunk in producer():
+                        flight.append(chunk)
+                        spool.write(chunk)
+                        spool.flush()
+                except BaseException as e:
+                    error_path.write_text(f"{type(e).__name__}: {e}", encoding="utf-8")
+                    raise
+            done_path.touch()
+        finally:
+            file_lock.release()
+
+    def _tail_spool(self, flight: _Flight, run_path: Path, name: str,
+                    file_lock: _NonBlockingFileLock) -> bool:
+        """
+        tail 持锁进程当前这次运行的 spool；正常结束返回 True，leader 异常退出返回 False（调用方接手）。
+        <key>.run 指向已结束的运行时，说明新 leader 还没发布 run id（那是上一次的结果），继续等待。
+        """
+        run_id: Optional[str] = None
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        offset = 0
+        while True:
+            current = self._current_run(run_path)
+            if current is not None and current != run_id:
+                _, done_path, error_path = self._run_files(name, current)
+                fresh = not (done_path.exists() or error_path.exists())
+                if run_id is not None and fresh:
+                    # 跟随的 leader 已退出，另一个进程接手重跑
+                    if flight.chunks:
+                        raise RuntimeError(f"single-flight leader for {flight.key!r} exited before finishing")
+                    run_id = None
+                if run_id is None and fresh:
+                    run_id, offset = current, 0
+                    decoder = codecs.getincrementaldecoder("utf-8")()
+            if run_id is not None:
+                spool_path, done_path, error_path = self._run_files(name, run_id)
+                finished = done_path.exists() or error_path.exists()
+                try:
+                    with open(spool_path, "rb") as f:
+                        f.seek(offset)
+                        data = f.read()
+                except FileNotFoundError:
+                    data = b""
+                if data:
+                    offset += len(data)
+                    text = decoder.decode(data)
+                    if text:
+                        flight.append(text)
+                if finished:
+                    rest = decoder.decode(b"", final=True)
+                    if rest:
+                        flight.append(rest)
+                    if error_path.exists():
+                        raise RuntimeError(error_path.read_text(encoding="utf-8"))
+                    return True
+            if file_lock.try_acquire():
+                file_lock.release()
+                if run_id is not None and any(p.exists() for p in self._run_files(name, run_id)[1:]):
+                    continue  # 检查完标记后 leader 才正常结束，下一轮读完剩余部分
+                # 锁空出来了却没有 done 标记：leader 进程已退出，已回放的部分丢弃重来
+                if flight.chunks:
+                    raise RuntimeError(f"single-flight leader for {flight.key!r} exited before finishing")
+                return False
+            time.sleep(self.poll_interval_s)
+
+    # ---------- 跟随者（含 leader 的请求本身） ----------
+    def _follow(self, flight: _Flight, counted: bool) -> Iterator[str]:
+        index = 0
+        try:
+            while True:
+                with flight.cond:
+                    while index >= len(flight.chunks) and not flight.done:
+                        flight.cond.wait(self.wait_timeout_s)
+                    pending = flight.chunks[index:]
+                    index += len(pending)
+                    finished = flight.done and index >= len(flight.chunks)
+                    error = flight.error
+                if pending:
+                    yield "".join(pending)
+                if finished:
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            if counted:
+                with self._lock:
+                    flight.waiters -= 1
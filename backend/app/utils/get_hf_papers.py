@@ -1,45 +1,219 @@
+import hashlib
+import html
 import json
-from typing import List
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 
-from bs4 import BeautifulSoup
 import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+HF_PAPERS_URL = "https://huggingface.co/papers"
 
-def get_hugging_face_top_daily_paper() -> List:
+_PROPS_ATTR = b'data-props="'
+_DAILY_KEY = b"&quot;dailyPapers&quot;"
+
+
+def extract_daily_papers(page: bytes) -> Optional[List[dict]]:
+    """
+    Pull the `dailyPapers` list out of the papers page without building a DOM.
+
+    The list lives in the `data-props` attribute of one SVELTE_HYDRATER div. We jump straight to
+    the `&quot;dailyPapers&quot;` key, walk back to the opening `data-props="` of that attribute and
+    forward to its closing quote (attribute values never contain a raw `"`), then unescape and
+    json-decode only that slice. Returns None when the key is missing, [] when it is empty.
+    """
+    pos = page.find(_DAILY_KEY)
+    while pos != -1:
+        start = page.rfind(_PROPS_ATTR, 0, pos)
+        if start != -1:
+            start += len(_PROPS_ATTR)
+            end = page.find(b'"', start)
+            # the key must sit inside this attribute, not after its closing quote
+            if end > pos:
+                try:
+                    data = json.loads(html.unescape(page[start:end].decode("utf-8")))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    data = None
+                if isinstance(data, dict) and "dailyPapers" in data:
+                    return [item["paper"] for item in data["dailyPapers"] if "paper" in item]
+        pos = page.find(_DAILY_KEY, pos + len(_DAILY_KEY))
+    return None
+
+
+def extract_daily_papers_soup(page: bytes) -> Optional[List[dict]]:
+    """The original BeautifulSoup walk over every SVELTE_HYDRATER div; kept as a fallback and for benchmarks."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, "html.parser")
+    papers = None
+    for container in soup.find_all('div', class_='SVELTE_HYDRATER contents'):
+        data_props = container.get('data-props', '')
+        if not data_props:
+            continue
+        try:
+            json_data = json.loads(data_props.replace('&quot;', '"'))
+        except json.JSONDecodeError:
+            continue
+        if 'dailyPapers' in json_data:
+            papers = (papers or []) + [item['paper'] for item in json_data['dailyPapers']]
+    return papers
+
+
+@dataclass
+class _CachedPage:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    checked_at: float
+    papers: Optional[List[dict]] = None
+
+
+class HfPapersFetcher:
+    """
+    Conditional GET of the papers page over a pooled session.
+
+    The last response is kept in memory and on disk (`{cache_dir}/{sha1(url)}.html` plus a `.json`
+    with the validators), so a restart still sends If-None-Match / If-Modified-Since. A 304 reuses
+    the cached body and its already-parsed papers; within `min_refresh_s` of the last check no
+    request is sent at all. When the request fails, the last good page is served if there is one.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, min_refresh_s: float = 60,
+                 connect_timeout: float = 10, read_timeout: float = 30, retries: int = 3):
+        self.cache_dir = cache_dir
+        self.min_refresh_s = min_refresh_s
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "upaper/1.0", "Accept": "text/html"})
+        retry = Retry(
+            total=retries,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._pages: Dict[str, _CachedPage] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "fresh": 0, "downloaded": 0, "stale_on_error": 0}
+
+    # ---------- disk cache ----------
+    def _cache_paths(self, url: str):
+        stem = os.path.join(self.cache_dir, hashlib.sha1(url.encode()).hexdigest())
+        return stem + ".html", stem + ".json"
+
+    def _load(self, url: str) -> Optional[_CachedPage]:
+        if not self.cache_dir:
+            return None
+        body_path, meta_path = self._cache_paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        # checked_at=0 makes the first call after a restart revalidate instead of trusting the file blindly
+        return _CachedPage(body, meta.get("etag"), meta.get("last_modified"), 0.0)
+
+    def _save(self, url: str, page: _CachedPage) -> None:
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self._cache_paths(url)
+        try:
+            with open(body_path + ".part", "wb") as f:
+                f.write(page.body)
+            os.replace(body_path + ".part", body_path)
+            with open(meta_path + ".part", "w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": page.etag, "last_modified": page.last_modified}, f)
+            os.replace(meta_path + ".part", meta_path)
+        except OSError as e:
+            logger.warning(f"Could not write hf papers cache: {e}")
+
+    # ---------- fetch ----------
+    def fetch(self, url: str = HF_PAPERS_URL) -> _CachedPage:
+        with self._lock:
+            cached = self._pages.get(url) or self._load(url)
+            if cached is not None and time.time() - cached.checked_at < self.min_refresh_s:
+                self.stats["fresh"] += 1
+                return cached
+
+            headers = {}
+            if cached is not None and cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached is not None and cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+            self.stats["requests"] += 1
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code == 304 and cached is not None:
+                    self.stats["not_modified"] += 1
+                    cached.checked_at = time.time()
+                    self._pages[url] = cached
+                    return cached
+                response.raise_for_status()
+            except requests.exceptions.RequestException:
+                if cached is None:
+                    raise
+                self.stats["stale_on_error"] += 1
+                return cached
+
+            self.stats["downloaded"] += 1
+            page = _CachedPage(response.content, response.headers.get("ETag"),
+                               response.headers.get("Last-Modified"), time.time())
+            self._pages[url] = page
+            self._save(url, page)
+            return page
+
+    def daily_papers(self, url: str = HF_PAPERS_URL) -> List[dict]:
+        page = self.fetch(url)
+        if page.papers is None:
+            papers = extract_daily_papers(page.body)
+            if papers is None:
+                # markup changed in a way the scanner does not recognise; fall back to the full parse
+                papers = extract_daily_papers_soup(page.body) or []
+            page.papers = papers
+        return page.papers
+
+
+_fetcher: Optional[HfPapersFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def default_fetcher() -> HfPapersFetcher:
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = HfPapersFetcher(
+                cache_dir=os.getenv("HF_PAPERS_CACHE_DIR", ".cache/hf_papers") or None,
+                min_refresh_s=float(os.getenv("HF_PAPERS_MIN_REFRESH_S", 60)),
+            )
+        return _fetcher
+
+
+def get_hugging_face_top_daily_paper(url: str = HF_PAPERS_URL) -> List:
     """
     This is a tool that returns the most upvoted paper on Hugging Face daily papers.
     It returns the title of the paper
     """
     try:
-      url = "https://huggingface.co/papers"
-      response = requests.get(url)
-      response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-      soup = BeautifulSoup(response.content, "html.parser")
-
-      # Extract the title element from the JSON-like data in the "data-props" attribute
-      containers = soup.find_all('div', class_='SVELTE_HYDRATER contents')
-      top_paper_list = []
-      top_paper = ""
-
-      for container in containers:
-          data_props = container.get('data-props', '')
-          if data_props:
-              try:
-                  # Parse the JSON-like string
-                  json_data = json.loads(data_props.replace('&quot;', '"'))
-                  if 'dailyPapers' in json_data:
-                    #   top_paper = json_data['dailyPapers'][0]['title']
-                      for top_paper in json_data['dailyPapers']:
-                          top_paper_list.append(top_paper['paper'])
-              except json.JSONDecodeError:
-                  continue
-      print("top paper list:",len(top_paper_list))
-    #   with open("top_daily_paper_list.jsonl", "w", encoding="utf-8") as f:
-    #         f.write(json.dumps(top_paper_list,ensure_ascii=False,indent=4))
-      return top_paper_list
+        top_paper_list = default_fetcher().daily_papers(url)
+        print("top paper list:", len(top_paper_list))
+        # copies, so callers that mutate the dicts do not touch the cached parse
+        return [dict(paper) for paper in top_paper_list]
     except requests.exceptions.RequestException as e:
-      print(f"Error occurred while fetching the HTML: {e}")
-      return None
-    
+        print(f"Error occurred while fetching the HTML: {e}")
+        return None
+
+
 if __name__ == "__main__":
-    get_hugging_face_top_daily_paper()  
\ No newline at end of file
+    get_hugging_face_top_daily_paper()
@@ -0,0 +1,90 @@
+"""Benchmark dailyPapers extraction from saved huggingface.co/papers pages.
+
+Compares the targeted ``data-props`` scanner used by ``get_hugging_face_top_daily_paper`` with the
+previous full BeautifulSoup parse (skipped when bs4 is not installed), and checks that both return
+the same papers. ``--pad-kb`` inflates the page with unrelated markup to approximate the size of
+the live page; save a real one with ``curl -o page.html https://huggingface.co/papers``.
+
+``get_hf_papers.py`` is loaded by file path, so the ``app`` package (and its storage / credential
+setup) is never imported; only requests and loguru are needed.
+
+    python scripts/bench_hf_papers_parse.py
+    python scripts/bench_hf_papers_parse.py page.html --pad-kb 800 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import statistics
+import time
+
+HF_PAPERS_MODULE = os.path.join(os.path.dirname(__file__), "..", "backend", "app", "utils", "get_hf_papers.py")
+
+
+def load_hf_papers():
+    spec = importlib.util.spec_from_file_location("get_hf_papers", HF_PAPERS_MODULE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+hf_papers = load_hf_papers()
+extract_daily_papers, extract_daily_papers_soup = hf_papers.extract_daily_papers, hf_papers.extract_daily_papers_soup
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "hf_papers_daily.html")
+
+
+def pad(page: bytes, pad_kb: int) -> bytes:
+    """Insert ``pad_kb`` KB of ordinary markup before ``</body>``, away from the payload."""
+    if pad_kb <= 0:
+        return page
+    block = b'<article class="card"><h3><a href="/papers/x">A paper card</a></h3><p>Some text</p></article>\n'
+    filler = block * (pad_kb * 1024 // len(block) + 1)
+    at = page.rfind(b"</body>")
+    return page[:at] + filler + page[at:] if at != -1 else page + filler
+
+
+def timed(fn, page: bytes, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(page)
+        samples.append(time.perf_counter() - start)
+    return result, samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pages", nargs="*", default=[DEFAULT_FIXTURE])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--pad-kb", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        import bs4  # noqa: F401
+        methods = [("scanner", extract_daily_papers), ("soup", extract_daily_papers_soup)]
+    except ImportError:
+        print("bs4 not installed; timing the scanner only")
+        methods = [("scanner", extract_daily_papers)]
+
+    for path in args.pages:
+        with open(path, "rb") as f:
+            page = pad(f.read(), args.pad_kb)
+        print(f"{os.path.basename(path)}  {len(page) / 1024:.0f} KB")
+        results = {}
+        for name, fn in methods:
+            results[name], samples = timed(fn, page, args.repeat)
+            count = len(results[name]) if results[name] is not None else "none"
+            print(f"  {name:<8} median {statistics.median(samples) * 1000:8.2f} ms   "
+                  f"min {min(samples) * 1000:8.2f} ms   papers={count}")
+        if len(results) > 1:
+            same = results["scanner"] == results["soup"]
+            print(f"  results match: {same}")
+            if not same:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
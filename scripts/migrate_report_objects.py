@@ -0,0 +1,111 @@
+"""One-off migration: rewrite bit-string encoded report objects on Aliyun OSS in the utf8-v1 format.
+
+Old objects store every byte as eight ASCII 0/1 characters plus a space. This tool lists the
+objects under a prefix, converts the legacy ones to UTF-8 (optionally compressed) with the proper
+Content-Type / Content-Encoding and a sha256 in object metadata, and leaves everything else alone.
+
+    python scripts/migrate_report_objects.py --prefix hf_papers/ --dry-run
+    python scripts/migrate_report_objects.py --prefix hf_papers/ --workers 16 --compression gzip
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import alibabacloud_oss_v2 as oss
+from dotenv import load_dotenv
+
+from app.file.artifact_format import (
+    ARTIFACT_FORMAT,
+    decode_artifact,
+    decode_legacy_bitstring,
+    encode_artifact,
+    is_legacy_bitstring,
+)
+
+
+def build_client() -> oss.Client:
+    cfg = oss.config.load_default()
+    cfg.credentials_provider = oss.credentials.EnvironmentVariableCredentialsProvider()
+    cfg.region = os.getenv("ALIYUN_OSS_REGION")
+    cfg.endpoint = os.getenv("ALIYUN_OSS_ENDPOINT")
+    return oss.Client(cfg)
+
+
+def iter_keys(client: oss.Client, bucket: str, prefix: str, suffix: str):
+    paginator = client.list_objects_v2_paginator()
+    for page in paginator.iter_page(oss.ListObjectsV2Request(bucket=bucket, prefix=prefix)):
+        for obj in page.contents or []:
+            if obj.key.endswith(suffix):
+                yield obj.key
+
+
+def migrate_one(client: oss.Client, bucket: str, key: str, compression: str | None, dry_run: bool) -> tuple[str, int, int]:
+    """Return (status, old_size, new_size); status is migrated / skipped / would-migrate."""
+    result = client.get_object(oss.GetObjectRequest(bucket=bucket, key=key))
+    with result.body as body_stream:
+        data = body_stream.read()
+    metadata = {k.lower(): v for k, v in (result.metadata or {}).items()}
+    if metadata.get("artifact-format") == ARTIFACT_FORMAT or not is_legacy_bitstring(data):
+        return "skipped", len(data), len(data)
+
+    text = decode_legacy_bitstring(data).decode("utf-8")
+    artifact = encode_artifact(text, compression=compression)
+    # 写回前先自检：新格式必须能原样解回
+    if decode_artifact(artifact.body, artifact.content_encoding, artifact.metadata) != text:
+        raise RuntimeError(f"round-trip check failed for {key}")
+    if dry_run:
+        return "would-migrate", len(data), len(artifact.body)
+    client.put_object(oss.PutObjectRequest(
+        bucket=bucket,
+        key=key,
+        body=artifact.body,
+        content_type=artifact.content_type,
+        content_encoding=artifact.content_encoding,
+        metadata=artifact.metadata,
+    ))
+    return "migrated", len(data), len(artifact.body)
+
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefix", default="hf_papers/")
+    parser.add_argument("--suffix", default="_report.md")
+    parser.add_argument("--compression", default="gzip", choices=["gzip", "zstd", "none"])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    bucket = os.getenv("ALIYUN_OSS_BUCKET_NAME")
+    if not bucket:
+        raise SystemExit("ALIYUN_OSS_BUCKET_NAME is not set")
+    compression = None if args.compression == "none" else args.compression
+    client = build_client()
+
+    counts: dict[str, int] = {}
+    old_total = new_total = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(migrate_one, client, bucket, key, compression, args.dry_run): key
+            for key in iter_keys(client, bucket, args.prefix, args.suffix)
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                status, old_size, new_size = future.result()
+            except Exception as e:
+                status, old_size, new_size = "failed", 0, 0
+                print(f"[failed] {key}: {e}")
+            counts[status] = counts.get(status, 0) + 1
+            if status in ("migrated", "would-migrate"):
+                old_total += old_size
+                new_total += new_size
+                print(f"[{status}] {key}: {old_size} -> {new_size} bytes")
+
+    print(f"done: {counts}; legacy bytes {old_total} -> {new_total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Local stand-in for the MinerU ``/file_parse`` endpoint, for exercising sharded parsing.
+
+Accepts the same multipart form as MinerU (``files`` plus ``start_page_id`` / ``end_page_id`` and the
+``return_*`` flags) and answers in MinerU's response shape. Each page becomes a markdown section
+with one per-page image; every response also carries a shared ``logo`` image so the stitcher's
+de-duplication is exercised. Per-page images are named by their position within the request
+(``fig-0``, ``fig-1``, ...) while their bytes depend on the uploaded PDF and the absolute page, so
+every shard after the first returns the same names with different content and the stitcher's
+rename path is exercised too. ``--seconds-per-page`` simulates GPU time, so several instances on
+different ports show how shards are balanced.
+
+    python scripts/mineru_standin_server.py --port 8801 --seconds-per-page 0.2 &
+    python scripts/mineru_standin_server.py --port 8802 --seconds-per-page 0.2 &
+    PARSE_URLS=http://127.0.0.1:8801/file_parse,http://127.0.0.1:8802/file_parse PARSE_SHARD_PAGES=10 ...
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import re
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 1x1 PNG; the bytes are varied per image by appending a tEXt-free trailer
+_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+
+def page_texts(pdf_bytes: bytes):
+    """Per-page text via pypdfium2 when available, otherwise placeholders from a /Type /Page count."""
+    try:
+        import pypdfium2
+    except ImportError:
+        n_pages = len(re.findall(rb"/Type\s*/Page(?![s\w])", pdf_bytes)) or 1
+        return [f"(text of page {i + 1})" for i in range(n_pages)]
+    pdf = pypdfium2.PdfDocument(pdf_bytes)
+    try:
+        texts = []
+        for page in pdf:
+            text_page = page.get_textpage()
+            texts.append(text_page.get_text_range().strip() or "(empty page)")
+            text_page.close()
+            page.close()
+        return texts
+    finally:
+        pdf.close()
+
+
+def parse_form(content_type: str, body: bytes):
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields, files = {}, {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        filename = part.get_filename()
+        if filename is not None:
+            files[name] = (filename, part.get_payload(decode=True))
+        else:
+            fields[name] = part.get_content().strip()
+    return fields, files
+
+
+def image_b64(seed: str) -> str:
+    return "data:image/png;base64," + base64.b64encode(_PNG + seed.encode()).decode()
+
+
+def build_result(stem: str, texts, start: int, end: int, flags: dict, source: str) -> dict:
+    md_parts, pdf_info, images = [], [], {}
+    logo = hashlib.sha256(b"logo").hexdigest() + ".png"
+    images[logo] = image_b64("logo")
+    md_parts.append(f"![logo](images/{logo})")
+    for idx in range(start, end + 1):
+        name = f"fig-{idx - start}.png"
+        images[name] = image_b64(f"{source}:{idx}")
+        md_parts.append(f"## Page {idx + 1}\n\n{texts[idx]}\n\n![](images/{name})")
+        pdf_info.append({"page_idx": idx, "page_size": [612, 792],
+                         "para_blocks": [{"type": "image", "image_path": name}]})
+    result = {"md_content": "\n\n".join(md_parts) + "\n"}
+    if flags.get("return_middle_json") == "true":
+        result["middle_json"] = json.dumps({"pdf_info": pdf_info, "_backend": "standin",
+                                            "_version_name": "0"})
+    if flags.get("return_images") == "true":
+        result["images"] = images
+    return result
+
+
+class Handler(BaseHTTPRequestHandler):
+    seconds_per_page = 0.0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        fields, files = parse_form(self.headers.get("Content-Type", ""), body)
+        if "files" not in files:
+            self.send_error(400, "missing files")
+            return
+        filename, pdf_bytes = files["files"]
+        texts = page_texts(pdf_bytes)
+        start = max(0, int(fields.get("start_page_id", 0)))
+        end = min(len(texts) - 1, int(fields.get("end_page_id", 99999)))
+        time.sleep(self.seconds_per_page * (end - start + 1))
+        stem = filename.rsplit(".", 1)[0]
+        payload = json.dumps({
+            "backend": "standin",
+            "version": "0",
+            "results": {stem: build_result(stem, texts, start, end, fields,
+                                           hashlib.sha256(pdf_bytes).hexdigest()[:16])},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        print(f"[standin:{self.server.server_port}] " + fmt % args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--seconds-per-page", type=float, default=0.0)
+    args = parser.parse_args()
+    Handler.seconds_per_page = args.seconds_per_page
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"MinerU stand-in listening on http://{args.host}:{args.port}/file_parse")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()